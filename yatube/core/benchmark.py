@@ -0,0 +1,194 @@
+"""
+Нагрузочный прогон маршрутов posts, search и about.
+
+Данные заливаются ``bulk_create`` пачками (команда ``seed_benchmark``),
+затем каждый маршрут запрашивается тестовым клиентом (команда
+``benchmark``). По каждому маршруту считаются p50/p95/p99 времени ответа,
+число SQL-запросов и размер ответа; результат сравнивается с сохранённым
+базовым JSON.
+"""
+import time
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.test import Client, override_settings
+from django.urls import URLResolver, get_resolver, reverse
+
+from posts.models import Group, Post
+
+from .budgets import QueryCounter
+from .stats import percentile
+
+User = get_user_model()
+
+NAMESPACES = ('posts', 'search', 'about')
+
+# Маршруты, которые нельзя гонять GET-запросом без побочных эффектов
+SKIPPED_ROUTES = {
+    'posts:post_delete': 'удаляет пост, GET-страницы подтверждения нет',
+    'posts:profile_follow': 'принимает только POST',
+    'posts:profile_unfollow': 'принимает только POST',
+}
+
+# Дополнительные GET-параметры маршрута
+ROUTE_QUERY = {
+    'search:search': {'data': 'пост'},
+    'posts:group_autocomplete': {'q': 'bench'},
+}
+
+# Маршруты, которые открывает автор постов
+LOGIN_ROUTES = {
+    'posts:post_create', 'posts:post_edit', 'posts:follow_index',
+    'posts:group_autocomplete'}
+
+PERCENTILES = (50, 95, 99)
+
+
+def seed(users, groups, posts, batch_size=5000, log=None):
+    """
+    Заливает пользователей, группы и посты пачками ``bulk_create``.
+    Повторный запуск доливает только недостающее: уже созданные
+    ``bench_user_N`` и ``bench-group-N`` пропускаются, постов у них
+    становится ``posts``.
+    """
+    if min(users, groups, posts) < 0:
+        raise ValueError('Число объектов не может быть отрицательным')
+    if batch_size < 1:
+        raise ValueError('Размер пачки должен быть положительным')
+    password = make_password(None)
+    chunks(User, range(users), batch_size, log, lambda number: User(
+        username=f'bench_user_{number}', password=password),
+        ignore_conflicts=True)
+    chunks(Group, range(groups), batch_size, log, lambda number: Group(
+        title=f'Группа {number}', title_key=f'группа {number}',
+        slug=f'bench-group-{number}',
+        description=f'Описание группы {number}'), ignore_conflicts=True)
+    user_ids = list(
+        User.objects.filter(username__startswith='bench_user_')
+        .values_list('id', flat=True))
+    group_ids = list(
+        Group.objects.filter(slug__startswith='bench-group-')
+        .values_list('id', flat=True))
+    # Через JOIN, а не author_id__in: id авторов не влезут в лимит
+    # переменных SQLite
+    numbers = range(
+        Post.objects.filter(author__username__startswith='bench_user_')
+        .count(), posts)
+    if numbers and not user_ids:
+        raise ValueError('Для постов нужен хотя бы один пользователь')
+    chunks(Post, numbers, batch_size, log, lambda number: Post(
+        text=f'Тестовый пост номер {number} про {number % 97}',
+        author_id=user_ids[number % len(user_ids)],
+        # Примерно каждый пятый пост без группы
+        group_id=(
+            group_ids[number % len(group_ids)]
+            if group_ids and number % 5 else None)))
+
+
+def chunks(model, numbers, batch_size, log, build, ignore_conflicts=False):
+    objects = map(build, numbers)
+    created = 0
+    while created < len(numbers):
+        batch = list(islice(objects, batch_size))
+        model.objects.bulk_create(batch, ignore_conflicts=ignore_conflicts)
+        created += len(batch)
+        if log:
+            log(f'{model._meta.verbose_name_plural}: '
+                f'{created}/{len(numbers)}')
+
+
+def routes():
+    """Маршруты из ``NAMESPACES``: имя вида ``posts:main`` и его аргументы."""
+    found = {}
+    for entry in get_resolver().url_patterns:
+        if isinstance(entry, URLResolver) and entry.namespace in NAMESPACES:
+            found.update(
+                (f'{entry.namespace}:{pattern.name}',
+                 tuple(pattern.pattern.converters))
+                for pattern in entry.url_patterns if pattern.name)
+    return found
+
+
+def route_kwargs(post):
+    """Значения аргументов маршрутов на примере поста из базы."""
+    return {
+        'post_id': post.pk,
+        'username': post.author.username,
+        'slug': post.group.slug,
+    }
+
+
+def measure(client, url, data, requests, warmup):
+    for _ in range(warmup):
+        client.get(url, data)
+    timings = []
+    for _ in range(requests):
+        with QueryCounter() as counter:
+            started = time.perf_counter()
+            response = client.get(url, data)
+            content = (
+                b''.join(response.streaming_content)
+                if response.streaming else response.content)
+            elapsed = time.perf_counter() - started
+        timings.append(elapsed * 1000)
+    result = {
+        'url': url,
+        'status': response.status_code,
+        'queries': counter.count,
+        'bytes': len(content),
+    }
+    result.update(
+        (f'p{percent}', round(percentile(timings, percent), 3))
+        for percent in PERCENTILES)
+    return result
+
+
+def run(requests=50, warmup=5, names=None):
+    """Прогоняет маршруты, возвращает результаты по имени маршрута."""
+    post = (
+        Post.objects.select_related('author', 'group')
+        .filter(group__isnull=False).order_by('-pk').first())
+    if post is None:
+        raise ValueError('Нет постов с группой: сначала seed_benchmark')
+    kwargs = route_kwargs(post)
+    guest, author = Client(), Client()
+    author.force_login(post.author)
+    results = {}
+    # Замеряются сами представления, а не ответы 429 ограничителя
+    with override_settings(THROTTLE_RATES={}):
+        for name, params in routes().items():
+            if name in SKIPPED_ROUTES or names and name not in names:
+                continue
+            url = reverse(
+                name, kwargs={param: kwargs[param] for param in params})
+            client = author if name in LOGIN_ROUTES else guest
+            results[name] = measure(
+                client, url, ROUTE_QUERY.get(name), requests, warmup)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Регрессии относительно базового прогона, списком строк."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for percent in PERCENTILES:
+            key = f'p{percent}'
+            if result[key] > base[key] * (1 + tolerance):
+                regressions.append(
+                    f'{name}: {key} {result[key]} мс, было {base[key]} мс')
+        if result['queries'] > base['queries']:
+            regressions.append(
+                f'{name}: запросов {result["queries"]}, '
+                f'было {base["queries"]}')
+        if result['bytes'] > base['bytes'] * (1 + tolerance):
+            regressions.append(
+                f'{name}: ответ {result["bytes"]} байт, '
+                f'было {base["bytes"]}')
+        if result['status'] != base['status']:
+            regressions.append(
+                f'{name}: статус {result["status"]}, было {base["status"]}')
+    return regressions
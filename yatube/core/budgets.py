@@ -0,0 +1,43 @@
+"""
+Бюджет SQL-запросов представления.
+
+Бюджет объявляется атрибутом ``max_queries`` у класса представления
+(или у функции-представления) и учитывает все запросы запроса целиком,
+включая загрузку сессии и пользователя.
+"""
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+
+
+def get_query_budget(view):
+    """Бюджет представления по функции из ``resolver_match.func``."""
+    view = getattr(view, 'view_class', view)
+    return getattr(view, 'max_queries', None)
+
+
+class QueryCounter:
+    """Считает запросы ко всем базам внутри блока ``with`` и их время."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self._stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
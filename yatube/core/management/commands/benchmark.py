@@ -0,0 +1,62 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from core import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет p50/p95/p99, число запросов и размер ответа каждого '
+        'маршрута posts, search и about и сверяет их с базовым прогоном')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'routes', nargs='*',
+            help='Имена маршрутов вида posts:main, по умолчанию все')
+        parser.add_argument('--requests', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument(
+            '--baseline', help='JSON прошлого прогона для сравнения')
+        parser.add_argument(
+            '--tolerance', type=float, default=0.2,
+            help='Допустимый рост времени и размера ответа, доля')
+        parser.add_argument('--output', help='Куда сохранить результаты')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('--requests должен быть положительным')
+        # Тестовый клиент ходит на testserver
+        hosts = [*settings.ALLOWED_HOSTS, 'testserver']
+        try:
+            with override_settings(ALLOWED_HOSTS=hosts):
+                results = benchmark.run(
+                    options['requests'], options['warmup'],
+                    options['routes'])
+        except ValueError as error:
+            raise CommandError(error)
+        self.report(results)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(results, output, ensure_ascii=False, indent=2)
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as baseline:
+                regressions = benchmark.compare(
+                    results, json.load(baseline), options['tolerance'])
+            for regression in regressions:
+                self.stdout.write(self.style.ERROR(regression))
+            if regressions:
+                raise CommandError(f'Регрессий: {len(regressions)}')
+            self.stdout.write(self.style.SUCCESS('Регрессий нет'))
+
+    def report(self, results):
+        self.stdout.write(
+            f'{"маршрут":<22}{"код":>5}{"p50":>9}{"p95":>9}{"p99":>9}'
+            f'{"SQL":>6}{"байт":>9}')
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:<22}{result["status"]:>5}{result["p50"]:>9.2f}'
+                f'{result["p95"]:>9.2f}{result["p99"]:>9.2f}'
+                f'{result["queries"]:>6}{result["bytes"]:>9}')
@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import profiling
+
+
+class Command(BaseCommand):
+    help = (
+        'Выдаёт токен для заголовка X-Profile: запросы с ним '
+        'профилируются, см. core.profiling')
+
+    def handle(self, *args, **options):
+        self.stdout.write(profiling.make_token())
+        self.stderr.write(
+            f'Действует {settings.PROFILING_TOKEN_MAX_AGE} с')
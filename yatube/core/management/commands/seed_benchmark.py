@@ -0,0 +1,33 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from core import benchmark
+from search import cache, index
+
+
+class Command(BaseCommand):
+    help = (
+        'Заливает данные для нагрузочного прогона пачками bulk_create. '
+        'Повторный запуск доливает только недостающее')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50000)
+        parser.add_argument('--groups', type=int, default=5000)
+        parser.add_argument('--posts', type=int, default=1000000)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        try:
+            benchmark.seed(
+                options['users'], options['groups'], options['posts'],
+                batch_size=options['batch_size'], log=self.stdout.write)
+        except ValueError as error:
+            raise CommandError(error)
+        # bulk_create обходит сигналы: счётчики, статистика групп и индекс
+        # строятся заново
+        call_command('rebuild_post_counters', stdout=self.stdout)
+        call_command('rebuild_group_stats', stdout=self.stdout)
+        if index.is_available():
+            index.rebuild()
+        cache.invalidate()
+        self.stdout.write(self.style.SUCCESS('Данные залиты'))
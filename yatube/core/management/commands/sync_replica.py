@@ -0,0 +1,55 @@
+import os
+import sqlite3
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+SQLITE = 'django.db.backends.sqlite3'
+
+
+def copy_sqlite(source, target):
+    """
+    Копирует базу SQLite онлайн-бэкапом во временный файл и подменяет им
+    ``target``: открытые соединения реплики дочитывают старую копию.
+    """
+    fd, temp_path = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(target)), suffix='.sqlite3')
+    os.close(fd)
+    try:
+        src, dst = sqlite3.connect(source), sqlite3.connect(temp_path)
+        try:
+            src.backup(dst)
+        finally:
+            dst.close()
+            src.close()
+        os.replace(temp_path, target)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+class Command(BaseCommand):
+    help = 'Обновляет реплики копией основной базы SQLite'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'aliases', nargs='*',
+            help='Реплики из DATABASES; по умолчанию REPLICA_DATABASES')
+
+    def handle(self, *args, **options):
+        source = connections[DEFAULT_DB_ALIAS].settings_dict
+        aliases = options['aliases'] or settings.REPLICA_DATABASES
+        if not aliases:
+            raise CommandError('Реплики не настроены: REPLICA_DATABASES пуст')
+        for alias in aliases:
+            if alias not in settings.DATABASES:
+                raise CommandError(f'Нет базы {alias!r} в DATABASES')
+            target = connections[alias].settings_dict
+            if not source['ENGINE'] == target['ENGINE'] == SQLITE:
+                raise CommandError(
+                    'Копировать умеем только SQLite; реплику другой СУБД '
+                    'настраивают её собственной репликацией')
+            copy_sqlite(source['NAME'], target['NAME'])
+            self.stdout.write(f'{alias}: скопировано из {source["NAME"]}')
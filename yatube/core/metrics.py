@@ -0,0 +1,160 @@
+"""
+Метрики запросов в формате Prometheus.
+
+``MetricsMiddleware`` по имени маршрута складывает в гистограммы время
+ответа, число и время SQL-запросов, время отрисовки шаблонов и размер
+ответа; ``/metrics`` отдаёт их текстом. Гистограммы живут в памяти
+процесса: при нескольких WSGI-процессах каждый отдаёт свои, и Prometheus
+должен опрашивать их по отдельности.
+
+Приложения могут добавить свои показатели функцией ``register_collector``:
+коллектор вызывается при каждом опросе ``/metrics`` и возвращает пары
+``(имя, значение)``. Упавший коллектор пишется в лог и пропускается.
+"""
+import logging
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+TIME_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (1024, 10240, 102400, 1048576, 10485760)
+
+logger = logging.getLogger(__name__)
+
+# Время отрисовки шаблонов текущего запроса, см. core.template_backends
+template_timer = ContextVar('template_timer', default=None)
+
+
+class TemplateTimer:
+    def __init__(self):
+        self.total = 0.0
+        # Вложенная отрисовка (render_to_string из тега) уже учтена внешней
+        self.depth = 0
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def snapshot(self):
+        """Накопительные значения корзин, сумма и число наблюдений."""
+        with self._lock:
+            counts, total = list(self.counts), self.sum
+        cumulative, running = [], 0
+        for count in counts:
+            running += count
+            cumulative.append(running)
+        return cumulative, total, running
+
+
+class HistogramFamily:
+    """Гистограммы одной метрики с разными значениями метки ``view``."""
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def observe(self, view, value):
+        histogram = self.histograms.get(view)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(
+                    view, Histogram(self.buckets))
+        histogram.observe(value)
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+
+    def render(self):
+        yield f'# HELP {self.name} {self.help_text}'
+        yield f'# TYPE {self.name} histogram'
+        with self._lock:
+            histograms = sorted(self.histograms.items())
+        for view, histogram in histograms:
+            label = f'view="{escape(view)}"'
+            cumulative, total, count = histogram.snapshot()
+            bounds = [format_value(bound) for bound in self.buckets]
+            for bound, value in zip(bounds + ['+Inf'], cumulative):
+                yield f'{self.name}_bucket{{{label},le="{bound}"}} {value}'
+            yield f'{self.name}_sum{{{label}}} {format_value(total)}'
+            yield f'{self.name}_count{{{label}}} {count}'
+
+
+def escape(value):
+    return (
+        value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n'))
+
+
+def format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+REQUEST_DURATION = HistogramFamily(
+    'yatube_request_duration_seconds', 'Время ответа', TIME_BUCKETS)
+SQL_QUERIES = HistogramFamily(
+    'yatube_sql_queries', 'Число SQL-запросов за запрос', QUERY_BUCKETS)
+SQL_DURATION = HistogramFamily(
+    'yatube_sql_duration_seconds', 'Время SQL-запросов за запрос',
+    TIME_BUCKETS)
+TEMPLATE_DURATION = HistogramFamily(
+    'yatube_template_render_seconds', 'Время отрисовки шаблонов за запрос',
+    TIME_BUCKETS)
+RESPONSE_SIZE = HistogramFamily(
+    'yatube_response_size_bytes', 'Размер тела ответа', SIZE_BUCKETS)
+
+FAMILIES = (
+    REQUEST_DURATION, SQL_QUERIES, SQL_DURATION, TEMPLATE_DURATION,
+    RESPONSE_SIZE)
+
+_collectors = []
+
+
+def register_collector(collector):
+    _collectors.append(collector)
+
+
+def observe(view, duration, queries, sql_duration, template_duration, size):
+    REQUEST_DURATION.observe(view, duration)
+    SQL_QUERIES.observe(view, queries)
+    SQL_DURATION.observe(view, sql_duration)
+    TEMPLATE_DURATION.observe(view, template_duration)
+    if size is not None:
+        RESPONSE_SIZE.observe(view, size)
+
+
+def reset():
+    for family in FAMILIES:
+        family.reset()
+
+
+def render():
+    lines = []
+    for family in FAMILIES:
+        lines.extend(family.render())
+    for collector in _collectors:
+        try:
+            values = list(collector())
+        except Exception:
+            logger.exception('Коллектор метрик %s упал', collector.__name__)
+            continue
+        for name, value in values:
+            lines.append(f'# TYPE {name} gauge')
+            lines.append(f'{name} {format_value(value)}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,159 @@
+import logging
+import math
+import time
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+
+from . import metrics, profiling, throttle
+from .budgets import QueryCounter, get_query_budget
+from .routers import choose_replica, replica_alias
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetMiddleware:
+    """В режиме DEBUG пишет в лог запросы, превысившие бюджет SQL."""
+
+    def __init__(self, get_response):
+        if not settings.DEBUG:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with QueryCounter() as counter:
+            response = self.get_response(request)
+        match = request.resolver_match
+        budget = get_query_budget(match.func) if match else None
+        if budget is not None and counter.count > budget:
+            logger.warning(
+                'Превышен бюджет SQL-запросов %s: %d из %d (%s)',
+                match.view_name, counter.count, budget, request.path)
+        return response
+
+
+class ReplicaMiddleware:
+    """
+    Направляет чтение представлений с ``use_replica`` на реплику.
+
+    После успешного изменяющего запроса сессия на ``REPLICA_STICKY_SECONDS``
+    читает только из ``default``, чтобы видеть свои записи, пока реплика
+    их не догнала.
+    """
+
+    session_key = '_replica_pinned_until'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = replica_alias.set(None)
+        try:
+            response = self.get_response(request)
+        finally:
+            replica_alias.reset(token)
+        if (settings.REPLICA_DATABASES
+                and request.method not in SAFE_METHODS
+                and response.status_code < 400):
+            request.session[self.session_key] = (
+                time.time() + settings.REPLICA_STICKY_SECONDS)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view = getattr(view_func, 'view_class', view_func)
+        if not getattr(view, 'use_replica', False):
+            return None
+        if request.session.get(self.session_key, 0) > time.time():
+            return None
+        replica_alias.set(choose_replica())
+        return None
+
+
+class ThrottleMiddleware:
+    """
+    Ограничивает частоту запросов к маршрутам из ``THROTTLE_RATES``.
+
+    Сверх лимита представление не вызывается: клиент получает 429 с
+    заголовком Retry-After и телом своего последнего успешного ответа
+    по этому маршруту, если оно ещё в кэше.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        route = self.get_route(request)
+        if (route and response.status_code == 200
+                and not response.streaming):
+            throttle.get_cache().set(
+                throttle.last_response_key(request, route),
+                (response['Content-Type'], response.content),
+                settings.THROTTLE_LAST_RESPONSE_TIMEOUT)
+        return response
+
+    def get_route(self, request):
+        match = request.resolver_match
+        if match and match.view_name in settings.THROTTLE_RATES:
+            return match.view_name
+        return None
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        route = self.get_route(request)
+        if not route:
+            return None
+        wait = throttle.check(request, route)
+        if not wait:
+            return None
+        content_type, content = throttle.get_cache().get(
+            throttle.last_response_key(request, route),
+            ('text/plain; charset=utf-8', b''))
+        response = HttpResponse(
+            content, content_type=content_type,
+            status=HTTPStatus.TOO_MANY_REQUESTS)
+        response['Retry-After'] = math.ceil(wait)
+        return response
+
+
+class MetricsMiddleware:
+    """Складывает метрики запроса по имени маршрута, см. core.metrics."""
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = metrics.TemplateTimer()
+        token = metrics.template_timer.set(timer)
+        started = time.perf_counter()
+        try:
+            with QueryCounter() as counter:
+                response = self.get_response(request)
+        finally:
+            metrics.template_timer.reset(token)
+        match = request.resolver_match
+        metrics.observe(
+            match.view_name if match else 'unresolved',
+            time.perf_counter() - started, counter.count, counter.duration,
+            timer.total,
+            None if response.streaming else len(response.content))
+        return response
+
+
+class ProfilingMiddleware:
+    """Снимает профиль запросов по токену или выборке, см. core.profiling."""
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not profiling.should_profile(request):
+            return self.get_response(request)
+        return profiling.profile(request, self.get_response)
@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.core.paginator import InvalidPage
+from django.http import Http404
+
+from .paginators import CursorPaginator, LookaheadPaginator
+
+
+class CursorPaginationMixin:
+    """
+    Переключает ListView на keyset-пагинацию.
+
+    Режим включается атрибутом ``cursor_pagination`` у представления,
+    а если он не задан — настройкой ``CURSOR_PAGINATION``.
+    """
+
+    cursor_pagination = None
+    cursor_kwarg = 'cursor'
+    cursor_ordering = ('-pub_date', '-id')
+
+    def use_cursor_pagination(self):
+        if self.cursor_pagination is None:
+            return settings.CURSOR_PAGINATION
+        return self.cursor_pagination
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.use_cursor_pagination():
+            return super().paginate_queryset(queryset, page_size)
+        paginator = CursorPaginator(
+            queryset, page_size, ordering=self.cursor_ordering)
+        try:
+            page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        except InvalidPage as e:
+            raise Http404(str(e))
+        return paginator, page, page.object_list, page.has_other_pages()
+
+
+class CountedPaginationMixin:
+    """
+    Пагинация без COUNT(*) по выборке: следующая страница видна по лишней
+    строке, а общее число объектов — оценка от ``get_total_count``
+    (None, если дешёвой оценки нет).
+    """
+
+    paginator_class = LookaheadPaginator
+
+    def get_total_count(self):
+        return None
+
+    def get_paginator(self, queryset, per_page, **kwargs):
+        return self.paginator_class(
+            queryset, per_page, count_func=self.get_total_count, **kwargs)
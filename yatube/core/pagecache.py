@@ -0,0 +1,112 @@
+"""
+Кэш целых страниц, общий для всех пользователей.
+
+Пользовательские фрагменты (шапка, кнопки автора) при записи в кэш
+заменяются метками тега ``{% hole %}`` и дорисовываются под текущий
+запрос при каждой отдаче. Запись хранит версии своих тегов и считается
+устаревшей, как только любой из тегов сброшен через ``invalidate``.
+"""
+import base64
+import hashlib
+import json
+import re
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+
+from .routers import replica_alias
+
+HOLE_RE = re.compile(rb'<!--page-hole:([A-Za-z0-9+/=]+)-->')
+
+
+def is_enabled():
+    return settings.PAGE_CACHE_ENABLED
+
+
+def tag_key(tag):
+    return f'pagecache:tag:{tag}'
+
+
+def page_key(request):
+    digest = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'pagecache:page:{digest}'
+
+
+def current_versions(tags):
+    """Текущие версии тегов; отсутствующим назначаются новые."""
+    keys = {tag_key(tag): tag for tag in tags}
+    versions = {
+        keys[key]: version for key, version in cache.get_many(keys).items()}
+    for key, tag in keys.items():
+        if tag not in versions:
+            cache.add(key, uuid.uuid4().hex, None)
+            versions[tag] = cache.get(key)
+    return versions
+
+
+def invalidate(*tags):
+    cache.delete_many([tag_key(tag) for tag in tags])
+
+
+def make_hole(template_name, context):
+    payload = json.dumps({'template': template_name, 'context': context})
+    encoded = base64.b64encode(payload.encode()).decode()
+    return f'<!--page-hole:{encoded}-->'
+
+
+def fill_holes(content, request):
+    def render(match):
+        hole = json.loads(base64.b64decode(match.group(1)))
+        return render_to_string(
+            hole['template'], hole['context'], request=request).encode()
+    return HOLE_RE.sub(render, content)
+
+
+class PageCacheMixin:
+    """
+    Отдаёт GET-запросы из общего кэша страниц. Представление сообщает
+    теги страницы в ``get_page_cache_tags``; они должны быть известны к
+    ``get_context_data``.
+    """
+
+    punch_holes = False
+    page_cache_versions = None
+
+    def get_page_cache_tags(self):
+        raise NotImplementedError
+
+    def get_context_data(self, **kwargs):
+        # Версии тегов читаются до выборки содержимого: сброс, случившийся
+        # во время отрисовки, их поменяет, и страница не попадёт в кэш
+        self.page_cache_versions = current_versions(
+            self.get_page_cache_tags())
+        context = super().get_context_data(**kwargs)
+        context['punch_holes'] = self.punch_holes
+        return context
+
+    def dispatch(self, request, *args, **kwargs):
+        if not is_enabled() or request.method != 'GET':
+            return super().dispatch(request, *args, **kwargs)
+        key = page_key(request)
+        entry = cache.get(key)
+        if entry is not None and (
+                current_versions(entry['tags']) == entry['tags']):
+            return HttpResponse(fill_holes(entry['content'], request))
+        self.punch_holes = True
+        response = super().dispatch(request, *args, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        versions = self.page_cache_versions
+        # Страница с отстающей реплики пережила бы сброс своих тегов
+        if (response.status_code == 200 and replica_alias.get() is None
+                and versions is not None
+                and current_versions(versions) == versions):
+            cache.set(key, {
+                'content': response.content,
+                'tags': versions,
+            }, settings.PAGE_CACHE_TIMEOUT)
+        response.content = fill_holes(response.content, request)
+        return response
@@ -0,0 +1,314 @@
+from django.core import signing
+from django.core.exceptions import ValidationError
+from django.core.paginator import (EmptyPage, InvalidPage, Page,
+                                   PageNotAnInteger, Paginator)
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+
+
+class InvalidCursor(InvalidPage):
+    pass
+
+
+class CountedPaginator(Paginator):
+    """Paginator, который берёт общее число объектов у ``count_func``."""
+
+    def __init__(self, object_list, per_page, count_func=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_func = count_func
+
+    @cached_property
+    def count(self):
+        if self.count_func is None:
+            return super().count
+        return self.count_func()
+
+
+class LookaheadPage(Page):
+    """Страница, про следующую страницу которой известно по лишней строке."""
+
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+    def start_index(self):
+        if not self.object_list:
+            return 0
+        return (self.number - 1) * self.paginator.per_page + 1
+
+    def end_index(self):
+        return self.start_index() + len(self.object_list) - 1
+
+    @cached_property
+    def page_window(self):
+        return self.paginator.get_elided_page_range(self)
+
+
+class LookaheadPaginator(Paginator):
+    """
+    Пагинация по номерам без COUNT(*): страница выбирается с одной лишней
+    строкой, по ней и видно, есть ли следующая.
+
+    Общее число объектов — оценка от ``count_func`` (например, счётчик
+    постов); если её нет, ``estimated_count`` равен None, а окно номеров
+    кончается на следующей странице.
+    """
+
+    ELLIPSIS = '…'
+    on_each_side = 2
+
+    def __init__(self, object_list, per_page, count_func=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_func = count_func
+
+    @cached_property
+    def estimated_count(self):
+        return self.count_func() if self.count_func is not None else None
+
+    @cached_property
+    def count(self):
+        # Только для ?page=last и стороннего кода: шаблоны берут оценку
+        if self.estimated_count is not None:
+            return self.estimated_count
+        return super().count
+
+    def validate_number(self, number):
+        """Проверяет только, что номер — целое не меньше единицы."""
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('Номер страницы должен быть целым')
+        if number < 1:
+            raise EmptyPage('Номер страницы меньше 1')
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page
+        # Хвост не больше orphans присоединяется к текущей странице
+        rows = list(self.object_list[bottom:top + self.orphans + 1])
+        has_next = len(rows) > self.per_page + self.orphans
+        if has_next:
+            rows = rows[:self.per_page]
+        if not rows and (number > 1 or not self.allow_empty_first_page):
+            raise EmptyPage('На этой странице нет результатов')
+        object_list = rows
+        if isinstance(self.object_list, QuerySet):
+            # Страница остаётся выборкой, но строки уже загружены:
+            # count() и обход не делают запросов
+            object_list = self.object_list[bottom:bottom + len(rows)]
+            object_list._result_cache = rows
+            object_list._prefetch_done = True
+        return LookaheadPage(object_list, number, self, has_next)
+
+    def get_elided_page_range(self, page):
+        """
+        Номера страниц вокруг текущей: первая, текущая ±``on_each_side``
+        и последняя, пропуски — ``ELLIPSIS``.
+        """
+        number = page.number
+        last = number
+        if page.has_next():
+            last = number + 1
+            if self.estimated_count is not None:
+                last = max(last, -(-self.estimated_count // self.per_page))
+        window = range(
+            max(number - self.on_each_side, 1),
+            min(number + self.on_each_side, last) + 1)
+        pages = []
+        if window[0] > 1:
+            pages.append(1)
+            if window[0] > 2:
+                pages.append(self.ELLIPSIS)
+        pages.extend(window)
+        if window[-1] < last:
+            if window[-1] < last - 1:
+                pages.append(self.ELLIPSIS)
+            pages.append(last)
+        return pages
+
+
+class CappedCountPaginator(CountedPaginator):
+    """
+    Без ``count_func`` считает объекты не дальше ``cap``: COUNT(*) не
+    обходит всю таблицу, а страницы за пределом ``cap`` недоступны.
+    """
+
+    def __init__(self, object_list, per_page, cap, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.cap = cap
+
+    @cached_property
+    def count(self):
+        if self.count_func is not None:
+            return self.count_func()
+        return self.object_list[:self.cap].count()
+
+
+class CursorPage(Page):
+    """Страница keyset-пагинации: вместо номера хранит курсоры соседей."""
+
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, next_cursor, previous_cursor):
+        super().__init__(object_list, None, paginator)
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return '<Cursor page>'
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def start_index(self):
+        return None
+
+    def end_index(self):
+        return None
+
+
+class CursorPaginator(Paginator):
+    """
+    Пагинация по ключу (pub_date, id) без OFFSET и COUNT(*).
+
+    Номер страницы заменён непрозрачным подписанным курсором, поэтому
+    выборка любой страницы стоит одинаково независимо от глубины. Общее
+    число объектов и страниц не считается: ``count`` и ``num_pages`` —
+    None, ``page_range`` пуст.
+    """
+
+    salt = 'core.paginators.CursorPaginator'
+    count = None
+    num_pages = None
+    page_range = range(0)
+
+    def __init__(self, object_list, per_page,
+                 ordering=('-pub_date', '-id'), **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.ordering = tuple(ordering)
+        self.fields = [
+            (name.lstrip('-'), name.startswith('-')) for name in ordering
+        ]
+
+    def encode_cursor(self, direction, obj):
+        key = []
+        for name, _ in self.fields:
+            value = getattr(obj, name)
+            key.append(
+                value.isoformat() if hasattr(value, 'isoformat') else value)
+        return signing.dumps([direction, key], salt=self.salt)
+
+    def decode_cursor(self, cursor):
+        try:
+            direction, key = signing.loads(cursor, salt=self.salt)
+            if direction not in ('next', 'previous'):
+                raise ValueError(direction)
+            if len(key) != len(self.fields):
+                raise ValueError(key)
+            opts = self.object_list.model._meta
+            key = [
+                opts.get_field(name).to_python(value)
+                for (name, _), value in zip(self.fields, key)
+            ]
+        except (signing.BadSignature, ValidationError, TypeError,
+                ValueError):
+            raise InvalidCursor('Неверный курсор страницы')
+        return direction, key
+
+    def _seek(self, key, backwards, names=None):
+        """
+        Условие «строго после key» в порядке обхода. ``names`` заменяет
+        имена полей ключа, если в выборке они называются иначе.
+        """
+        fields = self.fields
+        if names is not None:
+            fields = [
+                (name, descending)
+                for name, (_, descending) in zip(names, fields)]
+        condition = None
+        for (name, descending), value in reversed(list(zip(fields, key))):
+            lookup = 'lt' if descending != backwards else 'gt'
+            step = Q(**{f'{name}__{lookup}': value})
+            if condition is not None:
+                step |= Q(**{name: value}) & condition
+            condition = step
+        # Избыточный диапазон по первому полю позволяет СУБД начать
+        # обход индекса с нужного места, а не с его начала.
+        (name, descending), value = fields[0], key[0]
+        lookup = 'lte' if descending != backwards else 'gte'
+        return Q(**{f'{name}__{lookup}': value}) & condition
+
+    def order_by(self, backwards, names=None):
+        names = names or [name for name, _ in self.fields]
+        return [
+            name if descending == backwards else f'-{name}'
+            for name, (_, descending) in zip(names, self.fields)
+        ]
+
+    def fetch(self, key, backwards):
+        """Следующие ``per_page + 1`` объектов после ключа ``key``."""
+        queryset = self.object_list
+        if key is not None:
+            queryset = queryset.filter(self._seek(key, backwards))
+        return list(
+            queryset.order_by(*self.order_by(backwards))[:self.per_page + 1])
+
+    def page(self, cursor=None):
+        direction, key = (
+            self.decode_cursor(cursor) if cursor else ('next', None))
+        backwards = direction == 'previous'
+        rows = self.fetch(key, backwards)
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+            has_previous, has_next = has_more, True
+        else:
+            has_previous, has_next = key is not None, has_more
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = self.encode_cursor('next', rows[-1])
+        if rows and has_previous:
+            previous_cursor = self.encode_cursor('previous', rows[0])
+        return CursorPage(rows, self, next_cursor, previous_cursor)
+
+
+class MergedCursorPaginator(CursorPaginator):
+    """
+    Keyset-пагинация по объединению нескольких выборок.
+
+    Источник — пара (queryset, имена полей ключа в нём); последнее поле —
+    id объекта из ``object_list``. Из каждого источника берётся не больше
+    страницы ключей, ключи сливаются, а сами объекты достаются одним
+    запросом к ``object_list``.
+    """
+
+    def __init__(self, object_list, per_page, sources, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        if len({descending for _, descending in self.fields}) > 1:
+            raise ValueError('Все поля ключа должны идти в одну сторону')
+        self.sources = sources
+
+    def fetch(self, key, backwards):
+        keys = set()
+        for queryset, names in self.sources:
+            if key is not None:
+                queryset = queryset.filter(self._seek(key, backwards, names))
+            keys.update(
+                queryset.order_by(*self.order_by(backwards, names))
+                .values_list(*names)[:self.per_page + 1])
+        descending = self.fields[0][1]
+        keys = sorted(keys, reverse=descending != backwards)
+        keys = keys[:self.per_page + 1]
+        objects = self.object_list.in_bulk([key[-1] for key in keys])
+        return [objects[key[-1]] for key in keys if key[-1] in objects]
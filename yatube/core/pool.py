@@ -0,0 +1,109 @@
+"""
+Общий пул процессов для тяжёлой работы вне запроса.
+
+Число процессов задаёт ``BACKGROUND_WORKERS`` (0 — выполнять сразу,
+в вызывающем потоке), число задач в очереди — ``BACKGROUND_QUEUE_SIZE``.
+Когда очередь заполнена, задача не ставится: ``submit`` возвращает False,
+и вызывающий код сам решает, как её досделать позже.
+
+Работа с базой в процесс пула не передаётся: для неё ``defer`` с теми же
+настройками выполняет задачу в фоновом потоке этого процесса.
+"""
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_executor = None
+_slots = None
+_thread_executor = None
+_thread_slots = None
+
+
+def get_executor():
+    global _executor, _slots
+    with _lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(settings.BACKGROUND_WORKERS)
+            _slots = threading.BoundedSemaphore(
+                settings.BACKGROUND_QUEUE_SIZE)
+        return _executor, _slots
+
+
+def get_thread_executor():
+    global _thread_executor, _thread_slots
+    with _lock:
+        if _thread_executor is None:
+            _thread_executor = ThreadPoolExecutor(
+                settings.BACKGROUND_WORKERS, thread_name_prefix='background')
+            _thread_slots = threading.BoundedSemaphore(
+                settings.BACKGROUND_QUEUE_SIZE)
+        return _thread_executor, _thread_slots
+
+
+def submit(func, args, callback=None):
+    """
+    Выполняет ``func(*args)`` в пуле, затем ``callback(result)`` в этом
+    процессе. Возвращает False, если очередь заполнена.
+    """
+    if not settings.BACKGROUND_WORKERS:
+        result = func(*args)
+        if callback is not None:
+            callback(result)
+        return True
+    executor, slots = get_executor()
+    if not slots.acquire(blocking=False):
+        logger.warning('Очередь фоновых задач заполнена: %s', func.__name__)
+        return False
+    future = executor.submit(func, *args)
+    caller = threading.get_ident()
+    future.add_done_callback(
+        lambda future: _done(future, slots, callback, caller))
+    return True
+
+
+def _done(future, slots, callback, caller):
+    slots.release()
+    try:
+        result = future.result()
+        if callback is not None:
+            callback(result)
+    except Exception:
+        logger.exception('Фоновая задача завершилась с ошибкой')
+    finally:
+        # Обычно колбэк выполняется в служебном потоке пула со своим
+        # соединением; соединения вызывающего потока трогать нельзя
+        if threading.get_ident() != caller:
+            connections.close_all()
+
+
+def defer(func, args):
+    """
+    Выполняет ``func(*args)`` в фоновом потоке. Возвращает False, если
+    очередь заполнена.
+    """
+    if not settings.BACKGROUND_WORKERS:
+        func(*args)
+        return True
+    executor, slots = get_thread_executor()
+    if not slots.acquire(blocking=False):
+        logger.warning('Очередь фоновых задач заполнена: %s', func.__name__)
+        return False
+    executor.submit(_run_deferred, func, args, slots)
+    return True
+
+
+def _run_deferred(func, args, slots):
+    try:
+        func(*args)
+    except Exception:
+        logger.exception('Фоновая задача завершилась с ошибкой')
+    finally:
+        slots.release()
+        # Соединения этого служебного потока
+        connections.close_all()
@@ -0,0 +1,188 @@
+"""
+Профилирование отдельных запросов в продакшене.
+
+Запрос профилируется, если в заголовке ``X-Profile`` пришёл подписанный
+токен (его выдаёт ``manage.py profile_token``) или если он попал в
+случайную выборку ``PROFILING_SAMPLE_RATE``. cProfile снимает профиль
+запроса, вместе с ним записываются SQL-запросы (без параметров) и их
+время. Каждый снимок — пара файлов в ``PROFILING_DIR``: ``.prof`` для
+pstats/snakeviz и ``.json`` с описанием запроса. Когда каталог больше
+``PROFILING_MAX_BYTES``, самые старые снимки удаляются.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import re
+import time
+import uuid
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core import signing
+from django.db import connections
+from django.utils import timezone
+
+HEADER = 'HTTP_X_PROFILE'
+SALT = 'core.profiling'
+
+NAME_RE = re.compile(r'^[\w.-]+$')
+
+
+def make_token():
+    return signing.TimestampSigner(salt=SALT).sign(uuid.uuid4().hex)
+
+
+def is_valid_token(token):
+    try:
+        signing.TimestampSigner(salt=SALT).unsign(
+            token, max_age=settings.PROFILING_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def should_profile(request):
+    token = request.META.get(HEADER)
+    if token:
+        return is_valid_token(token)
+    rate = settings.PROFILING_SAMPLE_RATE
+    return bool(rate) and random.random() < rate
+
+
+class SQLRecorder:
+    """Записывает SQL всех баз внутри блока ``with``."""
+
+    def __init__(self):
+        self.queries = []
+        self._stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'sql': sql,
+                'duration': time.perf_counter() - started,
+                'database': context['connection'].alias,
+            })
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+
+def profile(request, get_response):
+    """Выполняет запрос под профилировщиком и сохраняет снимок."""
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    with SQLRecorder() as recorder:
+        profiler.enable()
+        try:
+            response = get_response(request)
+        finally:
+            profiler.disable()
+    match = request.resolver_match
+    save(profiler, {
+        'path': request.get_full_path(),
+        'method': request.method,
+        'view': match.view_name if match else '',
+        'status': response.status_code,
+        'duration': time.perf_counter() - started,
+        'created': timezone.now().isoformat(),
+        'queries': recorder.queries,
+    })
+    return response
+
+
+def save(profiler, meta):
+    directory = settings.PROFILING_DIR
+    os.makedirs(directory, exist_ok=True)
+    view = re.sub(r'[^\w-]', '_', meta['view']) or 'unresolved'
+    stamp = time.strftime('%Y%m%d-%H%M%S')
+    name = f'{stamp}-{view}-{uuid.uuid4().hex[:8]}'
+    profiler.dump_stats(os.path.join(directory, name + '.prof'))
+    with open(os.path.join(directory, name + '.json'), 'w',
+              encoding='utf-8') as stream:
+        json.dump(meta, stream, ensure_ascii=False)
+    rotate(directory, settings.PROFILING_MAX_BYTES)
+    return name
+
+
+def rotate(directory, max_bytes):
+    """Удаляет самые старые снимки, пока каталог больше ``max_bytes``."""
+    snapshots = {}
+    for entry in os.scandir(directory):
+        try:
+            stat = entry.stat()
+        except FileNotFoundError:
+            # Файл уже удалил соседний процесс
+            continue
+        name, _ = os.path.splitext(entry.name)
+        mtime, size, paths = snapshots.get(name, (stat.st_mtime, 0, []))
+        snapshots[name] = (
+            min(mtime, stat.st_mtime), size + stat.st_size,
+            paths + [entry.path])
+    total = sum(size for _, size, _ in snapshots.values())
+    for _, size, paths in sorted(snapshots.values()):
+        if total <= max_bytes:
+            break
+        total -= size
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def dumps():
+    """Описания снимков, от новых к старым."""
+    directory = settings.PROFILING_DIR
+    if not os.path.isdir(directory):
+        return []
+    items = []
+    for entry in os.scandir(directory):
+        name, ext = os.path.splitext(entry.name)
+        if ext == '.json':
+            meta = load_meta(name)
+            if meta is not None:
+                items.append(dict(meta, name=name))
+    return sorted(items, key=lambda item: item['created'], reverse=True)
+
+
+def path_for(name, ext):
+    if not NAME_RE.match(name):
+        return None
+    path = os.path.join(settings.PROFILING_DIR, name + ext)
+    return path if os.path.isfile(path) else None
+
+
+def load_meta(name):
+    path = path_for(name, '.json')
+    if path is None:
+        return None
+    try:
+        with open(path, encoding='utf-8') as stream:
+            return json.load(stream)
+    except (OSError, ValueError):
+        # Снимок могли удалить при ротации или ещё не дописать
+        return None
+
+
+def stats_report(name, limit=40):
+    """Самые дорогие функции снимка по суммарному времени."""
+    path = path_for(name, '.prof')
+    if path is None:
+        return ''
+    stream = io.StringIO()
+    stats = pstats.Stats(path, stream=stream)
+    stats.sort_stats('cumulative').print_stats(limit)
+    return stream.getvalue()
@@ -0,0 +1,45 @@
+"""
+Чтение с реплик.
+
+Реплики перечислены в ``REPLICA_DATABASES``. Читать с них разрешено
+только представлениям с атрибутом ``use_replica = True``: это решает
+``ReplicaMiddleware`` и запоминает выбранную реплику на время запроса.
+Всё остальное, в том числе любые записи, идёт в ``default``.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+
+# Реплика, с которой читает текущий запрос, или None
+replica_alias = ContextVar('replica_alias', default=None)
+
+# Приложения, чьи модели можно читать с реплики. Сессии и пользователи
+# сюда не входят: только что созданные сессия или аккаунт могут ещё не
+# доехать до реплики, и пользователь окажется разлогинен
+REPLICA_APP_LABELS = {'posts'}
+
+
+def choose_replica():
+    if not settings.REPLICA_DATABASES:
+        return None
+    return random.choice(settings.REPLICA_DATABASES)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = replica_alias.get()
+        if alias and model._meta.app_label in REPLICA_APP_LABELS:
+            return alias
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплика — копия default, объекты из них можно связывать
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Схема попадает на реплику вместе с данными, см. sync_replica
+        return db not in settings.REPLICA_DATABASES
@@ -0,0 +1,9 @@
+"""Статистика по выборкам замеров для бенчмарка и метрик."""
+import math
+
+
+def percentile(values, percent):
+    """Перцентиль методом ближайшего ранга."""
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
@@ -0,0 +1,64 @@
+"""
+Статика с хэшем содержимого в имени и заранее сжатыми вариантами.
+
+``collectstatic`` копирует файлы под именами вида ``style.55e7cbb9ba48.css``
+и рядом кладёт ``.gz`` и, если установлен ``brotli`` (см.
+requirements-optional.txt), ``.br``. Отдаёт их ``core.views.serve_static``
+без сжатия на каждый запрос.
+"""
+import gzip
+import logging
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.svg', '.txt', '.html', '.json', '.map', '.ico')
+
+# Сжатый вариант не пишется, если экономит меньше этой доли
+MIN_SAVING = 0.05
+
+
+def compressors():
+    yield '.gz', lambda data: gzip.compress(data, 9, mtime=0)
+    if brotli is not None:
+        yield '.br', lambda data: brotli.compress(data, quality=11)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # Файла нет в манифесте: лучше отдать ссылку без хэша, чем
+            # упасть на отрисовке. Без манифеста (collectstatic ещё не
+            # запускали) так отдаются все файлы, это не ошибка
+            if self.hashed_files:
+                logger.warning('Нет в манифесте статики: %s', name)
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in self.hashed_files.values():
+            if name.endswith(COMPRESSIBLE_EXTENSIONS):
+                self.compress(name)
+
+    def compress(self, name):
+        with self.open(name) as original:
+            data = original.read()
+        for suffix, compress in compressors():
+            compressed = compress(data)
+            if len(compressed) > len(data) * (1 - MIN_SAVING):
+                continue
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(compressed))
@@ -0,0 +1,31 @@
+import time
+
+from django.template.backends.django import DjangoTemplates, Template
+
+from .metrics import template_timer
+
+
+class TimedTemplate(Template):
+    """Шаблон, добавляющий время отрисовки в метрики запроса."""
+
+    def render(self, context=None, request=None):
+        timer = template_timer.get()
+        if timer is None:
+            return super().render(context, request)
+        timer.depth += 1
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timer.depth -= 1
+            if not timer.depth:
+                timer.total += time.perf_counter() - started
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
@@ -0,0 +1,19 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from core import pagecache
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def hole(context, template_name, **kwargs):
+    """
+    Фрагмент, зависящий от пользователя. На странице для общего кэша
+    выводит метку, которая заполняется при отдаче; иначе — как include.
+    """
+    if context.get('punch_holes'):
+        return mark_safe(pagecache.make_hole(template_name, kwargs))
+    fragment = context.template.engine.get_template(template_name)
+    with context.push(**kwargs):
+        return fragment.render(context)
@@ -0,0 +1,22 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+
+from .budgets import get_query_budget
+
+
+class QueryBudgetTestMixin:
+    """Проверка бюджета SQL-запросов для TestCase."""
+
+    def assertWithinQueryBudget(self, client, url, data=None):
+        budget = get_query_budget(resolve(url).func)
+        self.assertIsNotNone(budget, f'Не задан max_queries для {url}')
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, data)
+        queries = '\n'.join(
+            query['sql'] for query in context.captured_queries)
+        self.assertLessEqual(
+            len(context), budget,
+            f'{url}: {len(context)} запросов при бюджете {budget}\n'
+            f'{queries}')
+        return response
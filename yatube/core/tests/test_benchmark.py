@@ -0,0 +1,94 @@
+# core/tests/test_benchmark.py
+import json
+import shutil
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from core import benchmark, stats
+from posts.models import Group, GroupStats, Post, PostCounter
+
+User = get_user_model()
+
+
+class BenchmarkTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.tmp_dir = Path(tempfile.mkdtemp())
+        call_command(
+            'seed_benchmark', users=3, groups=2, posts=20, batch_size=7,
+            stdout=StringIO())
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(cls.tmp_dir, ignore_errors=True)
+
+    def test_seed(self):
+        """Данные залиты, счётчики пересчитаны."""
+        self.assertEqual(Post.objects.count(), 20)
+        self.assertEqual(Group.objects.count(), 2)
+        self.assertEqual(PostCounter.get_value(PostCounter.GLOBAL), 20)
+        self.assertEqual(
+            sum(GroupStats.objects.values_list('posts_count', flat=True)),
+            Post.objects.filter(group__isnull=False).count())
+        call_command('rebuild_group_stats', '--verify', stdout=StringIO())
+
+    def test_reseed_tops_up(self):
+        """Повторный запуск не падает на занятых именах и доливает посты."""
+        call_command(
+            'seed_benchmark', users=4, groups=2, posts=25, batch_size=7,
+            stdout=StringIO())
+        self.assertEqual(
+            User.objects.filter(username__startswith='bench_user_').count(),
+            4)
+        self.assertEqual(Group.objects.count(), 2)
+        self.assertEqual(Post.objects.count(), 25)
+        self.assertEqual(PostCounter.get_value(PostCounter.GLOBAL), 25)
+
+    def test_seed_rejects_bad_arguments(self):
+        User.objects.filter(username__startswith='bench_user_').delete()
+        for users, posts, batch_size in ((0, 5, 10), (-1, 0, 10), (1, 0, 0)):
+            with self.subTest(users=users, posts=posts, batch_size=batch_size):
+                with self.assertRaises(CommandError):
+                    call_command(
+                        'seed_benchmark', users=users, groups=0, posts=posts,
+                        batch_size=batch_size, stdout=StringIO())
+
+    def test_every_route_is_measured(self):
+        """Замеряются все маршруты, кроме разрушающих."""
+        results = benchmark.run(requests=2, warmup=0)
+        self.assertEqual(
+            set(results),
+            set(benchmark.routes()) - set(benchmark.SKIPPED_ROUTES))
+        for name, result in results.items():
+            with self.subTest(name=name):
+                self.assertEqual(result['status'], 200)
+                self.assertGreater(result['bytes'], 0)
+                self.assertLessEqual(result['p50'], result['p99'])
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(stats.percentile(values, 50), 50)
+        self.assertEqual(stats.percentile(values, 99), 99)
+        self.assertEqual(stats.percentile([7], 95), 7)
+
+    def test_baseline_regression(self):
+        """Рост запросов относительно базового прогона — ошибка."""
+        baseline = self.tmp_dir / 'baseline.json'
+        call_command(
+            'benchmark', 'posts:main', requests=2, warmup=1,
+            output=str(baseline), stdout=StringIO())
+        data = json.loads(baseline.read_text(encoding='utf-8'))
+        self.assertEqual(list(data), ['posts:main'])
+        data['posts:main']['queries'] -= 1
+        baseline.write_text(json.dumps(data), encoding='utf-8')
+        with self.assertRaisesMessage(CommandError, 'Регрессий: 1'):
+            call_command(
+                'benchmark', 'posts:main', requests=2, warmup=1,
+                baseline=str(baseline), tolerance=1000, stdout=StringIO())
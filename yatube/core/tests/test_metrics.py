@@ -0,0 +1,84 @@
+# core/tests/test_metrics.py
+import re
+import threading
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, SimpleTestCase, TestCase
+from django.urls import reverse
+
+from core import metrics
+from posts.models import Post
+
+User = get_user_model()
+
+
+def sample(text, name, view):
+    match = re.search(
+        rf'^{name}{{view="{view}"}} (\S+)$', text, re.MULTILINE)
+    return float(match.group(1)) if match else None
+
+
+class HistogramTests(SimpleTestCase):
+    def test_buckets_are_cumulative(self):
+        histogram = metrics.Histogram((1, 5))
+        for value in (0.5, 1, 3, 10):
+            histogram.observe(value)
+        self.assertEqual(histogram.snapshot(), ([2, 3, 4], 14.5, 4))
+
+    def test_observe_from_threads(self):
+        family = metrics.HistogramFamily('test', 'Тест', (1,))
+
+        def work():
+            for _ in range(1000):
+                family.observe('view', 1)
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(family.histograms['view'].snapshot()[2], 8000)
+
+
+class MetricsEndpointTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        user = User.objects.create_user(username='metrics_user')
+        Post.objects.create(text='Пост', author=user)
+
+    def setUp(self):
+        cache.clear()
+        metrics.reset()
+        self.client = Client()
+
+    def scrape(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response['Content-Type'], metrics.CONTENT_TYPE)
+        return response.content.decode()
+
+    def test_request_is_measured_by_view_name(self):
+        page = self.client.get(reverse('posts:main'))
+        text = self.scrape()
+        view = 'posts:main'
+        self.assertEqual(
+            sample(text, 'yatube_request_duration_seconds_count', view), 1)
+        self.assertGreater(sample(text, 'yatube_sql_queries_sum', view), 0)
+        self.assertGreater(
+            sample(text, 'yatube_sql_duration_seconds_sum', view), 0)
+        self.assertGreater(
+            sample(text, 'yatube_template_render_seconds_sum', view), 0)
+        self.assertEqual(
+            sample(text, 'yatube_response_size_bytes_sum', view),
+            len(page.content))
+        self.assertIn(
+            'yatube_sql_queries_bucket{view="posts:main",le="+Inf"} 1', text)
+
+    def test_collectors_are_exported(self):
+        self.assertIn('yatube_outbox_depth 0', self.scrape())
+
+    def test_only_allowed_addresses(self):
+        response = self.client.get(reverse('metrics'), REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
@@ -0,0 +1,49 @@
+# core/tests/test_middleware.py
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import resolve
+
+from core.middleware import QueryBudgetMiddleware
+
+User = get_user_model()
+
+
+def view_with_queries(request):
+    for _ in range(3):
+        User.objects.exists()
+    return HttpResponse()
+
+
+view_with_queries.max_queries = 2
+
+
+class QueryBudgetMiddlewareTests(TestCase):
+    def make_request(self):
+        request = RequestFactory().get('/')
+        request.resolver_match = resolve('/')
+        request.resolver_match.func = view_with_queries
+        return request
+
+    def test_disabled_without_debug(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            QueryBudgetMiddleware(view_with_queries)
+
+    @override_settings(DEBUG=True)
+    def test_logs_over_budget_request(self):
+        middleware = QueryBudgetMiddleware(view_with_queries)
+        with self.assertLogs('core.middleware', 'WARNING') as logs:
+            middleware(self.make_request())
+        self.assertIn('3 из 2', logs.output[0])
+
+    @override_settings(DEBUG=True)
+    def test_silent_within_budget(self):
+        view_with_queries.max_queries = 3
+        self.addCleanup(setattr, view_with_queries, 'max_queries', 2)
+        middleware = QueryBudgetMiddleware(view_with_queries)
+        with mock.patch('core.middleware.logger') as logger:
+            middleware(self.make_request())
+        logger.warning.assert_not_called()
@@ -0,0 +1,105 @@
+# core/tests/test_profiling.py
+import os
+import shutil
+import tempfile
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import profiling
+from posts.models import Post
+
+User = get_user_model()
+
+TEMP_PROFILING_DIR = tempfile.mkdtemp()
+
+
+@override_settings(PROFILING_DIR=TEMP_PROFILING_DIR)
+class ProfilingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='profiled')
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        Post.objects.create(text='Пост', author=cls.user)
+        cls.url = reverse('posts:profile', args=[cls.user.username])
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_PROFILING_DIR, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        for name in os.listdir(TEMP_PROFILING_DIR):
+            os.remove(os.path.join(TEMP_PROFILING_DIR, name))
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+
+    def profiled_get(self, url=None, token=None):
+        return Client().get(
+            url or self.url, HTTP_X_PROFILE=token or profiling.make_token())
+
+    def test_signed_header_captures_profile_and_sql(self):
+        self.profiled_get()
+        [dump] = profiling.dumps()
+        self.assertEqual(dump['view'], 'posts:profile')
+        self.assertEqual(dump['status'], HTTPStatus.OK)
+        self.assertTrue(
+            any('posts_post' in query['sql'] for query in dump['queries']))
+        self.assertIn('get_response', profiling.stats_report(dump['name']))
+
+    def test_requests_are_not_profiled_by_default(self):
+        Client().get(self.url)
+        self.profiled_get(token='forged:token')
+        self.assertEqual(profiling.dumps(), [])
+
+    @override_settings(PROFILING_SAMPLE_RATE=1)
+    def test_sampling(self):
+        Client().get(self.url)
+        self.assertEqual(len(profiling.dumps()), 1)
+
+    def directory_size(self):
+        return sum(
+            entry.stat().st_size for entry in os.scandir(TEMP_PROFILING_DIR))
+
+    def test_rotation_keeps_directory_bounded(self):
+        self.profiled_get()
+        [oldest] = profiling.dumps()
+        limit = self.directory_size() * 2
+        with override_settings(PROFILING_MAX_BYTES=limit):
+            for _ in range(4):
+                self.profiled_get()
+        names = {dump['name'] for dump in profiling.dumps()}
+        self.assertNotIn(oldest['name'], names)
+        self.assertLessEqual(self.directory_size(), limit)
+        # Снимок удаляется целиком, без осиротевших файлов
+        self.assertEqual(len(os.listdir(TEMP_PROFILING_DIR)), 2 * len(names))
+
+    def test_admin_pages_are_staff_only(self):
+        self.profiled_get()
+        [dump] = profiling.dumps()
+        urls = [
+            reverse('profiling_list'),
+            reverse('profiling_detail', args=[dump['name']]),
+            reverse('profiling_download', args=[dump['name']]),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(
+                    Client().get(url).status_code, HTTPStatus.FOUND)
+                self.assertEqual(
+                    self.staff_client.get(url).status_code, HTTPStatus.OK)
+        response = self.staff_client.get(urls[1])
+        self.assertContains(response, 'posts_post')
+        self.assertContains(response, 'cumulative')
+
+    def test_unknown_dump_is_404(self):
+        for name in ('missing', '..'):
+            with self.subTest(name=name):
+                response = self.staff_client.get(
+                    reverse('profiling_detail', args=[name]))
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
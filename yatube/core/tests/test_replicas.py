@@ -0,0 +1,128 @@
+# core/tests/test_replicas.py
+import os
+import shutil
+import sqlite3
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connections
+from django.test import (Client, RequestFactory, SimpleTestCase,
+                         TransactionTestCase, override_settings)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core import pagecache
+from core.management.commands.sync_replica import copy_sqlite
+from posts.models import Post
+
+User = get_user_model()
+
+
+@override_settings(REPLICA_DATABASES=['replica'])
+class ReplicaRoutingTests(TransactionTestCase):
+    # В тестах реплика — зеркало default, см. DATABASES['replica']['TEST']
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='replica_user')
+        self.post = Post.objects.create(text='Пост', author=self.user)
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def replica_queries(self, method='get', url='/', data=None):
+        with CaptureQueriesContext(connections['replica']) as queries:
+            getattr(self.client, method)(url, data)
+        return [query['sql'] for query in queries]
+
+    def test_list_and_detail_views_read_from_replica(self):
+        urls = [
+            reverse('posts:main'),
+            reverse('posts:profile', args=[self.user.username]),
+            reverse('posts:post_detail', args=[self.post.pk]),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                queries = self.replica_queries('get', url)
+                self.assertTrue(queries)
+                # Сессия всегда читается из default
+                self.assertFalse(
+                    [sql for sql in queries if 'django_session' in sql])
+
+    def test_other_views_use_default(self):
+        self.assertEqual(
+            self.replica_queries('get', reverse('posts:post_create')), [])
+
+    def test_session_sticks_to_default_after_write(self):
+        self.assertEqual(self.replica_queries(
+            'post', reverse('posts:post_create'), {'text': 'Новый'}), [])
+        self.assertEqual(self.replica_queries(), [])
+        # Чужая сессия по-прежнему читает с реплики
+        self.client = Client()
+        self.assertTrue(self.replica_queries())
+
+    def test_users_are_read_from_default(self):
+        queries = self.replica_queries(
+            'get', reverse('posts:profile', args=[self.user.username]))
+        # Посты с авторами по-прежнему с реплики, сам пользователь — нет
+        self.assertTrue(queries)
+        self.assertFalse(
+            [sql for sql in queries if 'FROM "auth_user"' in sql])
+
+    @override_settings(PAGE_CACHE_ENABLED=True)
+    def test_replica_pages_are_not_cached(self):
+        url = reverse('posts:main')
+        self.assertTrue(self.replica_queries('get', url))
+        self.assertIsNone(cache.get(pagecache.page_key(
+            RequestFactory().get(url))))
+        with override_settings(REPLICA_DATABASES=[]):
+            self.client.get(url)
+        self.assertIsNotNone(cache.get(pagecache.page_key(
+            RequestFactory().get(url))))
+
+    @override_settings(REPLICA_STICKY_SECONDS=0)
+    def test_stickiness_expires(self):
+        self.client.post(reverse('posts:post_create'), {'text': 'Новый'})
+        self.assertTrue(self.replica_queries())
+
+    @override_settings(REPLICA_DATABASES=[])
+    def test_without_replicas_everything_reads_default(self):
+        self.assertEqual(self.replica_queries(), [])
+
+
+class SyncReplicaTests(SimpleTestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+
+    def test_copy_replaces_target(self):
+        source = os.path.join(self.temp_dir, 'source.sqlite3')
+        target = os.path.join(self.temp_dir, 'target.sqlite3')
+        with sqlite3.connect(source) as connection:
+            connection.execute('CREATE TABLE t (x)')
+            connection.execute('INSERT INTO t VALUES (1)')
+        connection.close()
+        stale = sqlite3.connect(target)
+        stale.execute('CREATE TABLE old (x)')
+        copy_sqlite(source, target)
+        with sqlite3.connect(target) as connection:
+            self.assertEqual(
+                connection.execute('SELECT x FROM t').fetchall(), [(1,)])
+        connection.close()
+        # Открытое соединение дочитывает прежнюю копию
+        self.assertEqual(
+            stale.execute("SELECT name FROM sqlite_master").fetchall(),
+            [('old',)])
+        stale.close()
+        self.assertEqual(
+            sorted(os.listdir(self.temp_dir)),
+            ['source.sqlite3', 'target.sqlite3'])
+
+    def test_requires_configured_replicas(self):
+        with self.assertRaisesMessage(CommandError, 'REPLICA_DATABASES'):
+            call_command('sync_replica', stdout=StringIO())
+        with self.assertRaisesMessage(CommandError, "'missing'"):
+            call_command('sync_replica', 'missing', stdout=StringIO())
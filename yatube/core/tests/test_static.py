@@ -0,0 +1,86 @@
+# core/tests/test_static.py
+import gzip
+import shutil
+import tempfile
+from http import HTTPStatus
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.templatetags.static import static
+from django.test import Client, TestCase, override_settings
+
+from core import storage
+from core.views import IMMUTABLE_CACHE_CONTROL
+
+TEMP_STATIC_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(
+    STATIC_ROOT=TEMP_STATIC_ROOT,
+    STATICFILES_FINDERS=[
+        'django.contrib.staticfiles.finders.FileSystemFinder'])
+class StaticPipelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_STATIC_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        self.hashed_css = staticfiles_storage.stored_name('css/style.css')
+
+    def test_names_are_hashed(self):
+        self.assertRegex(self.hashed_css, r'^css/style\.[0-9a-f]{12}\.css$')
+        self.assertEqual(static('css/style.css'), f'/static/{self.hashed_css}')
+
+    def test_missing_manifest_entry_falls_back(self):
+        with self.assertLogs('core.storage', 'WARNING'):
+            self.assertEqual(
+                static('css/missing.css'), '/static/css/missing.css')
+
+    def test_gzip_variant_is_served(self):
+        response = self.client.get(
+            f'/static/{self.hashed_css}', HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        encoding = 'br' if storage.brotli else 'gzip'
+        self.assertEqual(response['Content-Encoding'], encoding)
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response['Cache-Control'], IMMUTABLE_CACHE_CONTROL)
+        if encoding == 'gzip':
+            with staticfiles_storage.open(self.hashed_css) as original:
+                self.assertEqual(
+                    gzip.decompress(b''.join(response.streaming_content)),
+                    original.read())
+
+    def test_identity_without_accept_encoding(self):
+        for header in ('', 'gzip;q=0'):
+            with self.subTest(header=header):
+                response = self.client.get(
+                    f'/static/{self.hashed_css}',
+                    HTTP_ACCEPT_ENCODING=header)
+                self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_unhashed_name_is_not_immutable(self):
+        response = self.client.get('/static/css/style.css')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertNotEqual(
+            response['Cache-Control'], IMMUTABLE_CACHE_CONTROL)
+
+    def test_not_modified(self):
+        response = self.client.get(f'/static/{self.hashed_css}')
+        response = self.client.get(
+            f'/static/{self.hashed_css}',
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_missing_files(self):
+        for path in ('css/missing.css', '../manage.py'):
+            with self.subTest(path=path):
+                response = self.client.get(f'/static/{path}')
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
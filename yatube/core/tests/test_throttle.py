@@ -0,0 +1,76 @@
+# core/tests/test_throttle.py
+from http import HTTPStatus
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import throttle
+from posts.models import Post
+
+User = get_user_model()
+
+
+@override_settings(THROTTLE_RATES={
+    'search:search': {'session': (1, 2), 'ip': (1, 3)},
+})
+class ThrottleTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='typist')
+        Post.objects.create(text='Учим Джанго', author=cls.user)
+        cls.url = reverse('search:search')
+
+    def setUp(self):
+        throttle.get_cache().clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+        patcher = mock.patch('core.throttle.time.time', return_value=1000)
+        self.clock = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def search(self, client=None, query='джанго'):
+        return (client or self.client).get(self.url, {'data': query})
+
+    def test_take_refills_over_time(self):
+        self.assertEqual(throttle.take('bucket', 2, 1), 0)
+        self.assertEqual(throttle.take('bucket', 2, 1), 0.5)
+        self.clock.return_value += 0.5
+        self.assertEqual(throttle.take('bucket', 2, 1), 0)
+
+    def test_session_limit_returns_last_result(self):
+        self.assertEqual(self.search().status_code, HTTPStatus.OK)
+        last = self.search()
+        self.assertIn('Джанго', last.json()['result'])
+        response = self.search(query='джанго и не только')
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(response.content, last.content)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.clock.return_value += 1
+        self.assertEqual(self.search().status_code, HTTPStatus.OK)
+
+    def test_ip_limit_is_shared_between_sessions(self):
+        self.search()
+        self.search()
+        guest = Client()
+        # Без сессии действует только лимит по IP
+        last = self.search(guest)
+        self.assertEqual(last.status_code, HTTPStatus.OK)
+        response = self.search(guest)
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertEqual(response.content, last.content)
+        # У новой сессии ещё нет ответа, который можно вернуть
+        other = Client()
+        other.force_login(self.user)
+        response = self.search(other)
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertEqual(response.content, b'')
+
+    def test_other_routes_are_not_limited(self):
+        for _ in range(5):
+            self.assertEqual(
+                self.client.get(reverse('posts:main')).status_code,
+                HTTPStatus.OK)
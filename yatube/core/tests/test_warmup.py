@@ -0,0 +1,27 @@
+# core/tests/test_warmup.py
+from django.template import engines
+from django.test import TestCase
+
+from core import warmup
+
+
+class WarmUpTests(TestCase):
+    def test_templates_are_found(self):
+        names = set(warmup.template_names(engines['django']))
+        self.assertIn('base.html', names)
+        self.assertIn('posts/includes/post_card.html', names)
+
+    def test_named_urls_are_listed(self):
+        names = dict(warmup.url_names())
+        self.assertIn('posts:main', names)
+        self.assertIn('post_id', names['posts:post_detail'])
+        self.assertIn('admin:index', names)
+
+    def test_warm_up_reports_timing(self):
+        with self.assertLogs('core.warmup', 'INFO') as logs:
+            stats = warmup.warm_up()
+        self.assertEqual(
+            stats['templates'],
+            len(list(warmup.template_names(engines['django']))))
+        self.assertGreater(stats['urls'], 0)
+        self.assertIn('Прогрев за', logs.output[0])
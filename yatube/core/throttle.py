@@ -0,0 +1,63 @@
+"""
+Ограничение частоты запросов по алгоритму token bucket.
+
+Лимиты задаются по имени маршрута в ``THROTTLE_RATES``: для каждой
+области (``ip`` и ``session``) — сколько токенов в секунду добавляется и
+сколько помещается в корзину. Корзины лежат в кэше ``THROTTLE_CACHE``,
+общем для всех процессов. Чтение и запись корзины не атомарны, поэтому
+при гонке между процессами лимит может быть превышен на пару запросов.
+"""
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+SCOPES = ('session', 'ip')
+
+
+def get_cache():
+    return caches[settings.THROTTLE_CACHE]
+
+
+def take(key, rate, burst):
+    """
+    Забирает токен из корзины ``key``. Возвращает 0, если токен был,
+    иначе — сколько секунд ждать следующего.
+    """
+    cache = get_cache()
+    now = time.time()
+    tokens, updated = cache.get(key, (burst, now))
+    tokens = min(burst, tokens + (now - updated) * rate)
+    allowed = tokens >= 1
+    if allowed:
+        tokens -= 1
+    # Когда корзина снова наполнится, запись уже не нужна
+    cache.set(key, (tokens, now), math.ceil((burst - tokens) / rate) + 1)
+    return 0 if allowed else (1 - tokens) / rate
+
+
+def client_ids(request):
+    """Идентификаторы клиента по областям; сессии может не быть."""
+    return {
+        'session': request.session.session_key,
+        'ip': request.META.get('REMOTE_ADDR'),
+    }
+
+
+def check(request, route):
+    """Сколько секунд клиенту ждать, или 0, если запрос можно выполнить."""
+    limits = settings.THROTTLE_RATES[route]
+    ids = client_ids(request)
+    for scope in SCOPES:
+        if scope in limits and ids[scope]:
+            rate, burst = limits[scope]
+            wait = take(f'throttle:{route}:{scope}:{ids[scope]}', rate, burst)
+            if wait:
+                return wait
+    return 0
+
+
+def last_response_key(request, route):
+    ids = client_ids(request)
+    return f'throttle:last:{route}:{ids["session"] or ids["ip"]}'
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+from django.template.defaultfilters import filesizeformat
+
+
+class SizeLimitUploadHandler(FileUploadHandler):
+    """
+    Пропускает файлы больше ``UPLOAD_MAX_SIZE``, не дочитывая их. Ошибки
+    складываются в ``request.upload_errors`` по имени поля формы.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.UPLOAD_MAX_SIZE:
+            if not hasattr(self.request, 'upload_errors'):
+                self.request.upload_errors = {}
+            self.request.upload_errors[self.field_name] = (
+                'Файл больше '
+                f'{filesizeformat(settings.UPLOAD_MAX_SIZE)}')
+            raise SkipFile
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
@@ -0,0 +1,121 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.views.decorators import staff_member_required
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import PermissionDenied, SuspiciousFileOperation
+from django.http import (FileResponse, Http404, HttpResponse,
+                         HttpResponseNotModified)
+from django.shortcuts import render
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from . import metrics, profiling
+
+# Имя с хэшем содержимого: после правки файла меняется и адрес
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+CACHE_CONTROL = 'public, max-age=60'
+
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+HASHED_NAME_RE = re.compile(
+    r'^(?P<stem>.+)\.[0-9a-f]{12}(?P<ext>\.[^./]+)?$')
+
+
+def accepted_encodings(request):
+    header = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    accepted = set()
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        if not re.search(r'q\s*=\s*0(\.0*)?\s*$', params):
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def is_hashed(path):
+    """Путь — имя с хэшем из манифеста collectstatic."""
+    match = HASHED_NAME_RE.match(path)
+    if match is None:
+        return False
+    name = match.group('stem') + (match.group('ext') or '')
+    hashed_files = getattr(staticfiles_storage, 'hashed_files', {})
+    return hashed_files.get(name) == path
+
+
+def serve_static(request, path):
+    """
+    Отдаёт файл из STATIC_ROOT, выбирая лучший заранее сжатый вариант.
+    Файлы с хэшем в имени кэшируются навсегда.
+    """
+    try:
+        full_path = safe_join(settings.STATIC_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+    encoding, served_path = None, full_path
+    accepted = accepted_encodings(request)
+    for coding, suffix in ENCODINGS:
+        if coding in accepted and os.path.isfile(full_path + suffix):
+            encoding, served_path = coding, full_path + suffix
+            break
+    stat = os.stat(served_path)
+    if not was_modified_since(
+            request.META.get('HTTP_IF_MODIFIED_SINCE'),
+            stat.st_mtime, stat.st_size):
+        response = HttpResponseNotModified()
+    else:
+        content_type, _ = mimetypes.guess_type(full_path)
+        response = FileResponse(
+            open(served_path, 'rb'),
+            content_type=content_type or 'application/octet-stream')
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        response['Content-Length'] = stat.st_size
+        if encoding:
+            response['Content-Encoding'] = encoding
+    response['Vary'] = 'Accept-Encoding'
+    response['Cache-Control'] = (
+        IMMUTABLE_CACHE_CONTROL if is_hashed(path) else CACHE_CONTROL)
+    return response
+
+
+def metrics_export(request):
+    """Метрики процесса в текстовом формате Prometheus."""
+    if request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+        raise PermissionDenied
+    return HttpResponse(
+        metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+
+@staff_member_required
+def profiling_list(request):
+    context = dict(
+        admin.site.each_context(request),
+        title='Профили запросов', dumps=profiling.dumps())
+    return render(request, 'admin/profiling/list.html', context)
+
+
+@staff_member_required
+def profiling_detail(request, name):
+    meta = profiling.load_meta(name)
+    if meta is None:
+        raise Http404
+    context = dict(
+        admin.site.each_context(request),
+        title=f'{meta["method"]} {meta["path"]}', name=name, meta=meta,
+        sql_duration=sum(query['duration'] for query in meta['queries']),
+        report=profiling.stats_report(name))
+    return render(request, 'admin/profiling/detail.html', context)
+
+
+@staff_member_required
+def profiling_download(request, name):
+    path = profiling.path_for(name, '.prof')
+    if path is None:
+        raise Http404
+    return FileResponse(
+        open(path, 'rb'), as_attachment=True, filename=name + '.prof')
@@ -0,0 +1,89 @@
+"""
+Прогрев нового WSGI-процесса до первого запроса.
+
+Компилирует шаблоны (с кэширующим загрузчиком они остаются в памяти),
+заполняет кэши URL-резолвера обратным разрешением всех именованных
+маршрутов и проверяет соединения с базой и репликами.
+"""
+import logging
+import os
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.template import TemplateSyntaxError, engines
+from django.urls import NoReverseMatch, URLResolver, get_resolver, reverse
+
+logger = logging.getLogger(__name__)
+
+
+def template_names(engine):
+    """Имена всех .html-шаблонов проекта (каталоги DIRS движка)."""
+    for template_dir in engine.dirs:
+        for root, dirs, files in os.walk(template_dir):
+            for name in files:
+                if name.endswith('.html'):
+                    path = os.path.join(root, name)
+                    yield os.path.relpath(path, template_dir).replace(
+                        os.sep, '/')
+
+
+def compile_templates():
+    compiled = 0
+    for engine in engines.all():
+        for name in template_names(engine):
+            try:
+                engine.get_template(name)
+            except TemplateSyntaxError:
+                logger.exception('Шаблон %s не компилируется', name)
+            else:
+                compiled += 1
+    return compiled
+
+
+def url_names(patterns=None, prefix=''):
+    """Имена маршрутов с пространствами имён и их аргументы."""
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            namespace = (
+                f'{prefix}{pattern.namespace}:'
+                if pattern.namespace else prefix)
+            yield from url_names(pattern.url_patterns, namespace)
+        elif pattern.name:
+            yield f'{prefix}{pattern.name}', pattern.pattern.converters
+
+
+def reverse_urls():
+    reversed_count = 0
+    for name, converters in url_names():
+        # '1' подходит под int, slug, str и path
+        try:
+            reverse(name, kwargs={key: '1' for key in converters})
+        except NoReverseMatch:
+            continue
+        reversed_count += 1
+    return reversed_count
+
+
+def connect_databases():
+    for alias in (DEFAULT_DB_ALIAS, *settings.REPLICA_DATABASES):
+        connections[alias].ensure_connection()
+    # Соединения процесса-мастера не должны доставаться форкнутым воркерам
+    connections.close_all()
+
+
+def warm_up():
+    """Прогревает процесс и пишет в лог, сколько это заняло."""
+    started = time.perf_counter()
+    stats = {
+        'templates': compile_templates(),
+        'urls': reverse_urls(),
+    }
+    connect_databases()
+    stats['seconds'] = time.perf_counter() - started
+    logger.info(
+        'Прогрев за %.3f с: шаблонов %d, маршрутов %d',
+        stats['seconds'], stats['templates'], stats['urls'])
+    return stats
@@ -0,0 +1,20 @@
+from django.contrib import admin
+
+from .models import OutgoingEmail
+
+
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'subject',
+        'recipients',
+        'created',
+        'attempts',
+        'sent_at',
+    )
+    list_filter = ('sent_at',)
+    readonly_fields = ('claim',)
+    empty_value_display = '-пусто-'
+
+
+admin.site.register(OutgoingEmail, OutgoingEmailAdmin)
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class OutboxConfig(AppConfig):
+    name = 'outbox'
+
+    def ready(self):
+        from core import metrics
+
+        from .delivery import collect_metrics
+        metrics.register_collector(collect_metrics)
@@ -0,0 +1,28 @@
+from django.core.mail.backends.base import BaseEmailBackend
+
+from .models import OutgoingEmail
+
+
+class OutboxBackend(BaseEmailBackend):
+    """
+    Не отправляет письма, а кладёт их в таблицу outbox в текущей
+    транзакции; доставляет их команда ``drain_outbox``.
+    """
+
+    def send_messages(self, email_messages):
+        emails = [to_outgoing(message) for message in email_messages]
+        OutgoingEmail.objects.bulk_create(emails)
+        return len(emails)
+
+
+def to_outgoing(message):
+    if message.attachments:
+        raise ValueError('Вложения через outbox не поддерживаются')
+    html_body = ''
+    for content, mimetype in getattr(message, 'alternatives', []):
+        if mimetype == 'text/html':
+            html_body = content
+    return OutgoingEmail(
+        subject=message.subject, body=message.body, html_body=html_body,
+        from_email=message.from_email,
+        recipients='\n'.join(message.recipients()))
@@ -0,0 +1,137 @@
+"""
+Доставка писем из outbox.
+
+Воркер берёт пачку писем, у которых подошло ``next_attempt_at``, ставит им
+свою метку и аренду на ``OUTBOX_LEASE`` секунд, затем отправляет через
+``OUTBOX_EMAIL_BACKEND``. Неудачная попытка откладывает письмо с
+удвоением паузы от ``OUTBOX_RETRY_DELAY``; после ``OUTBOX_MAX_ATTEMPTS``
+попыток письмо остаётся в таблице с последней ошибкой. Если воркер упал,
+письма вернутся в очередь, когда истечёт аренда.
+"""
+import logging
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db.models import F, Min
+from django.utils import timezone
+
+from core.stats import percentile
+
+from .models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+
+def pending():
+    return OutgoingEmail.objects.filter(
+        sent_at__isnull=True, attempts__lt=settings.OUTBOX_MAX_ATTEMPTS)
+
+
+def retry_delay(attempts):
+    return timedelta(
+        seconds=settings.OUTBOX_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def claim(batch_size):
+    """Забирает пачку писем, готовых к отправке, под новую метку."""
+    now = timezone.now()
+    ids = list(
+        pending().filter(next_attempt_at__lte=now)
+        .order_by('next_attempt_at').values_list('pk', flat=True)
+        [:batch_size])
+    if not ids:
+        return []
+    token = uuid.uuid4()
+    # Условие на next_attempt_at не даёт двум воркерам взять одно письмо
+    pending().filter(pk__in=ids, next_attempt_at__lte=now).update(
+        claim=token, attempts=F('attempts') + 1,
+        next_attempt_at=now + timedelta(seconds=settings.OUTBOX_LEASE))
+    return list(OutgoingEmail.objects.filter(claim=token).order_by('pk'))
+
+
+def to_message(email, connection):
+    message = EmailMultiAlternatives(
+        email.subject, email.body, email.from_email,
+        email.recipients.splitlines(), connection=connection)
+    if email.html_body:
+        message.attach_alternative(email.html_body, 'text/html')
+    return message
+
+
+def deliver(emails):
+    """Отправляет письма; возвращает число отправленных и неудачных."""
+    sent, failed = [], []
+    with get_connection(settings.OUTBOX_EMAIL_BACKEND) as connection:
+        for email in emails:
+            try:
+                to_message(email, connection).send()
+            except Exception as e:
+                logger.warning('Письмо %s не отправлено: %s', email.pk, e)
+                email.last_error = f'{type(e).__name__}: {e}'
+                failed.append(email)
+            else:
+                sent.append(email.pk)
+    OutgoingEmail.objects.filter(pk__in=sent).update(
+        sent_at=timezone.now(), claim=None, last_error='')
+    now = timezone.now()
+    for email in failed:
+        OutgoingEmail.objects.filter(pk=email.pk).update(
+            claim=None, last_error=email.last_error,
+            next_attempt_at=now + retry_delay(email.attempts))
+    return len(sent), len(failed)
+
+
+def drain(batch_size):
+    """Отправляет всё, что готово; возвращает (отправлено, ошибок)."""
+    total_sent = total_failed = 0
+    while True:
+        emails = claim(batch_size)
+        if not emails:
+            return total_sent, total_failed
+        sent, failed = deliver(emails)
+        total_sent += sent
+        total_failed += failed
+
+
+def metrics(window=timedelta(hours=1)):
+    """
+    Глубина очереди и задержка доставки писем за ``window``. Все запросы
+    идут по индексу ``sent_at`` и ограничены: счёт — до
+    ``OUTBOX_METRICS_CAP``, задержка — по последним
+    ``OUTBOX_METRICS_SAMPLE`` письмам.
+    """
+    now = timezone.now()
+    cap = settings.OUTBOX_METRICS_CAP
+    oldest = pending().aggregate(oldest=Min('created'))['oldest']
+    sent = OutgoingEmail.objects.filter(sent_at__gte=now - window)
+    latencies = [
+        (sent_at - created).total_seconds()
+        for created, sent_at in sent.order_by('-sent_at').values_list(
+            'created', 'sent_at')[:settings.OUTBOX_METRICS_SAMPLE]]
+    stats = {
+        'depth': pending()[:cap].count(),
+        'dead': OutgoingEmail.objects.filter(
+            sent_at__isnull=True,
+            attempts__gte=settings.OUTBOX_MAX_ATTEMPTS)[:cap].count(),
+        'oldest_age': (now - oldest).total_seconds() if oldest else 0,
+        'sent': sent[:cap].count(),
+    }
+    for percent in (50, 95):
+        stats[f'latency_p{percent}'] = (
+            percentile(latencies, percent) if latencies else 0)
+    return stats
+
+
+def collect_metrics():
+    """Показатели очереди для /metrics, см. core.metrics."""
+    stats = metrics()
+    return [
+        ('yatube_outbox_depth', stats['depth']),
+        ('yatube_outbox_dead', stats['dead']),
+        ('yatube_outbox_oldest_age_seconds', stats['oldest_age']),
+        ('yatube_outbox_sent_last_hour', stats['sent']),
+        ('yatube_outbox_latency_p50_seconds', stats['latency_p50']),
+        ('yatube_outbox_latency_p95_seconds', stats['latency_p95']),
+    ]
@@ -0,0 +1,38 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from outbox import delivery
+
+
+class Command(BaseCommand):
+    help = (
+        'Отправляет письма из outbox пачками с повторными попытками. '
+        'С --loop работает постоянно, проверяя очередь раз в --interval '
+        'секунд')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.OUTBOX_BATCH_SIZE)
+        parser.add_argument('--loop', action='store_true')
+        parser.add_argument('--interval', type=float, default=5)
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть положительным')
+        while True:
+            sent, failed = delivery.drain(options['batch_size'])
+            if sent or failed or not options['loop']:
+                self.report(sent, failed)
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
+
+    def report(self, sent, failed):
+        stats = delivery.metrics()
+        self.stdout.write(
+            f'Отправлено: {sent}, ошибок: {failed}, '
+            f'в очереди: {stats["depth"]}, не доставлено: {stats["dead"]}, '
+            f'задержка p50/p95: {stats["latency_p50"]:.1f}/'
+            f'{stats["latency_p95"]:.1f} с')
@@ -0,0 +1,33 @@
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class OutgoingEmail(models.Model):
+    """Письмо, ждущее отправки воркером ``drain_outbox``."""
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=254)
+    # Адресаты по одному на строку
+    recipients = models.TextField()
+    created = models.DateTimeField(auto_now_add=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # Метка воркера, взявшего письмо, пока не истекла аренда
+    claim = models.UUIDField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            # Очередь — только неотправленные письма
+            models.Index(
+                fields=['next_attempt_at'], name='outbox_pending_idx',
+                condition=Q(sent_at__isnull=True)),
+            models.Index(fields=['sent_at'], name='outbox_sent_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.subject} → {self.recipients}'
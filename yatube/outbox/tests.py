@@ -0,0 +1,157 @@
+# outbox/tests.py
+from datetime import timedelta
+from io import StringIO
+from smtplib import SMTPRecipientsRefused
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail import EmailMultiAlternatives, send_mail
+from django.core.mail.backends import locmem
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core import metrics
+
+from . import delivery
+from .models import OutgoingEmail
+
+User = get_user_model()
+
+BROKEN = 'broken@example.com'
+
+
+class FailingBackend(locmem.EmailBackend):
+    def send_messages(self, messages):
+        for message in messages:
+            if BROKEN in message.to:
+                raise SMTPRecipientsRefused({BROKEN: (550, b'No such user')})
+        return super().send_messages(messages)
+
+
+@override_settings(
+    EMAIL_BACKEND='outbox.backends.OutboxBackend',
+    OUTBOX_EMAIL_BACKEND='outbox.tests.FailingBackend',
+    OUTBOX_MAX_ATTEMPTS=2, OUTBOX_RETRY_DELAY=60)
+class OutboxTests(TestCase):
+    def drain(self):
+        return delivery.drain(batch_size=2)
+
+    def test_mail_is_queued_not_sent(self):
+        send_mail('Тема', 'Текст', 'from@example.com', ['a@example.com'])
+        self.assertEqual(mail.outbox, [])
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(email.recipients, 'a@example.com')
+        self.assertIsNone(email.sent_at)
+
+    def test_drain_sends_in_batches(self):
+        message = EmailMultiAlternatives(
+            'HTML', 'Текст', 'from@example.com', ['a@example.com'])
+        message.attach_alternative('<p>Текст</p>', 'text/html')
+        message.send()
+        for i in range(4):
+            send_mail('Тема', 'Текст', None, [f'user{i}@example.com'])
+        self.assertEqual(self.drain(), (5, 0))
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(
+            mail.outbox[0].alternatives, [('<p>Текст</p>', 'text/html')])
+        self.assertFalse(delivery.pending().exists())
+        self.assertEqual(self.drain(), (0, 0))
+
+    def test_failed_mail_is_retried_with_backoff(self):
+        send_mail('Тема', 'Текст', None, [BROKEN])
+        with self.assertLogs('outbox.delivery', 'WARNING'):
+            self.assertEqual(self.drain(), (0, 1))
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(email.attempts, 1)
+        self.assertIn('SMTPRecipientsRefused', email.last_error)
+        self.assertGreater(
+            email.next_attempt_at, timezone.now() + timedelta(seconds=50))
+        # Пауза ещё не прошла
+        self.assertEqual(self.drain(), (0, 0))
+        OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+        with self.assertLogs('outbox.delivery', 'WARNING'):
+            self.assertEqual(self.drain(), (0, 1))
+        # Попытки исчерпаны: письмо больше не берётся
+        OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(self.drain(), (0, 0))
+        self.assertEqual(delivery.metrics()['dead'], 1)
+
+    def test_expired_claim_returns_to_queue(self):
+        send_mail('Тема', 'Текст', None, ['a@example.com'])
+        self.assertEqual(len(delivery.claim(10)), 1)
+        self.assertEqual(delivery.claim(10), [])
+        OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(self.drain(), (1, 0))
+
+    def test_metrics(self):
+        send_mail('Тема', 'Текст', None, ['a@example.com'])
+        send_mail('Тема', 'Текст', None, ['b@example.com'])
+        OutgoingEmail.objects.filter(recipients='a@example.com').update(
+            created=timezone.now() - timedelta(seconds=30),
+            sent_at=timezone.now())
+        stats = delivery.metrics()
+        self.assertEqual((stats['depth'], stats['sent']), (1, 1))
+        self.assertGreaterEqual(stats['latency_p50'], 30)
+
+    @override_settings(OUTBOX_METRICS_CAP=2, OUTBOX_METRICS_SAMPLE=1)
+    def test_metrics_are_bounded(self):
+        for _ in range(3):
+            send_mail('Тема', 'Текст', None, ['a@example.com'])
+        OutgoingEmail.objects.filter(
+            pk=OutgoingEmail.objects.order_by('pk')[0].pk).update(
+            sent_at=timezone.now())
+        with CaptureQueriesContext(connection) as context:
+            stats = delivery.metrics()
+        self.assertEqual((stats['depth'], stats['sent']), (2, 1))
+        self.assertTrue(all(
+            'LIMIT' in query['sql'] or 'MIN(' in query['sql']
+            for query in context.captured_queries))
+
+    def test_failing_collector_does_not_break_metrics(self):
+        def broken():
+            raise RuntimeError('нет базы')
+
+        metrics.register_collector(broken)
+        self.addCleanup(metrics._collectors.remove, broken)
+        with self.assertLogs('core.metrics', 'ERROR'):
+            output = metrics.render()
+        self.assertIn('yatube_outbox_depth', output)
+
+    def test_drain_command(self):
+        send_mail('Тема', 'Текст', None, ['a@example.com'])
+        out = StringIO()
+        call_command('drain_outbox', stdout=out)
+        self.assertIn('Отправлено: 1, ошибок: 0, в очереди: 0', out.getvalue())
+
+    def test_signup_is_rolled_back_with_its_email(self):
+        """Пользователь не остаётся без письма, если запись в outbox упала."""
+        with mock.patch.object(
+                OutgoingEmail.objects, 'bulk_create',
+                side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                Client().post(reverse('users:signup'), {
+                    'username': 'new_user', 'email': 'new@example.com',
+                    'password1': 'Sup3r-secret',
+                    'password2': 'Sup3r-secret'})
+        self.assertFalse(User.objects.filter(username='new_user').exists())
+
+    def test_signup_and_password_reset_are_queued(self):
+        client = Client()
+        client.post(reverse('users:signup'), {
+            'username': 'new_user', 'email': 'new@example.com',
+            'password1': 'Sup3r-secret', 'password2': 'Sup3r-secret'})
+        client.post(
+            reverse('users:password_reset_form'),
+            {'email': 'new@example.com'})
+        self.assertEqual(
+            OutgoingEmail.objects.filter(
+                recipients='new@example.com').count(), 2)
+        self.assertEqual(mail.outbox, [])
+        self.drain()
+        self.assertEqual(mail.outbox[0].subject, 'Добро пожаловать в Yatube')
+        self.assertEqual(mail.outbox[1].to, ['new@example.com'])
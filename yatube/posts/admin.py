@@ -1,6 +1,45 @@
+from functools import partial
+
+from django.conf import settings
 from django.contrib import admin
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.forms import BaseModelFormSet
+
+from core.paginators import CappedCountPaginator
+from search import index
+
+from . import groups
+from .models import Group, Post, PostCounter
+
+
+class LoadedAutocompleteSelect(AutocompleteSelect):
+    """
+    Автокомплит, который берёт выбранный объект у уже загруженной строки
+    списка, а не отдельным запросом на каждую строку.
+    """
+
+    selected = None
+
+    def optgroups(self, name, value, attr=None):
+        selected = self.selected
+        if selected is None or value != [str(selected.pk)]:
+            return super().optgroups(name, value, attr)
+        options = []
+        if not self.is_required:
+            options.append(self.create_option(name, '', '', False, 0))
+        label = self.choices.field.label_from_instance(selected)
+        options.append(self.create_option(
+            name, selected.pk, label, True, len(options)))
+        return [(None, options, 0)]
 
-from .models import Group, Post
+
+class PostChangeListFormSet(BaseModelFormSet):
+    def add_fields(self, form, index):
+        super().add_fields(form, index)
+        # Группа уже пришла из list_select_related; виджет обёрнут
+        # в RelatedFieldWidgetWrapper
+        widget = form.fields['group'].widget
+        getattr(widget, 'widget', widget).selected = form.instance.group
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -12,9 +51,38 @@ class PostAdmin(admin.ModelAdmin):
         'group'
     )
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
+    autocomplete_fields = ('group',)
     search_fields = ('text',)
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
+    show_full_result_count = False
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == 'group':
+            kwargs['widget'] = LoadedAutocompleteSelect(
+                db_field.remote_field, self.admin_site)
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def get_changelist_formset(self, request, **kwargs):
+        kwargs['formset'] = PostChangeListFormSet
+        return super().get_changelist_formset(request, **kwargs)
+
+    def get_paginator(self, request, queryset, per_page, **kwargs):
+        # Без фильтров число постов есть в счётчике, иначе — до предела
+        count_func = None
+        if not queryset.query.where:
+            count_func = partial(PostCounter.get_value, PostCounter.GLOBAL)
+        return CappedCountPaginator(
+            queryset, per_page, settings.ADMIN_COUNT_CAP,
+            count_func=count_func, **kwargs)
+
+    def get_search_results(self, request, queryset, search_term):
+        # Поиск по полнотекстовому индексу вместо LIKE по всем постам
+        if not search_term or not index.is_available():
+            return super().get_search_results(
+                request, queryset, search_term)
+        return index.filter_posts(queryset, search_term), False
 
 
 class GroupAdmin(admin.ModelAdmin):
@@ -23,9 +91,21 @@ class GroupAdmin(admin.ModelAdmin):
         'slug',
         'description',
     )
-    search_fields = ('description',)
+    search_fields = ('slug', 'title', 'description')
+    ordering = ('slug',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        # Префикс адреса — диапазон по уникальному индексу, см. groups.
+        # Если по адресу ничего нет, ищем как обычно, по всем полям
+        prefix = groups.slug_prefix(search_term)
+        if prefix:
+            found = queryset.filter(
+                slug__gte=prefix, slug__lt=groups.next_prefix(prefix))
+            if found.exists():
+                return found, False
+        return super().get_search_results(request, queryset, search_term)
+
 
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group, GroupAdmin)
@@ -0,0 +1,127 @@
+"""
+Потоковая выгрузка и пакетная загрузка постов.
+
+Посты переносятся строками ``id, text, pub_date, author, group``: автор —
+по username, группа — по slug. Строки читаются ``iterator`` по id, так что
+память не растёт с размером таблицы, а прерванный перенос продолжается
+с последнего id.
+"""
+import csv
+import json
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from .models import Group, Post
+from .signals import posts_bulk_created
+
+User = get_user_model()
+
+FIELDS = ('id', 'text', 'pub_date', 'author', 'group')
+FORMATS = ('csv', 'jsonl')
+
+
+def iter_rows(queryset, chunk_size=2000):
+    """Строки постов в порядке ``queryset`` без загрузки всей выборки."""
+    rows = (
+        queryset.values_list(
+            'pk', 'text', 'pub_date', 'author__username', 'group__slug')
+        .iterator(chunk_size=chunk_size))
+    for pk, text, pub_date, author, group in rows:
+        yield {
+            'id': pk,
+            'text': text,
+            'pub_date': pub_date.isoformat(),
+            'author': author,
+            'group': group,
+        }
+
+
+class Echo:
+    """Файлоподобный объект для csv.writer: возвращает строку записи."""
+
+    def write(self, value):
+        return value
+
+
+def jsonl_lines(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+def csv_lines(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(FIELDS)
+    for row in rows:
+        yield writer.writerow(
+            '' if row[field] is None else row[field] for field in FIELDS)
+
+
+SERIALIZERS = {'jsonl': jsonl_lines, 'csv': csv_lines}
+
+
+def read_jsonl(stream):
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def read_csv(stream):
+    for row in csv.DictReader(stream):
+        row['group'] = row.get('group') or None
+        yield row
+
+
+READERS = {'jsonl': read_jsonl, 'csv': read_csv}
+
+
+@transaction.atomic
+def bulk_create_posts(posts, keep_pub_date=False):
+    """
+    ``bulk_create`` с id у объектов и сигналом ``posts_bulk_created``.
+    С ``keep_pub_date`` даты постов, затёртые ``auto_now_add`` при
+    вставке, возвращаются отдельным ``bulk_update`` до сигнала.
+    """
+    pub_dates = [post.pub_date for post in posts]
+    posts = Post.objects.bulk_create(posts)
+    if posts and posts[0].pk is None:
+        # SQLite не возвращает id из INSERT. До конца транзакции база
+        # заблокирована на запись, поэтому старшие id — только что вставленные
+        ids = list(
+            Post.objects.order_by('-pk')
+            .values_list('pk', flat=True)[:len(posts)])
+        for post, pk in zip(posts, reversed(ids)):
+            post.pk = pk
+    if keep_pub_date and posts:
+        for post, pub_date in zip(posts, pub_dates):
+            post.pub_date = pub_date
+        Post.objects.bulk_update(posts, ['pub_date'])
+    posts_bulk_created.send(sender=Post, posts=posts)
+    return posts
+
+
+def build_posts(rows):
+    """
+    Посты из строк выгрузки. Авторы и группы находятся одним запросом
+    на пачку; строки с неизвестным автором или группой пропускаются.
+    """
+    authors = dict(
+        User.objects.filter(username__in={row['author'] for row in rows})
+        .values_list('username', 'pk'))
+    groups = dict(
+        Group.objects.filter(
+            slug__in={row['group'] for row in rows if row['group']})
+        .values_list('slug', 'pk'))
+    posts = []
+    for row in rows:
+        if row['author'] not in authors or (
+                row['group'] and row['group'] not in groups):
+            continue
+        posts.append(Post(
+            text=row['text'],
+            pub_date=parse_datetime(row['pub_date']),
+            author_id=authors[row['author']],
+            group_id=groups.get(row['group']),
+        ))
+    return posts
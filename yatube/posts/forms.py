@@ -1,22 +1,33 @@
-from django.forms import ModelForm
+from django.forms import ModelForm, ValidationError
 
 from .models import Post
+from .widgets import GroupSelect
 
 
 class PostForm(ModelForm):
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, upload_errors=None, **kwargs):
         super().__init__(*args, **kwargs)
         self.fields['group'].empty_label = 'Категория не выбрана'
+        # Ошибки файлов, отброшенных ещё при разборе запроса
+        self.upload_errors = upload_errors or {}
+
+    def clean_image(self):
+        if 'image' in self.upload_errors:
+            raise ValidationError(self.upload_errors['image'])
+        return self.cleaned_data['image']
 
     class Meta:
         model = Post
-        fields = ('text', 'group')
+        fields = ('text', 'group', 'image')
+        widgets = {'group': GroupSelect}
 
         help_texts = {
             'group': 'Группа, к которой будет относиться пост',
             'text': 'Текст нового поста',
+            'image': 'Картинка к посту',
         }
         labels = {
             'text': 'Текст поста',
             'group': 'Выбор группы',
+            'image': 'Картинка',
         }
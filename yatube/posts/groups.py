@@ -0,0 +1,71 @@
+"""
+Выбор группы в форме поста без списка всех групп.
+
+Поиск идёт по началу названия и по префиксу адреса группы. Название
+ищется в ``title_key`` (нижний регистр), адрес — по транслитерации
+запроса, как при создании адреса. Оба превращаются в диапазон
+``key >= prefix AND key < prefix_next``, который SQLite берёт из индекса
+(``LIKE 'prefix%'`` индекс не использует): так находятся и группы с
+заданным вручную адресом.
+Самые популярные группы хранятся в кэше и показываются сразу.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.text import slugify
+
+from .models import SLUG_TRANSLATION, Group, GroupStats, make_title_key
+
+POPULAR_CACHE_KEY = 'posts:popular_groups'
+
+
+def slug_prefix(query):
+    return slugify(query.translate(SLUG_TRANSLATION))
+
+
+def next_prefix(prefix):
+    """Наименьшая строка больше всех строк, начинающихся с ``prefix``."""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def starting_with(field, prefix, limit):
+    return list(
+        Group.objects.filter(**{
+            f'{field}__gte': prefix, f'{field}__lt': next_prefix(prefix)})
+        .order_by(field).values_list('pk', 'title')[:limit])
+
+
+def search(query, limit=None):
+    """
+    Группы, чьё название начинается с ``query`` или адрес — с его
+    транслитерации: сначала совпадения по названию.
+    """
+    limit = limit or settings.GROUP_AUTOCOMPLETE_LIMIT
+    title = make_title_key(query)
+    prefix = slug_prefix(query)
+    if not title:
+        return popular()[:limit]
+    found = dict(starting_with('title_key', title, limit))
+    if prefix and len(found) < limit:
+        for pk, group_title in starting_with('slug', prefix, limit):
+            found.setdefault(pk, group_title)
+    return list(found.items())[:limit]
+
+
+def popular():
+    """
+    Группы с наибольшим числом постов: список пар (pk, title). Берутся
+    из статистики каталога по индексу ``group_stats_posts_idx``.
+    """
+    groups = cache.get(POPULAR_CACHE_KEY)
+    if groups is None:
+        groups = list(
+            GroupStats.objects.filter(posts_count__gt=0)
+            .order_by('-posts_count', '-group')
+            .values_list('group_id', 'group__title')
+            [:settings.GROUP_POPULAR_LIMIT])
+        cache.set(POPULAR_CACHE_KEY, groups, settings.GROUP_POPULAR_TIMEOUT)
+    return groups
+
+
+def invalidate_popular():
+    cache.delete(POPULAR_CACHE_KEY)
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.models import Post
+from posts.signals import thumbnails_rendered
+
+
+class Command(BaseCommand):
+    help = (
+        'Готовит миниатюры картинок, которые не успел сделать пул '
+        'процессов (очередь была полна или процесс перезапускался)')
+
+    def handle(self, *args, **options):
+        pending = (
+            Post.objects.exclude(image='').filter(thumbnails_ready=False)
+            .values_list('pk', 'image').iterator())
+        built = 0
+        for post_id, image_name in pending:
+            thumbnails.render(
+                settings.MEDIA_ROOT, image_name,
+                settings.POST_THUMBNAIL_SIZES)
+            thumbnails_rendered(post_id, image_name)
+            built += 1
+        self.stdout.write(
+            self.style.SUCCESS(f'Готово миниатюр: {built}'))
@@ -0,0 +1,41 @@
+import sys
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import bulk
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково выгружает посты в JSONL или CSV по возрастанию id; '
+        'прерванную выгрузку можно продолжить с --after-id')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл выгрузки или - для stdout')
+        parser.add_argument(
+            '--format', choices=bulk.FORMATS,
+            help='Формат файла, по умолчанию по расширению')
+        parser.add_argument(
+            '--after-id', type=int, default=0,
+            help='Выгружать посты с id больше указанного')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = (
+            options['format'] or Path(path).suffix.lstrip('.').lower())
+        if file_format not in bulk.FORMATS:
+            raise CommandError(
+                f'Неизвестный формат "{file_format}", укажите --format')
+        rows = bulk.iter_rows(
+            Post.objects.filter(pk__gt=options['after_id']).order_by('pk'),
+            chunk_size=options['chunk_size'])
+        lines = bulk.SERIALIZERS[file_format](rows)
+        if path == '-':
+            sys.stdout.writelines(lines)
+            return
+        with open(path, 'w', encoding='utf-8', newline='') as output:
+            output.writelines(lines)
+        self.stdout.write(self.style.SUCCESS(f'Посты выгружены в {path}'))
@@ -0,0 +1,113 @@
+import csv
+import json
+from itertools import islice
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.models import (Group, GroupStats, make_slug, make_title_key,
+                          unique_slug)
+
+FORMATS = ('csv', 'jsonl')
+
+
+def read_csv(stream):
+    yield from csv.DictReader(stream)
+
+
+def read_jsonl(stream):
+    for number, line in enumerate(stream, 1):
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError as error:
+                raise CommandError(f'Строка {number}: {error}')
+
+
+READERS = {'csv': read_csv, 'jsonl': read_jsonl}
+
+
+def batches(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает группы из CSV или JSONL с полями title, slug, '
+        'description. Группы с уже занятым или некорректным явным slug '
+        'и со слишком длинным названием пропускаются, сгенерированные '
+        'адреса получают суффикс -2, -3...')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл с группами')
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='Формат файла, по умолчанию по расширению')
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Сколько групп создавать за один запрос')
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        file_format = options['format'] or path.suffix.lstrip('.').lower()
+        if file_format not in FORMATS:
+            raise CommandError(
+                f'Неизвестный формат "{file_format}", укажите --format')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть положительным')
+        created = skipped = 0
+        with open(path, encoding='utf-8', newline='') as stream:
+            records = READERS[file_format](stream)
+            for batch in batches(records, options['batch_size']):
+                groups = self.build_groups(batch)
+                Group.objects.bulk_create(groups)
+                created += len(groups)
+                skipped += len(batch) - len(groups)
+        # bulk_create не шлёт post_save: строки каталога групп — одним
+        # запросом после загрузки
+        GroupStats.create_missing()
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано групп: {created}, пропущено: {skipped}'))
+
+    def build_groups(self, batch):
+        records = []
+        for record in batch:
+            title = (record.get('title') or '').strip()
+            if not title:
+                raise CommandError(f'Группа без названия: {record}')
+            slug = (record.get('slug') or '').strip()
+            # bulk_create не вызывает валидаторы полей
+            try:
+                self.validate(title, slug)
+            except ValidationError as error:
+                self.stderr.write(
+                    f'Пропущена группа "{title[:50]}": '
+                    + ' '.join(error.messages))
+                continue
+            records.append((title, slug, slug or make_slug(title), record))
+        # Один запрос на пачку: все base и base-N, которые уже заняты
+        taken = Group.taken_slugs(base for _, _, base, _ in records)
+        groups = []
+        for title, slug, base, record in records:
+            if slug and slug in taken:
+                continue
+            groups.append(Group(
+                title=title,
+                title_key=make_title_key(title),
+                slug=slug if slug else unique_slug(base, taken),
+                description=record.get('description') or '',
+            ))
+            taken.add(groups[-1].slug)
+        return groups
+
+    @staticmethod
+    def validate(title, slug):
+        Group._meta.get_field('title').run_validators(title)
+        if slug:
+            Group._meta.get_field('slug').run_validators(slug)
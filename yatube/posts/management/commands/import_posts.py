@@ -0,0 +1,69 @@
+from itertools import islice
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from posts import bulk
+from posts.models import ImportCheckpoint
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает посты из JSONL или CSV пачками bulk_create, каждая '
+        'пачка в своей транзакции. С --checkpoint id последней '
+        'загруженной строки сохраняется в базу в той же транзакции, и '
+        'повторный запуск продолжает с него')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл выгрузки export_posts')
+        parser.add_argument(
+            '--format', choices=bulk.FORMATS,
+            help='Формат файла, по умолчанию по расширению')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--checkpoint',
+            help='Имя контрольной точки с id последней загруженной строки')
+        parser.add_argument(
+            '--after-id', type=int,
+            help='Пропустить строки с id не больше указанного')
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        file_format = options['format'] or path.suffix.lstrip('.').lower()
+        if file_format not in bulk.FORMATS:
+            raise CommandError(
+                f'Неизвестный формат "{file_format}", укажите --format')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть положительным')
+        checkpoint = options['checkpoint']
+        after_id = options['after_id']
+        if after_id is None:
+            after_id = self.read_checkpoint(checkpoint)
+        created = skipped = 0
+        with open(path, encoding='utf-8', newline='') as stream:
+            rows = (
+                row for row in bulk.READERS[file_format](stream)
+                if int(row['id']) > after_id)
+            while True:
+                batch = list(islice(rows, options['batch_size']))
+                if not batch:
+                    break
+                with transaction.atomic():
+                    posts = bulk.bulk_create_posts(
+                        bulk.build_posts(batch), keep_pub_date=True)
+                    if checkpoint:
+                        ImportCheckpoint.objects.update_or_create(
+                            name=checkpoint,
+                            defaults={'last_id': batch[-1]['id']})
+                created += len(posts)
+                skipped += len(batch) - len(posts)
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено постов: {created}, пропущено: {skipped}'))
+
+    def read_checkpoint(self, checkpoint):
+        if not checkpoint:
+            return 0
+        return (
+            ImportCheckpoint.objects.filter(name=checkpoint)
+            .values_list('last_id', flat=True).first() or 0)
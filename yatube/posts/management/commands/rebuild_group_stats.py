@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from posts.models import Group, GroupStats
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает статистику каталога групп или сверяет её с '
+        'таблицей постов')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify', action='store_true',
+            help='Только сверить статистику, ничего не меняя')
+
+    def handle(self, *args, **options):
+        group_ids = list(Group.objects.values_list('pk', flat=True))
+        if options['verify']:
+            self.verify(group_ids)
+        else:
+            self.rebuild(group_ids)
+
+    def verify(self, group_ids):
+        expected = GroupStats.actual(group_ids)
+        stored = {
+            group_id: values
+            for group_id, *values in GroupStats.objects.values_list(
+                'group_id', 'posts_count', 'last_post_at', 'last_author_id')
+        }
+        drift = [
+            (group_id, stored.get(group_id), list(actual))
+            for group_id, actual in expected.items()
+            if stored.get(group_id) != list(actual)
+        ]
+        for group_id, value, actual in drift:
+            self.stdout.write(
+                f'group:{group_id}: хранится {value}, на деле {actual}')
+        if drift:
+            raise CommandError(f'Расходится статистика групп: {len(drift)}')
+        self.stdout.write(self.style.SUCCESS('Статистика групп сходится'))
+
+    @transaction.atomic
+    def rebuild(self, group_ids):
+        GroupStats.refresh(group_ids)
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересчитано групп: {len(group_ids)}'))
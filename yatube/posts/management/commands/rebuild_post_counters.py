@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count
+
+from posts.models import Post, PostCounter
+
+
+def actual_counters():
+    """Точные значения счётчиков, посчитанные по таблице постов."""
+    counters = {(PostCounter.GLOBAL, 0): Post.objects.count()}
+    for scope, field in (
+            (PostCounter.AUTHOR, 'author'), (PostCounter.GROUP, 'group')):
+        rows = (
+            Post.objects.filter(**{f'{field}__isnull': False})
+            .order_by().values_list(field).annotate(Count('id')))
+        counters.update(
+            ((scope, object_id), value) for object_id, value in rows)
+    return counters
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики постов или сверяет их с таблицей постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify', action='store_true',
+            help='Только сверить счётчики, ничего не меняя')
+
+    def handle(self, *args, **options):
+        if options['verify']:
+            self.verify()
+        else:
+            self.rebuild()
+
+    def verify(self):
+        expected = actual_counters()
+        stored = {
+            (scope, object_id): value
+            for scope, object_id, value in PostCounter.objects.values_list(
+                'scope', 'object_id', 'value')
+        }
+        # Отсутствующий счётчик не ошибка: он досчитается при чтении
+        drift = [
+            (key, value, expected.get(key, 0))
+            for key, value in stored.items()
+            if value != expected.get(key, 0)
+        ]
+        for (scope, object_id), value, actual in drift:
+            self.stdout.write(
+                f'{scope}:{object_id}: хранится {value}, на деле {actual}')
+        if drift:
+            raise CommandError(f'Расходятся счётчики: {len(drift)}')
+        self.stdout.write(self.style.SUCCESS('Счётчики сходятся'))
+
+    @transaction.atomic
+    def rebuild(self):
+        counters = actual_counters()
+        PostCounter.objects.all().delete()
+        PostCounter.objects.bulk_create(
+            PostCounter(scope=scope, object_id=object_id, value=value)
+            for (scope, object_id), value in counters.items())
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересчитано счётчиков: {len(counters)}'))
@@ -0,0 +1,26 @@
+# Generated by Django 2.2.16 on 2026-10-18 23:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_post_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostCounter',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('global', 'Все посты'), ('group', 'Посты группы'), ('author', 'Посты автора')], max_length=10, verbose_name='Область')),
+                ('object_id', models.PositiveIntegerField(default=0, verbose_name='ID объекта')),
+                ('value', models.IntegerField(default=0, verbose_name='Число постов')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='postcounter',
+            constraint=models.UniqueConstraint(fields=('scope', 'object_id'), name='unique_post_counter'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 2.2.16 on 2026-10-18 23:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_follow_timeline'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='postcounter',
+            index=models.Index(fields=['scope', '-value'], name='post_counter_top_idx'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 2.2.16 on 2026-10-19 00:02
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_group_stats(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    GroupStats = apps.get_model('posts', 'GroupStats')
+    Post = apps.get_model('posts', 'Post')
+    stats = []
+    for group_id in Group.objects.values_list('pk', flat=True):
+        posts = Post.objects.filter(group_id=group_id)
+        latest = posts.order_by('-pub_date', '-id').first()
+        stats.append(GroupStats(
+            group_id=group_id,
+            posts_count=posts.count(),
+            last_post_at=latest and latest.pub_date,
+            last_author_id=latest and latest.author_id,
+        ))
+    GroupStats.objects.bulk_create(stats)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0013_post_counter_top_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupStats',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='posts.Group', verbose_name='Группа')),
+                ('posts_count', models.IntegerField(default=0, verbose_name='Число постов')),
+                ('last_post_at', models.DateTimeField(null=True, verbose_name='Последний пост')),
+                ('last_author', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Автор последнего поста')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='groupstats',
+            index=models.Index(fields=['-last_post_at', '-group'], name='group_stats_activity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='groupstats',
+            index=models.Index(fields=['-posts_count', '-group'], name='group_stats_posts_idx'),
+        ),
+        migrations.RunPython(fill_group_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 2.2.16 on 2026-10-19 00:17
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_group_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='postcounter',
+            name='changed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Изменён'),
+        ),
+    ]
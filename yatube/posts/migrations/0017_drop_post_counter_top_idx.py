@@ -0,0 +1,17 @@
+# Generated by Django 2.2.16 on 2026-10-19 00:38
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_import_checkpoint'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='postcounter',
+            name='post_counter_top_idx',
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 2.2.16 on 2026-10-19 00:39
+
+from django.db import migrations, models
+
+
+def fill_title_keys(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    groups = list(Group.objects.only('title'))
+    for group in groups:
+        group.title_key = ' '.join(group.title.casefold().split())
+    Group.objects.bulk_update(groups, ['title_key'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_drop_post_counter_top_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='title_key',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=200),
+        ),
+        migrations.RunPython(fill_title_keys, migrations.RunPython.noop),
+    ]
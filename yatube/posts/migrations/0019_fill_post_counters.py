@@ -0,0 +1,36 @@
+from django.db import migrations
+from django.db.models import Count
+
+
+def fill_post_counters(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    Post = apps.get_model('posts', 'Post')
+    PostCounter = apps.get_model('posts', 'PostCounter')
+    counters = {('global', 0): Post.objects.count()}
+    # Группы без постов тоже получают счётчик: иначе его некому создать
+    counters.update(
+        (('group', pk), 0) for pk in Group.objects.values_list('pk', flat=True))
+    for scope, field in (('author', 'author'), ('group', 'group')):
+        rows = (
+            Post.objects.filter(**{f'{field}__isnull': False})
+            .order_by().values_list(field).annotate(Count('id')))
+        counters.update(
+            ((scope, object_id), value) for object_id, value in rows)
+    # Уже досчитанные при чтении счётчики не трогаем
+    existing = set(PostCounter.objects.values_list('scope', 'object_id'))
+    PostCounter.objects.bulk_create(
+        (PostCounter(scope=scope, object_id=object_id, value=value)
+         for (scope, object_id), value in counters.items()
+         if (scope, object_id) not in existing),
+        batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_group_title_key'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_post_counters, migrations.RunPython.noop),
+    ]
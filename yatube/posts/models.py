@@ -1,11 +1,57 @@
+import re
+
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import connection, models
+from django.db.models import (Case, Count, F, OuterRef, Q, Subquery,
+                              Value, When)
 from django.template.defaultfilters import slugify
 from django.urls import reverse
+from django.utils import timezone
+
+from .thumbnails import get_thumbnail
 
 User = get_user_model()
 
+SLUG_MAX_LENGTH = 200
+# Диапазонов в одном запросе taken_slugs: глубина выражения в SQLite
+# ограничена тысячей
+TAKEN_SLUGS_BATCH = 200
+SLUG_TRANSLATION = str.maketrans(
+    'абвгдеёжзийклмнопрстуфхцчшщъыьэюя'
+    'АБВГДЕЁЖЗИЙКЛМНОПРСТУФХЦЧШЩЪЫЬЭЮЯ',
+    'abvgdeejzijklmnoprstufhzcss_y_eua'
+    'ABVGDEEJZIJKLMNOPRSTUFHZCSS_Y_EUA'
+)
+
+
+def make_slug(title):
+    """Адрес группы из названия: транслитерация и slugify."""
+    slug = slugify(title.translate(SLUG_TRANSLATION))[:SLUG_MAX_LENGTH]
+    return slug or 'group'
+
+
+def make_title_key(title):
+    """Название для поиска по префиксу: нижний регистр, одиночные пробелы."""
+    return ' '.join(title.casefold().split())
+
+
+def is_numbered_slug(slug, bases):
+    """Адрес вида base-N для одного из bases."""
+    base, _, number = slug.rpartition('-')
+    return base in bases and re.fullmatch('[0-9]+', number) is not None
+
+
+def unique_slug(base, taken):
+    """Первый свободный из base, base-2, base-3...; занимает его в taken."""
+    slug, number = base, 1
+    while slug in taken:
+        number += 1
+        suffix = f'-{number}'
+        slug = base[:SLUG_MAX_LENGTH - len(suffix)] + suffix
+    taken.add(slug)
+    return slug
+
 
 class Post(models.Model):
     text = models.TextField(
@@ -29,9 +75,32 @@ class Post(models.Model):
         verbose_name='Группа',
         help_text='Выберите группу'
     )
+    image = models.ImageField(
+        'Картинка',
+        upload_to='posts/',
+        blank=True,
+        width_field='image_width',
+        height_field='image_height',
+        help_text='Загрузите картинку'
+    )
+    image_width = models.PositiveIntegerField(null=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, editable=False)
+    # Миниатюры готовит пул процессов уже после сохранения поста
+    thumbnails_ready = models.BooleanField(default=False, editable=False)
+    # Меняется при каждом изменении того, что видно в карточке поста
+    version = models.PositiveIntegerField('Версия', default=1)
 
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(fields=['-pub_date'], name='post_pub_date_idx'),
+            models.Index(
+                fields=['author', '-pub_date'],
+                name='post_author_pub_date_idx'),
+            models.Index(
+                fields=['group', '-pub_date'],
+                name='post_group_pub_date_idx'),
+        ]
 
     def get_absolute_url(self):
         return reverse('posts:profile', args=[self.author.username])
@@ -39,29 +108,394 @@ class Post(models.Model):
     def __str__(self):
         return self.text[:15]
 
+    def clean_fields(self, exclude=None):
+        # Группа уже загружена из базы (ModelChoiceField находит её по pk):
+        # проверка ForeignKey повторила бы тот же запрос
+        group = Post.group.is_cached(self) and self.group
+        if group and not group._state.adding and group.pk == self.group_id:
+            exclude = [*(exclude or ()), 'group']
+        super().clean_fields(exclude)
+
+    def save(self, *args, **kwargs):
+        bump = not self._state.adding
+        if bump:
+            self.version = F('version') + 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'version'}
+        super().save(*args, **kwargs)
+        if bump:
+            self.refresh_from_db(fields=['version'])
+
+    def thumbnail(self, size):
+        """Миниатюра картинки поста размера ``feed`` или ``detail``."""
+        return get_thumbnail(self, size)
+
+    @property
+    def feed_thumbnail(self):
+        return self.thumbnail('feed')
+
+    @property
+    def detail_thumbnail(self):
+        return self.thumbnail('detail')
+
+    @property
+    def card_cache_key(self):
+        # pub_date отличает пост от другого с тем же id после пересоздания
+        return (
+            f'post_card:{self.pk}:{self.version}:'
+            f'{self.pub_date.timestamp():.6f}')
+
 
 class Group(models.Model):
     title = models.CharField(max_length=200)
-    slug = models.SlugField(max_length=200, unique=True)
+    slug = models.SlugField(max_length=SLUG_MAX_LENGTH, unique=True)
     description = models.TextField()
+    # Поиск группы по началу названия диапазоном по индексу, см. groups
+    title_key = models.CharField(
+        max_length=200, db_index=True, editable=False, default='')
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Адрес проверяется на уникальность, только если он изменился
+        instance._loaded_slug = instance.__dict__.get('slug')
+        return instance
+
     def save(self, *args, **kwargs):
         if not self.slug:
-            new_slug = self.title.translate(
-                str.maketrans(
-                    "абвгдеёжзийклмнопрстуфхцчшщъыьэюя\
-                        +АБВГДЕЁЖЗИЙКЛМНОПРСТУФХЦЧШЩЪЫЬЭЮЯ",
-                    "abvgdeejzijklmnoprstufhzcss_y_eua\
-                        +ABVGDEEJZIJKLMNOPRSTUFHZCSS_Y_EUA"
+            base = make_slug(self.title)
+            self.slug = unique_slug(base, Group.taken_slugs([base]))
+        elif (self._state.adding
+                or self.slug != getattr(self, '_loaded_slug', None)):
+            if Group.objects.filter(slug=self.slug).exists():
+                raise ValidationError(
+                    f'Адрес "{self.slug}" уже существует, '
+                    'придумайте уникальное значение'
                 )
-            )
-            self.slug = slugify(new_slug)[:200]
-        if Group.objects.filter(slug=self.slug).exists():
-            raise ValidationError(
-                f'Адрес "{self.slug}" уже существует, '
-                'придумайте уникальное значение'
-            )
+        self.title_key = make_title_key(self.title)
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'title_key'}
         super().save(*args, **kwargs)
+        self._loaded_slug = self.slug
+
+    @staticmethod
+    def taken_slugs(bases):
+        """Занятые адреса вида base и base-N (до 200 base на запрос)."""
+        bases = set(bases)
+        ordered = sorted(bases)
+        taken = set()
+        # Диапазоны [base-, base.) вместо регулярного выражения: их
+        # SQLite ищет по индексу slug. Суффикс -N проверяется уже здесь
+        for start in range(0, len(ordered), TAKEN_SLUGS_BATCH):
+            batch = ordered[start:start + TAKEN_SLUGS_BATCH]
+            query = Q(slug__in=batch)
+            for base in batch:
+                query |= Q(slug__gte=f'{base}-', slug__lt=f'{base}.')
+            taken.update(
+                Group.objects.filter(query).values_list('slug', flat=True))
+        return {
+            slug for slug in taken
+            if slug in bases or is_numbered_slug(slug, bases)}
+
+
+class PostCounter(models.Model):
+    """Поддерживаемое сигналами число постов: всего, в группе, у автора."""
+
+    GLOBAL = 'global'
+    GROUP = 'group'
+    AUTHOR = 'author'
+    SCOPES = (
+        (GLOBAL, 'Все посты'),
+        (GROUP, 'Посты группы'),
+        (AUTHOR, 'Посты автора'),
+    )
+
+    scope = models.CharField('Область', max_length=10, choices=SCOPES)
+    object_id = models.PositiveIntegerField('ID объекта', default=0)
+    value = models.IntegerField('Число постов', default=0)
+    # Время последнего изменения постов области, в том числе правок без
+    # смены числа: по нему строится ETag выгрузки
+    changed_at = models.DateTimeField('Изменён', default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['scope', 'object_id'], name='unique_post_counter'),
+        ]
+
+    def __str__(self):
+        return f'{self.scope}:{self.object_id}={self.value}'
+
+    @staticmethod
+    def keys_for(author_id, group_id):
+        keys = [(PostCounter.GLOBAL, 0), (PostCounter.AUTHOR, author_id)]
+        if group_id is not None:
+            keys.append((PostCounter.GROUP, group_id))
+        return keys
+
+    @classmethod
+    def filter_keys(cls, keys):
+        condition = Q()
+        for scope, object_id in keys:
+            condition |= Q(scope=scope, object_id=object_id)
+        return cls.objects.filter(condition)
+
+    @classmethod
+    def change(cls, keys, delta):
+        """
+        Атомарно сдвигает счётчики одним UPDATE. Отсутствующие счётчики
+        не создаются: их досчитает ``get_value`` при первом чтении.
+        """
+        cls.filter_keys(keys).update(
+            value=F('value') + delta, changed_at=timezone.now())
+
+    @classmethod
+    def touch(cls, keys):
+        """Отмечает правку постов областей без смены их числа."""
+        if keys:
+            cls.filter_keys(keys).update(changed_at=timezone.now())
+
+    @classmethod
+    def get_estimate(cls, scope, object_id=0):
+        """Значение счётчика, если он уже создан; иначе None без COUNT(*)."""
+        try:
+            return cls.objects.values_list('value', flat=True).get(
+                scope=scope, object_id=object_id)
+        except cls.DoesNotExist:
+            return None
+
+    @classmethod
+    def get_value(cls, scope, object_id=0):
+        return cls.get_counter(scope, object_id).value
+
+    @classmethod
+    def get_counter(cls, scope, object_id=0):
+        try:
+            return cls.objects.only('value', 'changed_at').get(
+                scope=scope, object_id=object_id)
+        except cls.DoesNotExist:
+            pass
+        queryset = Post.objects.all()
+        if scope == cls.GROUP:
+            queryset = queryset.filter(group_id=object_id)
+        elif scope == cls.AUTHOR:
+            queryset = queryset.filter(author_id=object_id)
+        counter, _ = cls.objects.get_or_create(
+            scope=scope, object_id=object_id,
+            defaults={'value': queryset.count()})
+        return counter
+
+
+class ImportCheckpoint(models.Model):
+    """
+    Последний загруженный id строки выгрузки для ``import_posts``.
+    Пишется в транзакции пачки, поэтому не расходится с загруженным.
+    """
+
+    name = models.CharField('Имя', max_length=255, unique=True)
+    last_id = models.PositiveIntegerField('Последний id', default=0)
+
+    def __str__(self):
+        return f'{self.name}: {self.last_id}'
+
+
+class Follow(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follower',
+        verbose_name='Подписчик'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='following',
+        verbose_name='Автор'
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'], name='unique_follow'),
+            models.CheckConstraint(
+                check=~Q(user=F('author')), name='no_self_follow'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} -> {self.author_id}'
+
+
+class PullAuthor(models.Model):
+    """
+    Автор со слишком большим числом подписчиков: его посты не раскладываются
+    по лентам при публикации, а подмешиваются при чтении ленты.
+    """
+
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='pull_author',
+        verbose_name='Автор'
+    )
+
+    def __str__(self):
+        return str(self.author_id)
+
+
+class TimelineEntry(models.Model):
+    """Пост в материализованной ленте подписок пользователя."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Читатель'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост'
+    )
+    # Копии полей поста: по ним лента листается и чистится без JOIN
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор'
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'], name='unique_timeline_entry'),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_user_pub_date_idx'),
+            models.Index(
+                fields=['user', 'author'], name='timeline_user_author_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id}: {self.post_id}'
+
+
+class GroupStats(models.Model):
+    """
+    Материализованная статистика группы для каталога групп. Сдвигается
+    сигналами постов, пересчитывается командой ``rebuild_group_stats``.
+    """
+
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Группа'
+    )
+    posts_count = models.IntegerField('Число постов', default=0)
+    last_post_at = models.DateTimeField('Последний пост', null=True)
+    last_author = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='+',
+        verbose_name='Автор последнего поста'
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['-last_post_at', '-group'],
+                name='group_stats_activity_idx'),
+            models.Index(
+                fields=['-posts_count', '-group'],
+                name='group_stats_posts_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.group_id}: {self.posts_count}'
+
+    @staticmethod
+    def latest_posts():
+        return Post.objects.filter(
+            group_id=OuterRef('group_id')).order_by('-pub_date', '-id')
+
+    @classmethod
+    def add(cls, group_id, count, pub_date, author_id):
+        """
+        Одним UPDATE добавляет ``count`` постов; последний из них, от
+        ``author_id`` в ``pub_date``, становится последней активностью,
+        если он новее. Отсутствующую строку досчитывает по постам.
+        """
+        is_newer = Q(last_post_at__isnull=True) | Q(last_post_at__lte=pub_date)
+        updated = cls.objects.filter(group_id=group_id).update(
+            posts_count=F('posts_count') + count,
+            last_post_at=Case(
+                When(is_newer, then=Value(pub_date)),
+                default=F('last_post_at'),
+                output_field=models.DateTimeField()),
+            last_author=Case(
+                When(is_newer, then=Value(author_id)),
+                default=F('last_author'),
+                output_field=models.IntegerField()),
+        )
+        if not updated:
+            cls.refresh([group_id])
+
+    @classmethod
+    def remove(cls, group_id, pub_date):
+        """Убирает пост; если он был последним, ищет следующий по индексу."""
+        stats = cls.objects.filter(group_id=group_id)
+        stats.update(posts_count=F('posts_count') - 1)
+        latest = cls.latest_posts()
+        stats.filter(last_post_at__lte=pub_date).update(
+            last_post_at=Subquery(latest.values('pub_date')[:1]),
+            last_author=Subquery(latest.values('author_id')[:1]),
+        )
+
+    @classmethod
+    def create_missing(cls):
+        """Пустая статистика для групп без неё, одним INSERT ... SELECT."""
+        stats = cls._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {stats} (group_id, posts_count) '
+                f'SELECT id, 0 FROM {Group._meta.db_table} '
+                f'WHERE id NOT IN (SELECT group_id FROM {stats})')
+
+    @staticmethod
+    def actual(group_ids):
+        """
+        Статистика групп по таблице постов: словарь
+        ``{group_id: (posts_count, last_post_at, last_author_id)}``.
+        """
+        counts = dict(
+            Post.objects.filter(group_id__in=group_ids)
+            .order_by().values_list('group_id').annotate(Count('id')))
+        stats = {}
+        for group_id in group_ids:
+            latest = (
+                Post.objects.filter(group_id=group_id)
+                .order_by('-pub_date', '-id')
+                .values_list('pub_date', 'author_id').first())
+            last_post_at, last_author_id = latest or (None, None)
+            stats[group_id] = (
+                counts.get(group_id, 0), last_post_at, last_author_id)
+        return stats
+
+    @classmethod
+    def refresh(cls, group_ids):
+        """Пересчитывает статистику групп по таблице постов."""
+        for group_id, values in cls.actual(group_ids).items():
+            cls.objects.update_or_create(
+                group_id=group_id,
+                defaults=dict(zip(
+                    ('posts_count', 'last_post_at', 'last_author_id'),
+                    values)))
@@ -0,0 +1,250 @@
+from collections import Counter
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import (post_delete, post_init, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import Signal, receiver
+
+from core import pagecache, pool
+
+from . import groups, thumbnails, timeline
+from .models import Group, GroupStats, Post, PostCounter
+
+User = get_user_model()
+
+# bulk_create не шлёт post_save: отправляется после пакетной вставки
+posts_bulk_created = Signal(providing_args=['posts'])
+
+# Поле не загружено (only/defer) — его изменение отследить нельзя
+UNKNOWN = object()
+
+# Поля автора и группы, которые выводятся в карточке поста
+AUTHOR_CARD_FIELDS = ('username', 'first_name', 'last_name')
+GROUP_CARD_FIELDS = ('slug',)
+
+
+def snapshot(instance, fields):
+    # __dict__ вместо атрибута: отложенное поле не должно грузиться
+    return tuple(instance.__dict__.get(field, UNKNOWN) for field in fields)
+
+
+def card_changed(instance, fields):
+    previous = instance._card_snapshot
+    instance._card_snapshot = snapshot(instance, fields)
+    return UNKNOWN in previous or previous != instance._card_snapshot
+
+
+def post_page_tags(post, *group_ids):
+    """Теги страниц, на которых виден пост."""
+    tags = ['index', f'post:{post.pk}', f'author:{post.author_id}']
+    tags.extend(
+        f'group:{group_id}' for group_id in group_ids
+        if group_id not in (None, UNKNOWN))
+    return tags
+
+
+@receiver(post_init, sender=Post)
+def remember_group(sender, instance, **kwargs):
+    instance._initial_group_id, = snapshot(instance, ('group_id',))
+
+
+@receiver(post_init, sender=Post)
+def remember_image(sender, instance, **kwargs):
+    instance._initial_image = image_name(instance)
+
+
+def image_name(post):
+    value = post.__dict__.get('image', UNKNOWN)
+    return getattr(value, 'name', value)
+
+
+@receiver(pre_save, sender=Post)
+def reset_thumbnails(sender, instance, **kwargs):
+    name = image_name(instance)
+    # Новая загрузка ещё не записана в хранилище (_committed) и может
+    # называться так же, как прежняя картинка
+    instance._image_changed = name is not UNKNOWN and (
+        name != instance._initial_image
+        or not getattr(instance.image, '_committed', True))
+    if instance._image_changed:
+        instance.thumbnails_ready = False
+
+
+@receiver(post_save, sender=Post)
+def schedule_saved_thumbnails(sender, instance, **kwargs):
+    if instance._image_changed and instance.image:
+        transaction.on_commit(partial(
+            schedule_thumbnails, instance.pk, instance.image.name))
+    instance._image_changed = False
+    instance._initial_image = image_name(instance)
+
+
+def schedule_thumbnails(post_id, image_name):
+    """
+    Ставит миниатюры в пул процессов. Если очередь полна, их досделает
+    команда ``build_thumbnails``.
+    """
+    pool.submit(
+        thumbnails.render,
+        (settings.MEDIA_ROOT, image_name, settings.POST_THUMBNAIL_SIZES),
+        callback=partial(thumbnails_rendered, post_id))
+
+
+def thumbnails_rendered(post_id, image_name):
+    # Картинку могли заменить, пока готовились миниатюры
+    post = Post.objects.filter(pk=post_id, image=image_name).first()
+    if post is not None:
+        post.thumbnails_ready = True
+        post.save(update_fields=['thumbnails_ready'])
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    old_group_id = instance._initial_group_id
+    if created:
+        PostCounter.change(
+            PostCounter.keys_for(instance.author_id, instance.group_id), 1)
+        timeline.fan_out([instance])
+        if instance.group_id is not None:
+            GroupStats.add(
+                instance.group_id, 1, instance.pub_date, instance.author_id)
+    elif old_group_id not in (UNKNOWN, instance.group_id):
+        if old_group_id is not None:
+            PostCounter.change([(PostCounter.GROUP, old_group_id)], -1)
+            GroupStats.remove(old_group_id, instance.pub_date)
+        if instance.group_id is not None:
+            PostCounter.change([(PostCounter.GROUP, instance.group_id)], 1)
+            GroupStats.add(
+                instance.group_id, 1, instance.pub_date, instance.author_id)
+    if not created:
+        keys = PostCounter.keys_for(instance.author_id, instance.group_id)
+        if old_group_id not in (None, UNKNOWN, instance.group_id):
+            keys.append((PostCounter.GROUP, old_group_id))
+        PostCounter.touch(keys)
+    pagecache.invalidate(
+        *post_page_tags(instance, old_group_id, instance.group_id))
+    instance._initial_group_id = instance.group_id
+
+
+@receiver(posts_bulk_created, sender=Post)
+def posts_created(sender, posts, **kwargs):
+    deltas = Counter(
+        key for post in posts
+        for key in PostCounter.keys_for(post.author_id, post.group_id))
+    keys_by_delta = {}
+    for key, delta in deltas.items():
+        keys_by_delta.setdefault(delta, []).append(key)
+    for delta, keys in keys_by_delta.items():
+        PostCounter.change(keys, delta)
+    tags = {'index'}
+    by_author = {}
+    for post in posts:
+        tags.update(post_page_tags(post, post.group_id))
+        by_author.setdefault(post.author_id, []).append(post)
+    pagecache.invalidate(*tags)
+    for author_posts in by_author.values():
+        timeline.fan_out(author_posts)
+    by_group = {}
+    for post in posts:
+        if post.group_id is not None:
+            by_group.setdefault(post.group_id, []).append(post)
+    for group_id, group_posts in by_group.items():
+        latest = max(group_posts, key=lambda post: (post.pub_date, post.pk))
+        GroupStats.add(
+            group_id, len(group_posts), latest.pub_date, latest.author_id)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    PostCounter.change(
+        PostCounter.keys_for(instance.author_id, instance.group_id), -1)
+    if instance.group_id is not None:
+        GroupStats.remove(instance.group_id, instance.pub_date)
+    cache.delete(instance.card_cache_key)
+    pagecache.invalidate(*post_page_tags(instance, instance.group_id))
+
+
+@receiver(post_init, sender=User)
+def remember_author_card(sender, instance, **kwargs):
+    instance._card_snapshot = snapshot(instance, AUTHOR_CARD_FIELDS)
+
+
+@receiver(post_save, sender=User)
+def author_saved(sender, instance, created, **kwargs):
+    if created or not card_changed(instance, AUTHOR_CARD_FIELDS):
+        return
+    posts = Post.objects.filter(author=instance)
+    posts.update(version=F('version') + 1)
+    group_ids = list(
+        posts.filter(group__isnull=False)
+        .order_by().values_list('group_id', flat=True).distinct())
+    PostCounter.touch([
+        (PostCounter.AUTHOR, instance.pk),
+        *((PostCounter.GROUP, group_id) for group_id in group_ids)])
+    pagecache.invalidate(
+        'index', f'author:{instance.pk}',
+        *(f'group:{group_id}' for group_id in group_ids))
+
+
+@receiver(post_delete, sender=User)
+def author_deleted(sender, instance, **kwargs):
+    PostCounter.objects.filter(
+        scope=PostCounter.AUTHOR, object_id=instance.pk).delete()
+
+
+@receiver(post_init, sender=Group)
+def remember_group_card(sender, instance, **kwargs):
+    instance._card_snapshot = snapshot(instance, GROUP_CARD_FIELDS)
+
+
+def invalidate_group(group, bump_cards):
+    posts = Post.objects.filter(group=group)
+    if bump_cards:
+        posts.update(version=F('version') + 1)
+    author_ids = list(
+        posts.order_by().values_list('author_id', flat=True).distinct())
+    if bump_cards:
+        PostCounter.touch([
+            (PostCounter.GROUP, group.pk),
+            *((PostCounter.AUTHOR, author_id) for author_id in author_ids)])
+    pagecache.invalidate(
+        'index', f'group:{group.pk}',
+        *(f'author:{author_id}' for author_id in author_ids))
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, raw, **kwargs):
+    if raw:
+        # loaddata: статистика приходит из фикстуры или пересчитывается
+        # командой rebuild_group_stats
+        return
+    if created:
+        GroupStats.objects.create(group=instance)
+        PostCounter.objects.create(
+            scope=PostCounter.GROUP, object_id=instance.pk)
+    else:
+        invalidate_group(
+            instance, bump_cards=card_changed(instance, GROUP_CARD_FIELDS))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def reset_popular_groups(sender, instance, **kwargs):
+    groups.invalidate_popular()
+
+
+@receiver(pre_delete, sender=Group)
+def group_deleting(sender, instance, **kwargs):
+    # Посты ещё ссылаются на группу: после удаления group_id обнулится
+    invalidate_group(instance, bump_cards=True)
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    PostCounter.objects.filter(
+        scope=PostCounter.GROUP, object_id=instance.pk).delete()
@@ -0,0 +1,29 @@
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_cards(posts):
+    """
+    Возвращает HTML карточек постов: закэшированные берутся одним
+    get_many, отрисовываются только промахи.
+    """
+    posts = list(posts)
+    cached = cache.get_many([post.card_cache_key for post in posts])
+    missed = {}
+    cards = []
+    for post in posts:
+        html = cached.get(post.card_cache_key)
+        if html is None:
+            html = render_to_string(
+                'posts/includes/post_card.html', {'post': post})
+            missed[post.card_cache_key] = html
+        cards.append(mark_safe(html))
+    if missed:
+        cache.set_many(missed, settings.POST_CARD_CACHE_TIMEOUT)
+    return cards
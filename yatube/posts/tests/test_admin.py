@@ -0,0 +1,112 @@
+# posts/tests/test_admin.py
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class PostAdminTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        cls.groups = [
+            Group.objects.create(title=title, description='')
+            for title in ('Кошки', 'Собаки')
+        ]
+        for i in range(6):
+            author = User.objects.create_user(username=f'admin_author_{i}')
+            Post.objects.create(
+                text=f'Пост номер {i}', author=author,
+                group=cls.groups[i % 2] if i % 3 else None)
+        Post.objects.create(
+            text='Про котиков', author=cls.admin, group=cls.groups[0])
+        cls.url = reverse('admin:posts_post_changelist')
+        call_command('rebuild_post_counters', stdout=StringIO())
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def changelist(self, **params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, [query['sql'] for query in context.captured_queries]
+
+    def test_rows_are_loaded_without_per_row_queries(self):
+        _, queries = self.changelist()
+        _, paged_queries = self.changelist(p=1)
+        with override_settings(ADMIN_COUNT_CAP=3):
+            _, filtered = self.changelist(group__id__exact=self.groups[0].pk)
+        self.assertEqual(len(queries), 4)
+        self.assertEqual(len(queries), len(paged_queries))
+        self.assertLessEqual(len(filtered), len(queries))
+
+    def test_changelist_does_not_count_posts(self):
+        _, queries = self.changelist()
+        self.assertFalse([
+            sql for sql in queries
+            if 'COUNT(' in sql and 'posts_post' in sql
+            and 'posts_postcounter' not in sql
+        ])
+        with override_settings(ADMIN_COUNT_CAP=2):
+            response, queries = self.changelist(q='номер')
+        self.assertEqual(response.context['cl'].result_count, 2)
+        self.assertTrue(any('LIMIT 2' in sql for sql in queries))
+
+    def test_group_select_renders_only_selected_group(self):
+        response, _ = self.changelist()
+        content = response.content.decode()
+        self.assertIn('admin-autocomplete', content)
+        self.assertEqual(content.count('>Собаки</option>'), 2)
+
+    def test_search_uses_full_text_index(self):
+        response, queries = self.changelist(q='котик')
+        self.assertEqual(
+            [post.text for post in response.context['cl'].result_list],
+            ['Про котиков'])
+        self.assertTrue(any('MATCH' in sql for sql in queries))
+
+
+class GroupAdminTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        for title in ('Кошки', 'Кошельки', 'Собаки'):
+            Group.objects.create(title=title, description='')
+        Group.objects.create(
+            slug='misc', title='Разное', description='Всё про собак')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def autocomplete(self, term):
+        response = self.client.get(
+            reverse('admin:posts_group_autocomplete'), {'term': term})
+        return sorted(item['text'] for item in response.json()['results'])
+
+    def test_autocomplete_searches_by_slug_prefix(self):
+        self.assertEqual(self.autocomplete('Кош'), ['Кошельки', 'Кошки'])
+
+    def test_search_falls_back_to_all_fields(self):
+        # Адреса с таким началом нет: поиск по названию
+        self.assertEqual(self.autocomplete('Разн'), ['Разное'])
+        self.assertEqual(self.autocomplete('собак'), ['Собаки'])
+        response = self.client.get(
+            reverse('admin:posts_group_changelist'), {'q': 'про собак'})
+        self.assertEqual(
+            [group.title for group in response.context['cl'].result_list],
+            ['Разное'])
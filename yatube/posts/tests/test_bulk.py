@@ -0,0 +1,132 @@
+# posts/tests/test_bulk.py
+import json
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from posts.models import Group, ImportCheckpoint, Post, PostCounter
+from search import cache as search_cache
+
+User = get_user_model()
+
+
+class PostTransferTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.tmp_dir = Path(tempfile.mkdtemp())
+        cls.user = User.objects.create_user(username='bulk_user')
+        cls.group = Group.objects.create(
+            slug='bulk_slug', title='Группа', description='Описание')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(cls.tmp_dir, ignore_errors=True)
+
+    def setUp(self):
+        for number in range(5):
+            Post.objects.create(
+                text=f'Перенос номер {number}', author=self.user,
+                group=self.group if number % 2 else None)
+        Post.objects.update(pub_date=timezone.now() - timedelta(days=3))
+
+    def export(self, name, *args):
+        path = str(self.tmp_dir / name)
+        call_command('export_posts', path, *args, stdout=StringIO())
+        return path
+
+    def import_posts(self, path, *args):
+        out = StringIO()
+        call_command('import_posts', path, *args, stdout=out)
+        return out.getvalue()
+
+    def snapshot(self):
+        return list(
+            Post.objects.order_by('pk')
+            .values_list('text', 'pub_date', 'author', 'group'))
+
+    def test_round_trip(self):
+        """Выгрузка и загрузка сохраняют текст, дату, автора и группу."""
+        for file_format in ('jsonl', 'csv'):
+            with self.subTest(file_format=file_format):
+                expected = self.snapshot()
+                path = self.export(f'posts.{file_format}')
+                Post.objects.all().delete()
+                self.import_posts(path, '--batch-size', '2')
+                self.assertEqual(self.snapshot(), expected)
+
+    def test_export_after_id(self):
+        """Выгрузка продолжается после указанного id."""
+        first_id = Post.objects.order_by('pk').first().pk
+        path = self.export('tail.jsonl', '--after-id', str(first_id))
+        with open(path, encoding='utf-8') as stream:
+            ids = [json.loads(line)['id'] for line in stream]
+        self.assertEqual(
+            ids, list(Post.objects.filter(pk__gt=first_id)
+                      .order_by('pk').values_list('pk', flat=True)))
+
+    def test_import_resumes_from_checkpoint(self):
+        """Повторный запуск загружает только строки после контрольной."""
+        path = self.export('posts.jsonl')
+        last_id = Post.objects.order_by('pk')[2].pk
+        ImportCheckpoint.objects.create(name='posts', last_id=last_id)
+        Post.objects.all().delete()
+        output = self.import_posts(path, '--checkpoint', 'posts')
+        self.assertIn('Загружено постов: 2', output)
+        self.assertEqual(
+            ImportCheckpoint.objects.get(name='posts').last_id, last_id + 2)
+
+    def test_failed_batch_does_not_move_checkpoint(self):
+        """Контрольная точка откатывается вместе с упавшей пачкой."""
+        path = self.export('posts.jsonl')
+        Post.objects.all().delete()
+        with mock.patch(
+                'posts.bulk.posts_bulk_created.send',
+                side_effect=[None, RuntimeError]):
+            with self.assertRaises(RuntimeError):
+                self.import_posts(
+                    path, '--checkpoint', 'posts', '--batch-size', '2')
+        self.assertEqual(Post.objects.count(), 2)
+        output = self.import_posts(path, '--checkpoint', 'posts')
+        self.assertIn('Загружено постов: 3', output)
+        self.assertEqual(len(self.snapshot()), 5)
+
+    def test_import_does_not_patch_pub_date_field(self):
+        path = self.export('posts.jsonl')
+        Post.objects.all().delete()
+        self.import_posts(path)
+        self.assertTrue(Post._meta.get_field('pub_date').auto_now_add)
+        self.assertLess(
+            Post.objects.latest('pub_date').pub_date,
+            timezone.now() - timedelta(days=2))
+
+    def test_unknown_author_is_skipped(self):
+        path = self.export('posts.jsonl')
+        Post.objects.all().delete()
+        User.objects.filter(pk=self.user.pk).update(username='renamed')
+        output = self.import_posts(path)
+        self.assertIn('Загружено постов: 0, пропущено: 5', output)
+
+    def test_import_keeps_derived_data(self):
+        """Счётчики и поиск видят посты, загруженные пачкой."""
+        path = self.export('posts.jsonl')
+        Post.objects.all().delete()
+        self.assertEqual(PostCounter.get_value(PostCounter.GLOBAL), 0)
+        self.import_posts(path)
+        self.assertEqual(PostCounter.get_value(PostCounter.GLOBAL), 5)
+        self.assertEqual(
+            PostCounter.get_value(PostCounter.GROUP, self.group.pk), 2)
+        results, hits = search_cache.search('перенос')
+        self.assertEqual(hits, 5)
+        self.assertEqual(
+            {result.id for result in results},
+            set(Post.objects.values_list('pk', flat=True)))
@@ -0,0 +1,100 @@
+# posts/tests/test_counters.py
+from importlib import import_module
+from io import StringIO
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post, PostCounter
+
+User = get_user_model()
+
+
+class PostCounterTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='counter_user')
+        cls.group = Group.objects.create(
+            slug='counter_slug',
+            title='Группа счётчиков',
+            description='Описание',
+        )
+        cls.other_group = Group.objects.create(
+            slug='counter_other_slug',
+            title='Другая группа',
+            description='Описание',
+        )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        Post.objects.create(text='Первый', author=self.user, group=self.group)
+        # Счётчики создаются при первом чтении, дальше их ведут сигналы
+        self.assertCounters(global_=1, author=1, group=1, other_group=0)
+
+    def assertCounters(self, global_, author, group, other_group):
+        self.assertEqual(
+            [
+                PostCounter.get_value(PostCounter.GLOBAL),
+                PostCounter.get_value(PostCounter.AUTHOR, self.user.pk),
+                PostCounter.get_value(PostCounter.GROUP, self.group.pk),
+                PostCounter.get_value(
+                    PostCounter.GROUP, self.other_group.pk),
+            ],
+            [global_, author, group, other_group]
+        )
+
+    def test_create_and_delete_update_counters(self):
+        post = Post.objects.create(
+            text='Второй', author=self.user, group=self.group)
+        self.assertCounters(global_=2, author=2, group=2, other_group=0)
+        post.delete()
+        self.assertCounters(global_=1, author=1, group=1, other_group=0)
+
+    def test_group_reassignment_in_edit_moves_counter(self):
+        post = Post.objects.get()
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': post.id}),
+            data={'text': post.text, 'group': self.other_group.id})
+        self.assertCounters(global_=1, author=1, group=0, other_group=1)
+
+    def test_detail_view_reads_counter_without_count(self):
+        post = Post.objects.get()
+        with self.assertNumQueries(2):
+            response = Client().get(
+                reverse('posts:post_detail', kwargs={'post_id': post.id}))
+        self.assertEqual(response.context['posts_count'], 1)
+
+    def test_command_verifies_and_rebuilds_counters(self):
+        PostCounter.objects.filter(scope=PostCounter.GLOBAL).update(value=7)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_post_counters', verify=True,
+                         stdout=StringIO())
+        call_command('rebuild_post_counters', stdout=StringIO())
+        call_command('rebuild_post_counters', verify=True, stdout=StringIO())
+        self.assertCounters(global_=1, author=1, group=1, other_group=0)
+
+    def test_new_group_gets_counter(self):
+        group = Group.objects.create(
+            slug='counter_new_slug', title='Новая группа', description='')
+        self.assertEqual(
+            PostCounter.get_estimate(PostCounter.GROUP, group.pk), 0)
+        Post.objects.create(text='Второй', author=self.user, group=group)
+        self.assertEqual(
+            PostCounter.get_estimate(PostCounter.GROUP, group.pk), 1)
+
+    def test_migration_fills_missing_counters(self):
+        migration = import_module('posts.migrations.0019_fill_post_counters')
+        PostCounter.objects.exclude(scope=PostCounter.AUTHOR).delete()
+        migration.fill_post_counters(apps, None)
+        self.assertEqual(PostCounter.get_estimate(PostCounter.GLOBAL), 1)
+        self.assertEqual(
+            PostCounter.get_estimate(PostCounter.GROUP, self.group.pk), 1)
+        self.assertEqual(
+            PostCounter.get_estimate(
+                PostCounter.GROUP, self.other_group.pk), 0)
+        call_command('rebuild_post_counters', verify=True, stdout=StringIO())
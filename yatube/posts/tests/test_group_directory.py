@@ -0,0 +1,130 @@
+# posts/tests/test_group_directory.py
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core import serializers
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.bulk import bulk_create_posts
+from posts.models import Group, GroupStats, Post
+
+User = get_user_model()
+
+
+class GroupStatsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='stats_user')
+        cls.other = User.objects.create_user(username='stats_other')
+        cls.group = Group.objects.create(title='Кошки', description='')
+        cls.second = Group.objects.create(title='Собаки', description='')
+
+    def stats(self, group=None):
+        stats = GroupStats.objects.get(group=group or self.group)
+        return stats.posts_count, stats.last_post_at, stats.last_author_id
+
+    def assertStatsAreActual(self):
+        call_command('rebuild_group_stats', '--verify', stdout=StringIO())
+
+    def test_new_group_has_empty_stats(self):
+        self.assertEqual(self.stats(), (0, None, None))
+
+    def test_created_post_becomes_latest(self):
+        Post.objects.create(text='Пост', author=self.user, group=self.group)
+        post = Post.objects.create(
+            text='Пост', author=self.other, group=self.group)
+        self.assertEqual(self.stats(), (2, post.pub_date, self.other.pk))
+        self.assertStatsAreActual()
+
+    def test_deleting_latest_post_falls_back_to_previous(self):
+        first = Post.objects.create(
+            text='Пост', author=self.user, group=self.group)
+        Post.objects.create(
+            text='Пост', author=self.other, group=self.group).delete()
+        self.assertEqual(self.stats(), (1, first.pub_date, self.user.pk))
+        first.delete()
+        self.assertEqual(self.stats(), (0, None, None))
+
+    def test_moving_post_between_groups(self):
+        post = Post.objects.create(
+            text='Пост', author=self.user, group=self.group)
+        post.group = self.second
+        post.save()
+        self.assertEqual(self.stats(), (0, None, None))
+        self.assertEqual(
+            self.stats(self.second), (1, post.pub_date, self.user.pk))
+        self.assertStatsAreActual()
+
+    def test_bulk_created_posts(self):
+        posts = bulk_create_posts([
+            Post(text=f'Пост {i}', author=author, group=self.group)
+            for i, author in enumerate((self.user, self.other))
+        ])
+        self.assertEqual(
+            self.stats(), (2, posts[-1].pub_date, self.other.pk))
+        self.assertStatsAreActual()
+
+    def test_deleting_author_falls_back_to_other_author(self):
+        post = Post.objects.create(
+            text='Пост', author=self.other, group=self.group)
+        author = User.objects.create_user(username='stats_leaving')
+        Post.objects.create(text='Пост', author=author, group=self.group)
+        author.delete()
+        self.assertEqual(self.stats(), (1, post.pub_date, self.other.pk))
+
+    def test_loaddata_keeps_fixture_stats(self):
+        group = Group.objects.create(title='Птицы', description='')
+        dump = serializers.serialize('json', [group.stats, group])
+        Group.objects.filter(pk=group.pk).delete()
+        for obj in serializers.deserialize('json', dump):
+            obj.save()
+        self.assertEqual(self.stats(group), (0, None, None))
+
+    def test_rebuild_restores_drift(self):
+        Post.objects.create(text='Пост', author=self.user, group=self.group)
+        GroupStats.objects.update(posts_count=10, last_post_at=None)
+        with self.assertRaises(CommandError):
+            self.assertStatsAreActual()
+        call_command('rebuild_group_stats', stdout=StringIO())
+        self.assertStatsAreActual()
+
+
+class GroupDirectoryViewTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='directory_user', first_name='Лев', last_name='Толстой')
+        cls.quiet = Group.objects.create(title='Тихая', description='')
+        cls.busy = Group.objects.create(title='Шумная', description='')
+        cls.empty = Group.objects.create(title='Пустая', description='')
+        for _ in range(3):
+            Post.objects.create(text='Пост', author=cls.user, group=cls.busy)
+        Post.objects.create(text='Пост', author=cls.user, group=cls.quiet)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def titles(self, url):
+        response = self.client.get(url)
+        return [stats.group.title for stats in response.context['page_obj']]
+
+    def test_directory_orders(self):
+        self.assertEqual(
+            self.titles(reverse('posts:group_directory')),
+            ['Тихая', 'Шумная', 'Пустая'])
+        self.assertEqual(
+            self.titles(reverse('posts:group_directory_popular')),
+            ['Шумная', 'Тихая', 'Пустая'])
+
+    def test_directory_shows_stats(self):
+        response = self.client.get(reverse('posts:group_directory'))
+        self.assertContains(response, 'Постов: 3')
+        self.assertContains(response, 'Лев Толстой')
+        self.assertContains(
+            response, reverse('posts:group_list', args=[self.busy.slug]))
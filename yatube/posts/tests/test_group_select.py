@@ -0,0 +1,99 @@
+# posts/tests/test_group_select.py
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.forms import ModelChoiceField
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.forms import PostForm
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+@override_settings(GROUP_POPULAR_LIMIT=2)
+class GroupSelectTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='group_picker')
+        cls.groups = [
+            Group.objects.create(title=title, description='Описание')
+            for title in ('Кошки', 'Кошельки', 'Собаки', 'Птицы')
+        ]
+        # Популярность — число постов: Птицы, Собаки, Кошки
+        for count, group in zip((1, 0, 2, 3), cls.groups):
+            for _ in range(count):
+                Post.objects.create(
+                    text='Пост', author=cls.user, group=group)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def options(self, response):
+        field = response.context['form']['group']
+        return [
+            option.choice_label for option in field.subwidgets
+            if option.data['value']
+        ]
+
+    def test_create_form_renders_popular_groups_only(self):
+        response = self.authorized_client.get(reverse('posts:post_create'))
+        self.assertIs(
+            type(response.context['form'].fields['group']), ModelChoiceField)
+        self.assertEqual(self.options(response), ['Птицы', 'Собаки'])
+        self.assertContains(response, 'group-search')
+
+    def test_edit_form_keeps_selected_group(self):
+        post = Post.objects.create(
+            text='Пост', author=self.user, group=self.groups[1])
+        response = self.authorized_client.get(
+            reverse('posts:post_edit', args=[post.pk]))
+        self.assertEqual(
+            self.options(response), ['Птицы', 'Собаки', 'Кошельки'])
+
+    def test_any_group_validates_with_one_lookup(self):
+        form = PostForm(data={'text': 'Пост', 'group': self.groups[1].pk})
+        with self.assertNumQueries(1):
+            self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data['group'], self.groups[1])
+
+    def test_autocomplete_searches_by_slug_prefix(self):
+        url = reverse('posts:group_autocomplete')
+        response = self.authorized_client.get(url, {'q': 'Кош'})
+        self.assertEqual(
+            [group['title'] for group in response.json()['results']],
+            ['Кошельки', 'Кошки'])
+        response = self.authorized_client.get(url, {'q': ''})
+        self.assertEqual(
+            [group['title'] for group in response.json()['results']],
+            ['Птицы', 'Собаки'])
+        self.assertEqual(Client().get(url).status_code, 302)
+
+    def test_unknown_group_is_rejected(self):
+        form = PostForm(data={'text': 'Пост', 'group': 10 ** 6})
+        self.assertFalse(form.is_valid())
+        self.assertIn('group', form.errors)
+
+    def test_autocomplete_finds_explicit_slug_by_title(self):
+        Group.objects.create(slug='cats', title='Коты', description='')
+        url = reverse('posts:group_autocomplete')
+        response = self.authorized_client.get(url, {'q': 'кот'})
+        self.assertEqual(
+            [group['title'] for group in response.json()['results']],
+            ['Коты'])
+
+    def test_popular_groups_are_cached_until_group_changes(self):
+        self.authorized_client.get(reverse('posts:post_create'))
+        for _ in range(3):
+            Post.objects.create(
+                text='Пост', author=self.user, group=self.groups[0])
+        response = self.authorized_client.get(reverse('posts:post_create'))
+        self.assertEqual(self.options(response), ['Птицы', 'Собаки'])
+        group = self.groups[3]
+        group.title = 'Пернатые'
+        group.save()
+        response = self.authorized_client.get(reverse('posts:post_create'))
+        self.assertEqual(self.options(response), ['Кошки', 'Пернатые'])
@@ -0,0 +1,123 @@
+# posts/tests/test_images.py
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+from PIL import Image
+
+from posts.models import Post
+from posts.thumbnails import fit, thumbnail_name
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_image(name='picture.png', size=(2000, 1000)):
+    content = BytesIO()
+    Image.new('RGB', size, 'teal').save(content, 'PNG')
+    return SimpleUploadedFile(
+        name, content.getvalue(), content_type='image/png')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, BACKGROUND_WORKERS=0)
+class PostImageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='image_user')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def create_post(self, image):
+        return self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Пост с картинкой', 'image': image})
+
+    def test_fit(self):
+        self.assertEqual(fit(2000, 1000, (960, 540)), (960, 480))
+        self.assertEqual(fit(100, 50, (960, 540)), (100, 50))
+
+    def test_upload_saves_image_and_size(self):
+        self.create_post(make_image())
+        post = Post.objects.get()
+        self.assertTrue(post.image.name.startswith('posts/picture'))
+        self.assertEqual((post.image_width, post.image_height), (2000, 1000))
+        self.assertFalse(post.thumbnails_ready)
+
+    @override_settings(UPLOAD_MAX_SIZE=100)
+    def test_oversized_upload_is_rejected(self):
+        response = self.create_post(make_image())
+        self.assertFormError(
+            response, 'form', 'image', 'Файл больше 100\xa0байт')
+        self.assertFalse(Post.objects.exists())
+
+    def test_card_uses_thumbnail_with_size(self):
+        """До готовности миниатюры — оригинал, потом миниатюра."""
+        self.create_post(make_image())
+        post = Post.objects.get()
+        response = self.authorized_client.get(reverse('posts:main'))
+        self.assertContains(
+            response, f'src="{post.image.url}"\n        '
+            'width="960" height="480"')
+        call_command('build_thumbnails', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertTrue(post.thumbnails_ready)
+        for size in settings.POST_THUMBNAIL_SIZES:
+            with self.subTest(size=size):
+                path = Path(TEMP_MEDIA_ROOT) / thumbnail_name(
+                    post.image.name, size)
+                with Image.open(path) as thumb:
+                    self.assertEqual(
+                        thumb.size,
+                        (post.thumbnail(size).width,
+                         post.thumbnail(size).height))
+        response = self.authorized_client.get(reverse('posts:main'))
+        self.assertContains(response, post.feed_thumbnail.url)
+
+    def test_post_without_image(self):
+        post = Post.objects.create(text='Без картинки', author=self.user)
+        self.assertIsNone(post.feed_thumbnail)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, BACKGROUND_WORKERS=0)
+class ThumbnailPipelineTests(TransactionTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_thumbnails_are_built_after_commit(self):
+        user = User.objects.create_user(username='pipeline_user')
+        post = Post.objects.create(
+            text='Пост', author=user, image=make_image('pipeline.png'))
+        post.refresh_from_db()
+        self.assertTrue(post.thumbnails_ready)
+        post.text = 'Правка текста'
+        post.save()
+        post.refresh_from_db()
+        self.assertTrue(post.thumbnails_ready)
+        post.image = make_image('replaced.png', size=(300, 200))
+        post.save()
+        post.refresh_from_db()
+        self.assertTrue(post.thumbnails_ready)
+        self.assertTrue(
+            (Path(TEMP_MEDIA_ROOT) / thumbnail_name(
+                post.image.name, 'feed')).exists())
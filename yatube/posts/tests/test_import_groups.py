@@ -0,0 +1,151 @@
+# posts/tests/test_import_groups.py
+import json
+import shutil
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from posts import groups
+from posts.models import Group, GroupStats
+
+
+class ImportGroupsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.tmp_dir = Path(tempfile.mkdtemp())
+        Group.objects.create(
+            slug='novosti', title='Новости', description='Описание')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(cls.tmp_dir, ignore_errors=True)
+
+    def write(self, name, content):
+        path = self.tmp_dir / name
+        path.write_text(content, encoding='utf-8')
+        return str(path)
+
+    def import_groups(self, path, *args, **options):
+        out = StringIO()
+        call_command('import_groups', path, *args, stdout=out, **options)
+        return out.getvalue()
+
+    def test_import_csv(self):
+        """CSV загружается, slug генерируется из названия."""
+        path = self.write(
+            'groups.csv',
+            'title,slug,description\n'
+            'Кошки,,Про кошек\n'
+            'Собаки,dogs,Про собак\n')
+        self.import_groups(path)
+        self.assertEqual(
+            Group.objects.get(slug='koski').description, 'Про кошек')
+        self.assertEqual(groups.search('Соба'), [
+            (Group.objects.get(slug='dogs').pk, 'Собаки')])
+
+    def test_import_jsonl_resolves_collisions(self):
+        """Занятые и повторяющиеся адреса получают суффиксы."""
+        path = self.write('groups.jsonl', '\n'.join(
+            json.dumps({'title': 'Новости'}) for _ in range(3)))
+        self.import_groups(path)
+        self.assertEqual(
+            sorted(Group.objects.filter(
+                title='Новости').values_list('slug', flat=True)),
+            ['novosti', 'novosti-2', 'novosti-3', 'novosti-4'])
+
+    def test_existing_explicit_slug_is_skipped(self):
+        """Группа с уже занятым явным slug не загружается повторно."""
+        path = self.write(
+            'groups.jsonl',
+            json.dumps({'title': 'Другие', 'slug': 'novosti'}))
+        output = self.import_groups(path)
+        self.assertIn('пропущено: 1', output)
+        self.assertFalse(Group.objects.filter(title='Другие').exists())
+
+    def test_invalid_records_are_skipped(self):
+        """Некорректный slug и слишком длинное название не загружаются."""
+        records = (
+            {'title': 'Пробелы', 'slug': 'bad slug'},
+            {'title': 'Длинный адрес', 'slug': 'a' * 201},
+            {'title': 'Т' * 201},
+            {'title': 'Хорошая', 'slug': 'good'},
+        )
+        path = self.write(
+            'groups.jsonl', '\n'.join(map(json.dumps, records)))
+        err = StringIO()
+        output = self.import_groups(path, stderr=err)
+        self.assertIn('Создано групп: 1, пропущено: 3', output)
+        self.assertEqual(err.getvalue().count('Пропущена группа'), 3)
+        self.assertEqual(
+            list(Group.objects.exclude(slug='novosti').values_list(
+                'slug', flat=True)),
+            ['good'])
+
+    def test_one_query_per_batch(self):
+        """
+        На пачку уходит запрос занятых адресов и один INSERT, плюс один
+        INSERT статистики групп на всю загрузку.
+        """
+        path = self.write('groups.jsonl', '\n'.join(
+            json.dumps({'title': f'Группа {number}'})
+            for number in range(10)))
+        # По два запроса на каждую из двух пачек и статистика групп
+        with self.assertNumQueries(5):
+            self.import_groups(path, '--batch-size', '5')
+        self.assertEqual(Group.objects.count(), 11)
+        self.assertEqual(GroupStats.objects.count(), 11)
+
+    def test_bad_input(self):
+        """Неизвестный формат и группа без названия — ошибки команды."""
+        with self.assertRaises(CommandError):
+            self.import_groups(self.write('groups.txt', ''))
+        with self.assertRaises(CommandError):
+            self.import_groups(self.write('empty.csv', 'title\n\n,\n'))
+
+
+class GroupSlugTests(TestCase):
+    def test_generated_slug_is_unique(self):
+        """Группа без slug получает свободный адрес."""
+        Group.objects.create(title='Спорт', description='Описание')
+        group = Group.objects.create(title='Спорт', description='Описание')
+        self.assertEqual(group.slug, 'sport-2')
+
+    def test_update_does_not_check_slug(self):
+        """Сохранение без смены адреса не проверяет его занятость."""
+        group = Group.objects.create(
+            slug='update', title='Группа', description='Описание')
+        group = Group.objects.get(pk=group.pk)
+        group.description = 'Новое описание'
+        with CaptureQueriesContext(connection) as queries:
+            group.save()
+        self.assertFalse([
+            query for query in queries.captured_queries
+            if query['sql'].startswith('SELECT')
+            and 'FROM "posts_group"' in query['sql']
+        ])
+
+    def test_explicit_duplicate_slug_raises(self):
+        """Явно заданный занятый адрес по-прежнему отклоняется."""
+        Group.objects.create(
+            slug='taken', title='Группа', description='Описание')
+        with self.assertRaises(ValidationError):
+            Group.objects.create(
+                slug='taken', title='Другая', description='Описание')
+
+    def test_taken_slugs_matches_numbered_suffixes(self):
+        """Занятыми считаются только base и base-N, пачками по индексу."""
+        for slug in ('cats', 'cats-2', 'cats-2-3', 'cats-new', 'cats7',
+                     'dogs-10'):
+            Group.objects.create(slug=slug, title=slug, description='')
+        bases = ['cats', 'cats-2', 'dogs', *(f'base{i}' for i in range(300))]
+        with self.assertNumQueries(2):
+            taken = Group.taken_slugs(bases)
+        self.assertEqual(taken, {'cats', 'cats-2', 'cats-2-3', 'dogs-10'})
@@ -0,0 +1,123 @@
+# posts/tests/test_page_cache.py
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Group, Post
+from posts.views import IndexView
+
+User = get_user_model()
+
+
+@override_settings(PAGE_CACHE_ENABLED=True)
+class PageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='page_author')
+        cls.reader = User.objects.create_user(username='page_reader')
+        cls.group = Group.objects.create(
+            slug='page_slug', title='Группа страниц', description='Описание')
+        cls.other_group = Group.objects.create(
+            slug='page_other', title='Другая группа', description='Описание')
+        cls.post = Post.objects.create(
+            text='Кэшируемый пост', author=cls.author, group=cls.group)
+        Post.objects.create(
+            text='Пост другой группы',
+            author=cls.reader,
+            group=cls.other_group)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.urls = {
+            'index': reverse('posts:main'),
+            'group': reverse(
+                'posts:group_list', kwargs={'slug': self.group.slug}),
+            'other_group': reverse(
+                'posts:group_list', kwargs={'slug': self.other_group.slug}),
+            'profile': reverse(
+                'posts:profile', kwargs={'username': self.author}),
+            'detail': reverse(
+                'posts:post_detail', kwargs={'post_id': self.post.id}),
+        }
+
+    def is_cached(self, url, client=None):
+        """Страница из кэша: отрисованы только фрагменты-«дыры»."""
+        response = (client or self.guest_client).get(url)
+        return 'base.html' not in [t.name for t in response.templates]
+
+    def test_pages_are_served_from_cache(self):
+        for name, url in self.urls.items():
+            with self.subTest(name=name):
+                self.assertFalse(self.is_cached(url))
+                self.assertTrue(self.is_cached(url))
+
+    def test_post_published_during_render_is_not_lost(self):
+        render = IndexView.get_context_data
+
+        def publish_during_render(view, **kwargs):
+            context = render(view, **kwargs)
+            Post.objects.create(text='Опубликован на лету', author=self.author)
+            return context
+
+        with mock.patch.object(
+                IndexView, 'get_context_data', publish_during_render):
+            self.guest_client.get(self.urls['index'])
+        self.assertContains(
+            self.guest_client.get(self.urls['index']), 'Опубликован на лету')
+
+    def test_header_is_filled_per_user(self):
+        self.guest_client.get(self.urls['index'])
+        self.assertTrue(
+            self.is_cached(self.urls['index'], self.reader_client))
+        response = self.reader_client.get(self.urls['index'])
+        self.assertContains(response, 'Пользователь: page_reader')
+        self.assertNotContains(response, 'page-hole')
+        response = self.guest_client.get(self.urls['index'])
+        self.assertContains(response, 'Войти')
+        self.assertNotContains(response, 'Пользователь:')
+
+    def test_author_actions_are_filled_per_user(self):
+        edit_url = reverse(
+            'posts:post_edit', kwargs={'post_id': self.post.id})
+        self.reader_client.get(self.urls['detail'])
+        self.assertNotContains(
+            self.reader_client.get(self.urls['detail']), edit_url)
+        self.assertTrue(
+            self.is_cached(self.urls['detail'], self.author_client))
+        response = self.author_client.get(self.urls['detail'])
+        self.assertContains(response, edit_url)
+        self.assertContains(response, 'csrfmiddlewaretoken')
+
+    def test_new_post_evicts_only_pages_it_appears_on(self):
+        for url in self.urls.values():
+            self.guest_client.get(url)
+        Post.objects.create(
+            text='Новый пост', author=self.author, group=self.group)
+        expected = {
+            'index': False,
+            'group': False,
+            'other_group': True,
+            'profile': False,
+            # На странице поста выводится число постов автора
+            'detail': False,
+        }
+        for name, cached in expected.items():
+            with self.subTest(name=name):
+                self.assertEqual(self.is_cached(self.urls[name]), cached)
+
+    def test_moving_post_evicts_old_group(self):
+        for url in self.urls.values():
+            self.guest_client.get(url)
+        self.post.group = self.other_group
+        self.post.save()
+        self.assertFalse(self.is_cached(self.urls['group']))
+        self.assertFalse(self.is_cached(self.urls['other_group']))
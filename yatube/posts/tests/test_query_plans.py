@@ -0,0 +1,131 @@
+# posts/tests/test_query_plans.py
+import re
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import urls
+from posts.models import Group, GroupStats, Post, PullAuthor, TimelineEntry
+from posts.timeline import follow
+
+User = get_user_model()
+
+# Полный обход таблицы без индекса или сортировка во временном B-дереве
+BAD_PLAN_RE = re.compile(
+    r'^SCAN (TABLE )?(?P<table>\w+)(?! USING)( AS \w+)?$'
+    r'|USE TEMP B-TREE FOR (ORDER BY|GROUP BY|DISTINCT)'
+)
+
+
+class QueryPlanTests(TestCase):
+    """Планы запросов представлений posts не деградируют до SCAN/сортировки."""
+
+    # Таблицы, запросы к которым проверяем
+    tables = (
+        Post._meta.db_table, TimelineEntry._meta.db_table,
+        Group._meta.db_table, GroupStats._meta.db_table)
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='plan_user')
+        cls.group = Group.objects.create(
+            slug='plan_slug',
+            title='Группа плана',
+            description='Описание группы плана',
+        )
+        Post.objects.bulk_create(
+            Post(
+                text=f'Пост {i}',
+                author=cls.user,
+                group=cls.group if i % 2 else None
+            ) for i in range(30)
+        )
+        cls.post = Post.objects.filter(group=cls.group).first()
+        # Лента подписок: обычный автор и автор, читаемый при чтении
+        cls.author = User.objects.create_user(username='plan_author')
+        celebrities = [
+            User.objects.create_user(username=f'plan_celebrity_{i}')
+            for i in range(2)
+        ]
+        PullAuthor.objects.bulk_create(
+            PullAuthor(author=celebrity) for celebrity in celebrities)
+        for author in (cls.author, *celebrities):
+            follow(cls.user, author)
+            Post.objects.bulk_create(
+                Post(text=f'Пост {i}', author=author) for i in range(15))
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def route_requests(self):
+        """Запрос для каждого имени из posts/urls.py: (метод, url)."""
+        post_kwargs = {'post_id': self.post.id}
+        return {
+            'main': ('get', reverse('posts:main')),
+            'group_directory': ('get', reverse('posts:group_directory')),
+            'group_directory_popular': ('get', reverse(
+                'posts:group_directory_popular')),
+            'group_autocomplete': ('get', reverse(
+                'posts:group_autocomplete') + '?q=План'),
+            'group_list': ('get', reverse(
+                'posts:group_list', kwargs={'slug': self.group.slug})),
+            'profile': ('get', reverse(
+                'posts:profile', kwargs={'username': self.user.username})),
+            'profile_export': ('get', reverse(
+                'posts:profile_export',
+                kwargs={'username': self.user.username})),
+            'group_export': ('get', reverse(
+                'posts:group_export', kwargs={'slug': self.group.slug})),
+            'post_detail': ('get', reverse(
+                'posts:post_detail', kwargs=post_kwargs)),
+            'post_create': ('get', reverse('posts:post_create')),
+            'post_edit': ('get', reverse(
+                'posts:post_edit', kwargs=post_kwargs)),
+            'follow_index': ('get', reverse('posts:follow_index')),
+            'profile_follow': ('post', reverse(
+                'posts:profile_follow',
+                kwargs={'username': self.author.username})),
+            'profile_unfollow': ('post', reverse(
+                'posts:profile_unfollow',
+                kwargs={'username': self.author.username})),
+            'post_delete': ('post', reverse(
+                'posts:post_delete', kwargs=post_kwargs)),
+        }
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def bad_plan_steps(self, sql):
+        steps = []
+        for detail in self.explain(sql):
+            match = BAD_PLAN_RE.search(detail)
+            if match and match.group('table') in (None, *self.tables):
+                steps.append(detail)
+        return steps
+
+    def test_every_route_is_covered(self):
+        names = {pattern.name for pattern in urls.urlpatterns}
+        self.assertEqual(names, set(self.route_requests()))
+
+    def test_route_query_plans_use_indexes(self):
+        for name, (method, url) in self.route_requests().items():
+            with self.subTest(name=name):
+                with CaptureQueriesContext(connection) as context:
+                    response = getattr(self.authorized_client, method)(url)
+                    if response.streaming:
+                        b''.join(response.streaming_content)
+                for query in context.captured_queries:
+                    sql = query['sql']
+                    if not sql.startswith('SELECT') or not any(
+                            table in sql for table in self.tables):
+                        continue
+                    self.assertEqual(
+                        self.bad_plan_steps(sql), [],
+                        f'Деградировал план запроса: {sql}')
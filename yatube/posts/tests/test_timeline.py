@@ -0,0 +1,139 @@
+# posts/tests/test_timeline.py
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+
+from core.testing import QueryBudgetTestMixin
+from posts.models import Follow, Post, PullAuthor, TimelineEntry
+from posts.timeline import follow
+
+User = get_user_model()
+
+
+class TimelineTests(QueryBudgetTestMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='writer')
+        cls.celebrity = User.objects.create_user(username='celebrity')
+        cls.stranger = User.objects.create_user(username='stranger')
+        cls.follow_url = reverse('posts:follow_index')
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def follow_author(self, author):
+        return self.reader_client.post(
+            reverse('posts:profile_follow', args=[author.username]))
+
+    def timeline_texts(self, data=None):
+        response = self.reader_client.get(self.follow_url, data)
+        return [post.text for post in response.context['page_obj']]
+
+    def test_follow_and_unfollow(self):
+        Post.objects.create(text='Старый пост', author=self.author)
+        response = self.follow_author(self.author)
+        self.assertRedirects(
+            response, reverse('posts:profile', args=[self.author.username]))
+        self.assertTrue(Follow.objects.filter(
+            user=self.reader, author=self.author).exists())
+        # При подписке последние посты автора досыпаются в ленту
+        self.assertEqual(self.timeline_texts(), ['Старый пост'])
+        self.reader_client.post(
+            reverse('posts:profile_unfollow', args=[self.author.username]))
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(TimelineEntry.objects.exists())
+
+    def test_follow_requires_post_and_login(self):
+        url = reverse('posts:profile_follow', args=[self.author.username])
+        self.assertEqual(
+            self.reader_client.get(url).status_code,
+            HTTPStatus.METHOD_NOT_ALLOWED)
+        response = Client().get(self.follow_url)
+        self.assertRedirects(
+            response, reverse('users:login') + '?next=' + self.follow_url)
+
+    def test_self_follow_is_ignored(self):
+        self.follow_author(self.reader)
+        self.assertFalse(Follow.objects.exists())
+
+    @override_settings(TIMELINE_FANOUT_BATCH=2)
+    def test_new_post_is_fanned_out_to_followers(self):
+        followers = [self.reader] + [
+            User.objects.create_user(username=f'fan_{i}') for i in range(4)]
+        for user in followers:
+            follow(user, self.author)
+        post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertEqual(
+            set(TimelineEntry.objects.filter(post=post)
+                .values_list('user_id', flat=True)),
+            {user.pk for user in followers})
+        Post.objects.create(text='Чужой пост', author=self.stranger)
+        self.assertEqual(self.timeline_texts(), ['Новый пост'])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_celebrity_posts_are_read_on_read(self):
+        fan = User.objects.create_user(username='fan')
+        follow(fan, self.celebrity)
+        # Пост до того, как автор стал «знаменитостью», уже разложен
+        Post.objects.create(text='До славы', author=self.celebrity)
+        follow(self.reader, self.celebrity)
+        Post.objects.create(text='После славы', author=self.celebrity)
+        self.assertTrue(
+            PullAuthor.objects.filter(author=self.celebrity).exists())
+        self.assertFalse(TimelineEntry.objects.filter(
+            post__text='После славы').exists())
+        self.assertEqual(
+            self.timeline_texts(), ['После славы', 'До славы'])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_merged_timeline_paginates_by_cursor(self):
+        PullAuthor.objects.create(author=self.celebrity)
+        follow(self.reader, self.author)
+        follow(self.reader, self.celebrity)
+        for i in range(8):
+            Post.objects.create(text=f'Автор {i}', author=self.author)
+            Post.objects.create(text=f'Звезда {i}', author=self.celebrity)
+        expected = list(
+            Post.objects.filter(author__in=[self.author, self.celebrity])
+            .order_by('-pub_date', '-id').values_list('text', flat=True))
+        response = self.assertWithinQueryBudget(
+            self.reader_client, self.follow_url)
+        page = response.context['page_obj']
+        self.assertTrue(page.is_cursor)
+        first = [post.text for post in page]
+        second = self.timeline_texts({'cursor': page.next_cursor})
+        self.assertEqual(first + second, expected)
+
+    def test_profile_follow_button(self):
+        profile_url = reverse('posts:profile', args=[self.author.username])
+        self.assertContains(self.reader_client.get(profile_url), 'Подписаться')
+        follow(self.reader, self.author)
+        self.assertContains(self.reader_client.get(profile_url), 'Отписаться')
+        self.assertNotContains(Client().get(profile_url), 'Подписаться')
+
+
+@override_settings(TIMELINE_FANOUT_INLINE=1, BACKGROUND_WORKERS=0)
+class DeferredFanOutTests(TransactionTestCase):
+    def test_large_fan_out_waits_for_commit(self):
+        author = User.objects.create_user(username='deferred_author')
+        followers = [
+            User.objects.create_user(username=f'deferred_{i}')
+            for i in range(3)]
+        for user in followers:
+            follow(user, author)
+        with transaction.atomic():
+            post = Post.objects.create(text='Пост', author=author)
+            self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(
+            set(TimelineEntry.objects.filter(post=post)
+                .values_list('user_id', flat=True)),
+            {user.pk for user in followers})
@@ -1,11 +1,20 @@
 # posts/tests/test_views.py
+import json
+from http import HTTPStatus
+from io import StringIO
+
 from django import forms
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from yatube.settings import COUNT_PAGINATOR_PAGE
 
-from posts.models import Group, Post
+from core.testing import QueryBudgetTestMixin
+from posts.models import Group, Post, PostCounter
 
 User = get_user_model()
 
@@ -203,3 +212,312 @@ class PostPagesTests(TestCase):
                 )).context['object_list']
             )
         )
+
+
+@override_settings(CURSOR_PAGINATION=True)
+class CursorPaginationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='cursor_user')
+        cls.group = Group.objects.create(
+            slug='cursor_slug',
+            title='Группа курсора',
+            description='Описание группы курсора',
+        )
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=cls.user, group=cls.group)
+            for i in range(COUNT_PAGINATOR_PAGE * 2 + 5)
+        )
+        cls.expected_ids = list(
+            Post.objects.order_by('-pub_date', '-id')
+            .values_list('id', flat=True)
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def walk(self, url):
+        """Проходит ленту по курсорам «Следующая» до конца."""
+        pages = []
+        params = {}
+        while True:
+            response = self.guest_client.get(url, params)
+            page = response.context['page_obj']
+            pages.append(page)
+            if not page.has_next():
+                return pages
+            params = {'cursor': page.next_cursor}
+
+    def test_pages_follow_keyset_order(self):
+        urls = (
+            reverse('posts:main'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                pages = self.walk(url)
+                self.assertEqual(len(pages), 3)
+                self.assertFalse(pages[0].has_previous())
+                self.assertEqual(
+                    [post.id for page in pages for post in page],
+                    self.expected_ids
+                )
+
+    def test_previous_cursor_returns_previous_page(self):
+        first, second, _ = self.walk(reverse('posts:main'))
+        response = self.guest_client.get(
+            reverse('posts:main'), {'cursor': second.previous_cursor})
+        page = response.context['page_obj']
+        self.assertEqual(list(page), list(first))
+        self.assertFalse(page.has_previous())
+        self.assertTrue(page.has_next())
+
+    def test_paginator_reports_unknown_totals(self):
+        paginator = self.walk(reverse('posts:main'))[0].paginator
+        self.assertIsNone(paginator.count)
+        self.assertIsNone(paginator.num_pages)
+        self.assertEqual(list(paginator.page_range), [])
+
+    def test_invalid_cursor_returns_404(self):
+        response = self.guest_client.get(
+            reverse('posts:main'), {'cursor': 'broken'})
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+
+class PagePaginationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='page_user')
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=cls.user)
+            for i in range(COUNT_PAGINATOR_PAGE * 7 + 3)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def get_page(self, number):
+        with CaptureQueriesContext(connection) as context:
+            response = self.guest_client.get(
+                reverse('posts:main'), {'page': number})
+        self.assertFalse([
+            query['sql'] for query in context.captured_queries
+            if 'COUNT(' in query['sql']
+        ])
+        return response
+
+    def test_window_without_estimate_ends_at_next_page(self):
+        # Общий счётчик создаёт миграция; без него оценки нет
+        PostCounter.objects.filter(scope=PostCounter.GLOBAL).delete()
+        page = self.get_page(5).context['page_obj']
+        self.assertEqual(page.page_window, [1, '…', 3, 4, 5, 6])
+        self.assertIsNone(page.paginator.estimated_count)
+
+    def test_window_with_counter_estimate(self):
+        call_command('rebuild_post_counters', stdout=StringIO())
+        response = self.get_page(4)
+        page = response.context['page_obj']
+        self.assertEqual(page.page_window, [1, 2, 3, 4, 5, 6, '…', 8])
+        self.assertContains(
+            response,
+            f'Всего: {PostCounter.get_value(PostCounter.GLOBAL)}')
+
+    def test_last_page_is_found_by_lookahead(self):
+        response = self.get_page(8)
+        page = response.context['page_obj']
+        self.assertEqual(response.context['object_list'].count(), 3)
+        self.assertFalse(page.has_next())
+        self.assertEqual(page.end_index(), COUNT_PAGINATOR_PAGE * 7 + 3)
+        self.assertEqual(self.get_page(9).status_code, HTTPStatus.NOT_FOUND)
+
+
+class QueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.users = [
+            User.objects.create_user(username=f'budget_user_{i}')
+            for i in range(3)
+        ]
+        cls.groups = [
+            Group.objects.create(
+                slug=f'budget_slug_{i}',
+                title=f'Группа бюджета {i}',
+                description='Описание',
+            ) for i in range(3)
+        ]
+        Post.objects.bulk_create(
+            Post(
+                text=f'Пост {i}',
+                author=cls.users[i % 3],
+                group=cls.groups[i % 3]
+            ) for i in range(COUNT_PAGINATOR_PAGE * 2)
+        )
+        # bulk_create обходит сигналы — счётчики пересчитываем явно
+        call_command('rebuild_post_counters', stdout=StringIO())
+        cls.post = Post.objects.filter(author=cls.users[0]).first()
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.users[0])
+
+    def test_views_fit_query_budget(self):
+        """Представления укладываются в max_queries без N+1."""
+        urls = (
+            reverse('posts:main'),
+            reverse('posts:group_directory'),
+            reverse(
+                'posts:group_list', kwargs={'slug': self.groups[0].slug}),
+            reverse('posts:profile', kwargs={'username': self.users[0]}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
+            reverse('posts:post_create'),
+            reverse('posts:post_edit', kwargs={'post_id': self.post.id}),
+            reverse(
+                'posts:profile_export', kwargs={'username': self.users[0]}),
+            reverse(
+                'posts:group_export', kwargs={'slug': self.groups[0].slug}),
+        )
+        for url in urls:
+            for client in (self.guest_client, self.authorized_client):
+                with self.subTest(url=url, client=client):
+                    self.assertWithinQueryBudget(client, url)
+
+
+class PostCardCacheTests(TestCase):
+    card_template = 'posts/includes/post_card.html'
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='card_user')
+        cls.group = Group.objects.create(
+            slug='card_slug',
+            title='Группа карточек',
+            description='Описание',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.post = Post.objects.create(
+            text='Текст карточки', author=self.user, group=self.group)
+
+    def get_index(self):
+        return self.guest_client.get(reverse('posts:main'))
+
+    def test_cards_are_rendered_once(self):
+        self.assertTemplateUsed(self.get_index(), self.card_template)
+        response = self.get_index()
+        self.assertTemplateNotUsed(response, self.card_template)
+        self.assertContains(response, 'Текст карточки')
+
+    def test_card_is_rerendered_after_changes(self):
+        changes = (
+            ('post', self.post, 'text', 'Новый текст карточки'),
+            ('author', self.user, 'first_name', 'Станислав'),
+            ('group', self.group, 'slug', 'new_card_slug'),
+        )
+        for name, obj, field, value in changes:
+            with self.subTest(name=name):
+                self.get_index()
+                setattr(obj, field, value)
+                obj.save()
+                response = self.get_index()
+                self.assertTemplateUsed(response, self.card_template)
+                self.assertContains(response, value)
+
+    def test_login_does_not_invalidate_cards(self):
+        self.get_index()
+        self.guest_client.force_login(self.user)
+        self.assertTemplateNotUsed(self.get_index(), self.card_template)
+
+
+class PostExportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='export_user')
+        cls.group = Group.objects.create(
+            slug='export_slug',
+            title='Группа выгрузки',
+            description='Описание',
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f'Выгрузка {i}', author=cls.user, group=cls.group)
+            for i in range(3)
+        ]
+        cls.profile_url = reverse(
+            'posts:profile_export', kwargs={'username': cls.user.username})
+        cls.group_url = reverse(
+            'posts:group_export', kwargs={'slug': cls.group.slug})
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def read(self, response):
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_profile_export_jsonl(self):
+        response = self.guest_client.get(self.profile_url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        rows = [json.loads(line) for line in self.read(response).split('\n')
+                if line]
+        self.assertEqual(
+            [row['text'] for row in rows],
+            [post.text for post in self.posts])
+        self.assertEqual(rows[0]['group'], self.group.slug)
+
+    def test_group_export_csv(self):
+        lines = self.read(self.guest_client.get(self.group_url)).splitlines()
+        self.assertEqual(lines[0], 'id,text,pub_date,author,group')
+        self.assertEqual(len(lines), len(self.posts) + 1)
+        self.assertIn('Выгрузка 0', lines[1])
+
+    def test_conditional_get(self):
+        """Неизменённая выгрузка отвечает 304, правка меняет ETag."""
+        for url in (self.profile_url, self.group_url):
+            with self.subTest(url=url):
+                etag = self.guest_client.get(url)['ETag']
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(
+                    response.status_code, HTTPStatus.NOT_MODIFIED)
+                post = Post.objects.get(pk=self.posts[0].pk)
+                post.text = f'Правка {url}'
+                post.save()
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_does_not_aggregate_posts(self):
+        """ETag берётся из счётчика, а не из подсчёта постов."""
+        self.guest_client.get(self.profile_url)
+        with CaptureQueriesContext(connection) as context:
+            etag = self.guest_client.get(self.profile_url)['ETag']
+        self.assertFalse([
+            query['sql'] for query in context.captured_queries
+            if 'posts_post"' in query['sql']
+        ])
+        self.user.first_name = 'Переименован'
+        self.user.save()
+        self.assertNotEqual(
+            self.guest_client.get(self.profile_url)['ETag'], etag)
+
+    def test_unknown_author_or_group(self):
+        urls = (
+            reverse('posts:profile_export', kwargs={'username': 'nobody'}),
+            reverse('posts:group_export', kwargs={'slug': 'nothing'}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(
+                    self.guest_client.get(url).status_code,
+                    HTTPStatus.NOT_FOUND)
@@ -0,0 +1,55 @@
+"""
+Миниатюры картинок постов.
+
+Размеры миниатюры вычисляются из размеров оригинала, поэтому шаблон знает
+width и height ещё до того, как миниатюра готова. ``render`` выполняется
+в отдельном процессе и работает только с путями к файлам.
+"""
+import os
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from PIL import Image
+
+Thumbnail = namedtuple('Thumbnail', 'url width height')
+
+JPEG_QUALITY = 85
+
+
+def fit(width, height, box):
+    """Размеры картинки, вписанной в ``box`` без увеличения."""
+    box_width, box_height = box
+    scale = min(box_width / width, box_height / height, 1)
+    return max(round(width * scale), 1), max(round(height * scale), 1)
+
+
+def thumbnail_name(image_name, size):
+    stem, _ = os.path.splitext(image_name)
+    return f'thumbs/{size}/{stem}.jpg'
+
+
+def get_thumbnail(post, size):
+    """Готовая миниатюра или, пока её нет, оригинал с теми же размерами."""
+    if not post.image:
+        return None
+    width, height = fit(
+        post.image_width, post.image_height,
+        settings.POST_THUMBNAIL_SIZES[size])
+    if post.thumbnails_ready:
+        url = default_storage.url(thumbnail_name(post.image.name, size))
+    else:
+        url = post.image.url
+    return Thumbnail(url, width, height)
+
+
+def render(media_root, image_name, sizes):
+    """Пишет миниатюры всех размеров; вызывается в пуле процессов."""
+    with Image.open(os.path.join(media_root, image_name)) as image:
+        image = image.convert('RGB')
+        for size, box in sizes.items():
+            path = os.path.join(media_root, thumbnail_name(image_name, size))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            resized = image.resize(fit(*image.size, box), Image.LANCZOS)
+            resized.save(path, 'JPEG', quality=JPEG_QUALITY, optimize=True)
+    return image_name
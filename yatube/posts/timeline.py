@@ -0,0 +1,95 @@
+"""
+Лента подписок: fan-out при записи с чтением «знаменитостей» при чтении.
+
+Новый пост раскладывается пачками в ``TimelineEntry`` каждого подписчика:
+сразу, если подписчиков не больше ``TIMELINE_FANOUT_INLINE``, иначе после
+коммита в фоновом потоке (``core.pool.defer``). Если подписчиков у автора
+больше ``TIMELINE_FANOUT_LIMIT``, автор навсегда помечается ``PullAuthor``:
+его посты не раскладываются, а подмешиваются при чтении ленты (см.
+``MergedCursorPaginator``).
+"""
+from functools import partial
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+
+from core import pool
+
+from .models import Follow, Post, PullAuthor, TimelineEntry
+
+
+def is_pull_author(author_id):
+    return PullAuthor.objects.filter(author_id=author_id).exists()
+
+
+def entries(posts, user_ids):
+    for user_id in user_ids:
+        for post in posts:
+            yield TimelineEntry(
+                user_id=user_id, post_id=post.pk,
+                author_id=post.author_id, pub_date=post.pub_date)
+
+
+def bulk_insert(objects):
+    batch_size = settings.TIMELINE_FANOUT_BATCH
+    objects = iter(objects)
+    while True:
+        batch = list(islice(objects, batch_size))
+        if not batch:
+            return
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def fan_out(posts):
+    """Раскладывает посты одного автора по лентам подписчиков."""
+    author_id = posts[0].author_id
+    if is_pull_author(author_id):
+        return
+    count = Follow.objects.filter(author_id=author_id).count()
+    if count > settings.TIMELINE_FANOUT_LIMIT:
+        PullAuthor.objects.get_or_create(author_id=author_id)
+    elif count > settings.TIMELINE_FANOUT_INLINE:
+        transaction.on_commit(partial(defer_fan_out, author_id, posts))
+    elif count:
+        insert_entries(author_id, posts)
+
+
+def defer_fan_out(author_id, posts):
+    # Очередь полна: раскладываем сразу, чтобы пост не пропал из лент
+    if not pool.defer(insert_entries, (author_id, posts)):
+        insert_entries(author_id, posts)
+
+
+def insert_entries(author_id, posts):
+    user_ids = (
+        Follow.objects.filter(author_id=author_id)
+        .values_list('user_id', flat=True)
+        .iterator(chunk_size=settings.TIMELINE_FANOUT_BATCH))
+    bulk_insert(entries(posts, user_ids))
+
+
+def follow(user, author):
+    """Подписывает и досыпает в ленту последние посты автора."""
+    if user == author:
+        return False
+    _, created = Follow.objects.get_or_create(user=user, author=author)
+    if created and not is_pull_author(author.pk):
+        recent = (
+            Post.objects.filter(author=author)
+            .only('pk', 'author_id', 'pub_date')
+            [:settings.TIMELINE_BACKFILL])
+        bulk_insert(entries(list(recent), [user.pk]))
+    return created
+
+
+def unfollow(user, author):
+    Follow.objects.filter(user=user, author=author).delete()
+    TimelineEntry.objects.filter(user=user, author=author).delete()
+
+
+def pull_author_ids(user):
+    """Авторы из подписок пользователя, которых читают при чтении."""
+    return list(
+        PullAuthor.objects.filter(author__following__user=user)
+        .values_list('author_id', flat=True))
@@ -1,18 +1,47 @@
 # posts/urls.py
 from django.urls import path
 
-from .views import (GroupPostView, IndexView, PostCreate, PostDelete,
-                    PostDetailView, PostEdit, ProfileDetailView)
+from .views import (FollowIndexView, GroupAutocompleteView,
+                    GroupDirectoryView, GroupExportView, GroupPostView,
+                    IndexView, PostCreate, PostDelete, PostDetailView,
+                    PostEdit, ProfileDetailView, ProfileExportView,
+                    ProfileFollowView, ProfileUnfollowView)
 
 app_name = 'posts'
 
 urlpatterns = [
     path('', IndexView.as_view(), name='main'),
+    path('groups/', GroupDirectoryView.as_view(), name='group_directory'),
+    path(
+        'groups/popular/',
+        GroupDirectoryView.as_view(by_posts=True),
+        name='group_directory_popular'),
+    path(
+        'groups/autocomplete/',
+        GroupAutocompleteView.as_view(),
+        name='group_autocomplete'),
     path('group/<slug:slug>/', GroupPostView.as_view(), name='group_list'),
+    path(
+        'group/<slug:slug>/export.csv',
+        GroupExportView.as_view(),
+        name='group_export'),
     path(
         'profile/<str:username>/',
         ProfileDetailView.as_view(),
         name='profile'),
+    path(
+        'profile/<str:username>/export.jsonl',
+        ProfileExportView.as_view(),
+        name='profile_export'),
+    path(
+        'profile/<str:username>/follow/',
+        ProfileFollowView.as_view(),
+        name='profile_follow'),
+    path(
+        'profile/<str:username>/unfollow/',
+        ProfileUnfollowView.as_view(),
+        name='profile_unfollow'),
+    path('follow/', FollowIndexView.as_view(), name='follow_index'),
     path('posts/<int:post_id>/', PostDetailView.as_view(), name='post_detail'),
     path('create/', PostCreate.as_view(), name='post_create'),
     path('posts/<int:post_id>/edit/', PostEdit.as_view(), name='post_edit'),
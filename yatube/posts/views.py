@@ -1,67 +1,207 @@
+import hashlib
+
 from django.contrib.auth import get_user_model
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.shortcuts import get_object_or_404
+from django.core.paginator import InvalidPage
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse
-from django.views.generic import ListView
+from django.utils.functional import cached_property
+from django.views.decorators.http import condition
+from django.views.generic import ListView, View
 from django.views.generic.detail import DetailView
 from django.views.generic.edit import CreateView, DeleteView, UpdateView
 from yatube.settings import COUNT_PAGINATOR_PAGE
 
+from core.mixins import CountedPaginationMixin, CursorPaginationMixin
+from core.paginators import MergedCursorPaginator
+from core.pagecache import PageCacheMixin
+
+from . import bulk, groups, timeline
 from .forms import PostForm
-from .models import Group, Post
+from .models import Group, GroupStats, Post, PostCounter, TimelineEntry
 
 User = get_user_model()
 
 
-class IndexView(ListView):
+class IndexView(
+        PageCacheMixin, CursorPaginationMixin, CountedPaginationMixin,
+        ListView):
     model = Post
+    queryset = Post.objects.select_related('author', 'group')
     template_name = 'posts/index.html'
     paginate_by = COUNT_PAGINATOR_PAGE
+    max_queries = 4
+    use_replica = True
+
+    def get_total_count(self):
+        return PostCounter.get_estimate(PostCounter.GLOBAL)
+
+    def get_page_cache_tags(self):
+        return ['index']
 
 
-class GroupPostView(ListView):
+class GroupPostView(
+        PageCacheMixin, CursorPaginationMixin, CountedPaginationMixin,
+        ListView):
     model = Post
     template_name = 'posts/group_list.html'
     paginate_by = COUNT_PAGINATOR_PAGE
+    max_queries = 5
+    use_replica = True
 
     def get_queryset(self):
-        return get_object_or_404(Group, slug=self.kwargs['slug']).posts.all()
+        self.group = get_object_or_404(
+            Group.objects.select_related('stats'), slug=self.kwargs['slug'])
+        return self.group.posts.select_related('author', 'group')
 
+    def get_total_count(self):
+        try:
+            return self.group.stats.posts_count
+        except GroupStats.DoesNotExist:
+            return None
+
+    def get_page_cache_tags(self):
+        return [f'group:{self.group.pk}']
+
+
+class GroupDirectoryView(CountedPaginationMixin, ListView):
+    """
+    Каталог групп по материализованной статистике: свежие или самые
+    большие группы листаются по индексу без агрегации постов.
+    """
+    queryset = GroupStats.objects.select_related('group', 'last_author')
+    template_name = 'posts/group_directory.html'
+    paginate_by = COUNT_PAGINATOR_PAGE
+    max_queries = 4
+    use_replica = True
+    by_posts = False
 
-class ProfileDetailView(ListView):
+    def get_ordering(self):
+        if self.by_posts:
+            return ('-posts_count', '-group')
+        return ('-last_post_at', '-group')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['by_posts'] = self.by_posts
+        return context
+
+
+class ProfileDetailView(
+        PageCacheMixin, CursorPaginationMixin, CountedPaginationMixin,
+        ListView):
     model = Post
     paginate_by = COUNT_PAGINATOR_PAGE
     template_name = 'posts/profile.html'
+    max_queries = 5
+    use_replica = True
 
     def get_queryset(self):
+        self.author = get_object_or_404(
+            User, username=self.kwargs['username'])
         return (
-            Post.objects.select_related('author')
-            .filter(author__username=self.kwargs['username'])
-            .order_by('author'))
+            Post.objects.select_related('author', 'group')
+            .filter(author=self.author))
+
+    @cached_property
+    def posts_count(self):
+        return PostCounter.get_value(PostCounter.AUTHOR, self.author.pk)
+
+    def get_total_count(self):
+        return self.posts_count
+
+    def get_page_cache_tags(self):
+        return [f'author:{self.author.pk}']
 
     def get_context_data(self, *, object_list=None, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["author"] = get_object_or_404(
-            User, username=self.kwargs['username'])
+        context["author"] = self.author
+        context["posts_count"] = self.posts_count
         return context
 
 
-class PostDetailView(DetailView):
+class FollowIndexView(LoginRequiredMixin, ListView):
+    """
+    Лента подписок: материализованная лента пользователя плюс посты
+    авторов, которые читаются при чтении. Листается только по курсору.
+    """
     model = Post
+    template_name = 'posts/follow.html'
+    paginate_by = COUNT_PAGINATOR_PAGE
+    cursor_kwarg = 'cursor'
+    # Плюс запрос на каждого читаемого при чтении автора сверх первого
+    max_queries = 6
+
+    def paginate_queryset(self, queryset, page_size):
+        user = self.request.user
+        sources = [(
+            TimelineEntry.objects.filter(user=user), ('pub_date', 'post_id')
+        )]
+        # По источнику на автора: с author_id IN (...) СУБД сортировала бы
+        # все посты этих авторов, а так каждый запрос идёт по индексу
+        sources.extend(
+            (Post.objects.filter(author_id=author_id), ('pub_date', 'id'))
+            for author_id in timeline.pull_author_ids(user))
+        paginator = MergedCursorPaginator(
+            queryset.select_related('author', 'group'), page_size, sources)
+        try:
+            page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        except InvalidPage as e:
+            raise Http404(str(e))
+        return paginator, page, page.object_list, page.has_other_pages()
+
+
+class ProfileFollowView(LoginRequiredMixin, View):
+    http_method_names = ['post']
+
+    def post(self, request, username):
+        author = get_object_or_404(User, username=username)
+        timeline.follow(request.user, author)
+        return redirect('posts:profile', username=username)
+
+
+class ProfileUnfollowView(LoginRequiredMixin, View):
+    http_method_names = ['post']
+
+    def post(self, request, username):
+        author = get_object_or_404(User, username=username)
+        timeline.unfollow(request.user, author)
+        return redirect('posts:profile', username=username)
+
+
+class PostDetailView(PageCacheMixin, DetailView):
+    model = Post
+    queryset = Post.objects.select_related('author', 'group')
     template_name = 'posts/post_detail.html'
     pk_url_kwarg = 'post_id'
     context_object_name = 'post'
+    max_queries = 4
+    use_replica = True
 
     def get_context_data(self, *, object_list=None, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["posts_count"] = Post.objects.filter(
-            author=context["post"].author).count()
+        context["posts_count"] = PostCounter.get_value(
+            PostCounter.AUTHOR, context["post"].author_id)
         return context
 
+    def get_page_cache_tags(self):
+        return [f'post:{self.object.pk}', f'author:{self.object.author_id}']
+
 
-class PostCreate(LoginRequiredMixin, CreateView):
+class PostFormMixin:
+    """Передаёт форме ошибки файлов, отброшенных при загрузке."""
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['upload_errors'] = getattr(self.request, 'upload_errors', {})
+        return kwargs
+
+
+class PostCreate(LoginRequiredMixin, PostFormMixin, CreateView):
     form_class = PostForm
     template_name = 'posts/create_post.html'
+    max_queries = 3
 
     def form_valid(self, form):
         self.object = form.save(commit=False)
@@ -75,11 +215,12 @@ class PostCreate(LoginRequiredMixin, CreateView):
         return context
 
 
-class PostEdit(LoginRequiredMixin, UpdateView):
+class PostEdit(LoginRequiredMixin, PostFormMixin, UpdateView):
     model = Post
     form_class = PostForm
     pk_url_kwarg = 'post_id'
     template_name = 'posts/create_post.html'
+    max_queries = 4
 
     def get_success_url(self):
         return reverse('posts:post_detail', args=[self.kwargs['post_id']])
@@ -92,10 +233,106 @@ class PostEdit(LoginRequiredMixin, UpdateView):
 
 class PostDelete(LoginRequiredMixin, DeleteView):
     model = Post
+    queryset = Post.objects.select_related('author')
     pk_url_kwarg = 'post_id'
 
     def get_success_url(self):
-        username = (
-            get_object_or_404(Post, pk=self.kwargs['post_id'])
-            .author.username)
-        return reverse('posts:profile', args=[username])
+        return reverse('posts:profile', args=[self.object.author.username])
+
+
+class GroupAutocompleteView(LoginRequiredMixin, View):
+    """Группы для поля выбора группы по началу названия."""
+
+    max_queries = 3
+    use_replica = True
+
+    def get(self, request):
+        results = [
+            {'id': pk, 'title': title}
+            for pk, title in groups.search(request.GET.get('q', ''))
+        ]
+        response = JsonResponse({'results': results})
+        response['Cache-Control'] = 'private, max-age=60'
+        return response
+
+
+class PostExportView(View):
+    """
+    Потоковая выгрузка постов: строки читаются итератором по мере отдачи,
+    поэтому память и время до первого байта не зависят от числа постов.
+    ETag строится по счётчику постов области: числу постов и времени
+    последнего изменения, которое сдвигают сигналы.
+    """
+    file_format = None
+    content_type = None
+    counter_scope = None
+    # Бюджет покрывает только запросы до начала отдачи: строки выгрузки
+    # читаются уже после выхода из представления и в него не входят
+    max_queries = 2
+
+    def get_queryset(self):
+        raise NotImplementedError
+
+    def get_counter_id(self):
+        raise NotImplementedError
+
+    def get_filename(self):
+        raise NotImplementedError
+
+    def get_etag(self):
+        counter = PostCounter.get_counter(
+            self.counter_scope, self.get_counter_id())
+        key = (
+            f'{self.file_format}:{counter.value}:'
+            f'{counter.changed_at.isoformat()}')
+        return hashlib.md5(key.encode()).hexdigest()
+
+    def get(self, request, *args, **kwargs):
+        queryset = self.get_queryset()
+        etag = self.get_etag()
+
+        @condition(etag_func=lambda request: etag)
+        def stream(request):
+            lines = bulk.SERIALIZERS[self.file_format](
+                bulk.iter_rows(queryset.order_by('pub_date', 'pk')))
+            response = StreamingHttpResponse(
+                (line.encode() for line in lines),
+                content_type=self.content_type)
+            response['Content-Disposition'] = (
+                f'attachment; filename="{self.get_filename()}"')
+            return response
+
+        return stream(request)
+
+
+class ProfileExportView(PostExportView):
+    file_format = 'jsonl'
+    content_type = 'application/x-ndjson; charset=utf-8'
+    counter_scope = PostCounter.AUTHOR
+
+    def get_queryset(self):
+        self.author = get_object_or_404(
+            User, username=self.kwargs['username'])
+        return Post.objects.filter(author=self.author)
+
+    def get_counter_id(self):
+        return self.author.pk
+
+    def get_filename(self):
+        return f'{self.author.username}.jsonl'
+
+
+class GroupExportView(PostExportView):
+    file_format = 'csv'
+    content_type = 'text/csv; charset=utf-8'
+    counter_scope = PostCounter.GROUP
+
+    def get_queryset(self):
+        self.group = get_object_or_404(Group, slug=self.kwargs['slug'])
+        return Post.objects.filter(group=self.group)
+
+    def get_counter_id(self):
+        return self.group.pk
+
+    def get_filename(self):
+        return f'{self.group.slug}.csv'
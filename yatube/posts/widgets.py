@@ -0,0 +1,46 @@
+from django.forms import Select
+from django.urls import reverse_lazy
+from django.utils.html import format_html
+
+from . import groups
+
+
+class GroupSelect(Select):
+    """
+    Список групп без всех групп: пустой вариант, популярные группы из
+    кэша и выбранная группа. Остальные подгружает поле поиска через
+    ``posts:group_autocomplete`` (см. static/js/script.js).
+    """
+
+    autocomplete_url = reverse_lazy('posts:group_autocomplete')
+
+    def limited_choices(self, value):
+        field = self.choices.field
+        choices = []
+        if field.empty_label is not None:
+            choices.append(('', field.empty_label))
+        popular = groups.popular()
+        choices.extend(popular)
+        known = {str(pk) for pk, _ in popular}
+        selected = [pk for pk in value if pk.isdigit() and pk not in known]
+        if selected:
+            choices.extend(
+                field.queryset.filter(pk__in=selected)
+                .values_list('pk', 'title'))
+        return choices
+
+    def optgroups(self, name, value, attrs=None):
+        choices, self.choices = self.choices, self.limited_choices(value)
+        try:
+            return super().optgroups(name, value, attrs)
+        finally:
+            self.choices = choices
+
+    def render(self, name, value, attrs=None, renderer=None):
+        select = super().render(name, value, attrs, renderer)
+        search = format_html(
+            '<input type="search" class="form-control mb-2 group-search" '
+            'data-url="{}" data-target="{}" placeholder="Найти группу" '
+            'autocomplete="off">',
+            self.autocomplete_url, (attrs or {}).get('id', ''))
+        return search + select
@@ -0,0 +1,102 @@
+"""
+Кэш результатов поиска «на лету».
+
+Запрос при наборе растёт по букве: «d», «dj», «dja»... Результаты
+хранятся в кэше ``search`` (LRU + TTL задаются в ``CACHES``) по
+нормализованному запросу. Если запрос продолжает уже закэшированный
+префикс, чей набор кандидатов полон, новые результаты отфильтровываются
+из кандидатов префикса без обращения к базе; порядок при этом остаётся
+порядком релевантности префикса.
+
+Сброс идёт через общий ключ ``GENERATION_KEY`` в том же кэше. С
+LocMemCache он виден только своему процессу: в других результаты
+устаревают до истечения TTL, поэтому при нескольких процессах кэшу
+``search`` нужен общий бэкенд (memcached, redis).
+"""
+import hashlib
+import uuid
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import caches
+
+from . import index
+
+GENERATION_KEY = 'search:generation'
+
+SearchResult = namedtuple('SearchResult', 'id text')
+
+
+def get_cache():
+    return caches['search']
+
+
+def generation():
+    cache = get_cache()
+    value = cache.get(GENERATION_KEY)
+    if value is None:
+        value = uuid.uuid4().hex
+        if not cache.add(GENERATION_KEY, value, None):
+            value = cache.get(GENERATION_KEY, value)
+    return value
+
+
+def invalidate():
+    """Делает недоступными все закэшированные результаты."""
+    get_cache().set(GENERATION_KEY, uuid.uuid4().hex, None)
+
+
+def make_key(generation, normalized):
+    digest = hashlib.md5(normalized.encode()).hexdigest()
+    return f'search:{generation}:{digest}'
+
+
+def matches(tokens, text):
+    """Повторяет семантику MATCH из ``index.build_match`` на Python."""
+    words = set(index.tokenize(text))
+    *whole, prefix = tokens
+    return (
+        all(token in words for token in whole)
+        and any(word.startswith(prefix) for word in words)
+    )
+
+
+def narrow(cache, current, normalized, tokens):
+    """Ищет самый длинный полный префикс и фильтрует его кандидатов."""
+    keys = {
+        make_key(current, normalized[:end]): end
+        for end in range(1, len(normalized))
+    }
+    found = cache.get_many(list(keys))
+    for key in sorted(found, key=keys.get, reverse=True):
+        entry = found[key]
+        if entry['complete']:
+            rows = [row for row in entry['rows'] if matches(tokens, row[1])]
+            return {'rows': rows, 'hits': len(rows), 'complete': True}
+    return None
+
+
+def search(query):
+    """Возвращает ``(results, hits)`` с учётом кэша."""
+    tokens = index.tokenize(query)
+    if not tokens:
+        return [], 0
+    normalized = ' '.join(tokens)
+    cache = get_cache()
+    current = generation()
+    key = make_key(current, normalized)
+    entry = cache.get(key)
+    if entry is None:
+        if index.is_available():
+            entry = narrow(cache, current, normalized, tokens)
+        if entry is None:
+            limit = settings.SEARCH_CANDIDATES_LIMIT
+            rows, hits = index.candidates(query, limit)
+            entry = {
+                'rows': rows, 'hits': hits, 'complete': len(rows) < limit}
+        cache.set(key, entry)
+    results = [
+        SearchResult(*row)
+        for row in entry['rows'][:settings.SEARCH_RESULTS_LIMIT]
+    ]
+    return results, entry['hits']
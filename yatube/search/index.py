@@ -0,0 +1,183 @@
+"""Полнотекстовый индекс постов на SQLite FTS5."""
+import sqlite3
+import threading
+import unicodedata
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection
+
+from posts.models import Post
+
+TABLE = 'search_postindex'
+
+TOKENIZER = "'unicode61 remove_diacritics 2'"
+
+CREATE_SQL = (
+    f'CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5('
+    f'text, tokenize = {TOKENIZER})'
+)
+DROP_SQL = f'DROP TABLE IF EXISTS {TABLE}'
+
+
+def is_available(using=connection):
+    return using.vendor == 'sqlite'
+
+
+_probe = None
+_probe_lock = threading.Lock()
+
+
+def probe_terms(text):
+    """Слова ``text`` по версии токенайзера SQLite, через базу в памяти."""
+    global _probe
+    with _probe_lock:
+        if _probe is None:
+            probe = sqlite3.connect(':memory:', check_same_thread=False)
+            probe.execute(
+                f'CREATE VIRTUAL TABLE probe USING fts5('
+                f'text, tokenize = {TOKENIZER})')
+            probe.execute(
+                'CREATE VIRTUAL TABLE probe_terms '
+                'USING fts5vocab(probe, instance)')
+            _probe = probe
+        _probe.execute('DELETE FROM probe')
+        _probe.execute('INSERT INTO probe (text) VALUES (?)', [text])
+        return [row[0] for row in _probe.execute(
+            'SELECT term FROM probe_terms ORDER BY offset')]
+
+
+@lru_cache(maxsize=65536)
+def fold(char):
+    """
+    Символ так, как его хранит токенайзер: в нижнем регистре и без
+    снятой им диакритики; пустая строка — символ выбрасывается,
+    None — разделитель слов. Таблицы unicode61 не совпадают с
+    категориями Unicode в Python (café → cafe, но ß остаётся, «_» делит
+    слова), поэтому каждый символ один раз спрашиваем у самого SQLite.
+    """
+    try:
+        terms = probe_terms(f'x{char}x')
+    except sqlite3.Error:
+        # SQLite без FTS5: буквы и цифры — часть слова, прочее — нет
+        category = unicodedata.category(char)
+        if category[0] in 'LN' or category == 'Co':
+            return char.lower()
+        return None
+    if len(terms) != 1:
+        return None
+    return terms[0][1:-1]
+
+
+def tokenize(query):
+    """Разбивает запрос на слова так же, как токенайзер unicode61."""
+    tokens = []
+    word = []
+    for char in query:
+        folded = fold(char)
+        if folded is not None:
+            word.append(folded)
+        elif word:
+            tokens.append(''.join(word))
+            word = []
+    if word:
+        tokens.append(''.join(word))
+    return [token for token in tokens if token]
+
+
+def build_match(query):
+    """
+    Собирает выражение MATCH: все слова обязательны,
+    последнее ищется по префиксу — пользователь ещё печатает.
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def index_post(post):
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [post.pk])
+        cursor.execute(
+            f'INSERT INTO {TABLE} (rowid, text) VALUES (%s, %s)',
+            [post.pk, post.text])
+
+
+def index_posts(posts):
+    if not is_available():
+        return
+    rows = [(post.pk, post.text) for post in posts]
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM {TABLE} WHERE rowid = %s', [row[:1] for row in rows])
+        cursor.executemany(
+            f'INSERT INTO {TABLE} (rowid, text) VALUES (%s, %s)', rows)
+
+
+def remove_post(post_id):
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [post_id])
+
+
+def rebuild():
+    """Перестраивает индекс целиком, возвращает число проиндексированных."""
+    with connection.cursor() as cursor:
+        cursor.execute(DROP_SQL)
+        cursor.execute(CREATE_SQL)
+        cursor.execute(
+            f'INSERT INTO {TABLE} (rowid, text) '
+            f'SELECT id, text FROM {Post._meta.db_table}')
+        cursor.execute(f'SELECT count(*) FROM {TABLE}')
+        return cursor.fetchone()[0]
+
+
+def filter_posts(queryset, query):
+    """
+    Сужает выборку постов до подходящих под ``query`` подзапросом к
+    индексу. RawSQL в ``pk__in`` не годится: Django берёт его в лишние
+    скобки, и SQLite сравнивает id только с первой строкой подзапроса.
+    """
+    match = build_match(query)
+    if match is None:
+        return queryset.none()
+    return queryset.extra(
+        where=[
+            f'{Post._meta.db_table}.id IN '
+            f'(SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s)'],
+        params=[match])
+
+
+def candidates(query, limit):
+    """
+    Возвращает ``(rows, hits)``: до ``limit`` пар ``(id, text)`` по
+    убыванию релевантности и оценку числа совпадений, ограниченную
+    сверху ``SEARCH_HITS_CAP`` — точное число дальше никому не нужно.
+    """
+    cap = settings.SEARCH_HITS_CAP
+    match = build_match(query)
+    if match is None:
+        return [], 0
+    if not is_available():
+        queryset = Post.objects.filter(text__icontains=query.strip())
+        rows = list(queryset.values_list('id', 'text')[:limit])
+        return rows, queryset[:cap].count()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT rowid, text FROM {TABLE} WHERE {TABLE} MATCH %s '
+            'ORDER BY rank LIMIT %s', [match, limit])
+        rows = cursor.fetchall()
+        if len(rows) < limit:
+            hits = min(len(rows), cap)
+        else:
+            cursor.execute(
+                f'SELECT count(*) FROM (SELECT 1 FROM {TABLE} '
+                f'WHERE {TABLE} MATCH %s LIMIT %s)', [match, cap])
+            hits = cursor.fetchone()[0]
+    return rows, hits
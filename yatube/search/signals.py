@@ -0,0 +1,25 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from posts.models import Post
+from posts.signals import posts_bulk_created
+
+from . import cache, index
+
+
+@receiver(post_save, sender=Post)
+def index_saved_post(sender, instance, **kwargs):
+    index.index_post(instance)
+    cache.invalidate()
+
+
+@receiver(post_delete, sender=Post)
+def unindex_deleted_post(sender, instance, **kwargs):
+    index.remove_post(instance.pk)
+    cache.invalidate()
+
+
+@receiver(posts_bulk_created, sender=Post)
+def index_created_posts(sender, posts, **kwargs):
+    index.index_posts(posts)
+    cache.invalidate()
@@ -0,0 +1,104 @@
+# search/tests.py
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+from . import cache, index
+
+User = get_user_model()
+
+
+class SearchIndexTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='search_user')
+        cls.post = Post.objects.create(
+            text='Учим ДЖАНГО вместе', author=cls.user)
+        cls.python_post = Post.objects.create(
+            text='Пост про Python', author=cls.user)
+
+    def setUp(self):
+        self.guest_client = Client()
+        cache.invalidate()
+
+    def found_ids(self, query):
+        posts, _ = cache.search(query)
+        return [post.id for post in posts]
+
+    def test_build_match_uses_prefix_for_last_word(self):
+        self.assertEqual(index.build_match('Учим дж'), '"учим" "дж"*')
+        self.assertIsNone(index.build_match('  !? '))
+
+    def test_search_folds_cyrillic_case_and_prefix(self):
+        for query in ('джанго', 'Джан', 'учим дж'):
+            with self.subTest(query=query):
+                self.assertEqual(self.found_ids(query), [self.post.id])
+
+    def test_index_follows_edit_and_delete(self):
+        post = Post.objects.get(id=self.post.id)
+        post.text = 'Совсем другой текст'
+        post.save()
+        self.assertEqual(self.found_ids('джанго'), [])
+        self.assertEqual(self.found_ids('другой'), [post.id])
+        post.delete()
+        self.assertEqual(self.found_ids('другой'), [])
+
+    @override_settings(
+        SEARCH_RESULTS_LIMIT=2, SEARCH_CANDIDATES_LIMIT=4, SEARCH_HITS_CAP=3)
+    def test_results_are_limited_and_hits_capped(self):
+        for i in range(5):
+            Post.objects.create(text=f'Повтор {i}', author=self.user)
+        posts, hits = cache.search('повтор')
+        self.assertEqual(len(posts), 2)
+        self.assertEqual(hits, 3)
+
+    def test_longer_query_narrows_cached_prefix(self):
+        self.assertEqual(self.found_ids('пос'), [self.python_post.id])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.found_ids('пост п'), [self.python_post.id])
+            self.assertEqual(self.found_ids('пост j'), [])
+
+    def test_tokenize_splits_like_index(self):
+        text = 'foo_bar Café Straße x²y'
+        self.assertEqual(
+            index.tokenize(text), ['foo', 'bar', 'cafe', 'straße', 'x²y'])
+        self.assertTrue(cache.matches(['bar'], 'foo_bar baz'))
+        self.assertTrue(cache.matches(['caf'], 'Café'))
+
+    def test_narrowed_results_match_uncached_query(self):
+        for text in ('foo_bar baz', 'Кафе café', 'bar_baz', 'barista'):
+            Post.objects.create(text=text, author=self.user)
+        for prefix, query in (('ba', 'bar'), ('ca', 'cafe'), ('b', 'baz')):
+            with self.subTest(query=query):
+                cache.invalidate()
+                self.found_ids(prefix)
+                with self.assertNumQueries(0):
+                    narrowed = self.found_ids(query)
+                cache.invalidate()
+                uncached = self.found_ids(query)
+                self.assertTrue(narrowed)
+                self.assertEqual(sorted(narrowed), sorted(uncached))
+
+    @override_settings(SEARCH_CANDIDATES_LIMIT=1)
+    def test_incomplete_prefix_is_not_narrowed(self):
+        Post.objects.create(text='Пост второй', author=self.user)
+        self.found_ids('пос')
+        with self.assertNumQueries(2):
+            self.assertEqual(len(self.found_ids('пост')), 1)
+
+    def test_saved_post_invalidates_cache(self):
+        self.assertEqual(self.found_ids('новинка'), [])
+        post = Post.objects.create(text='Новинка', author=self.user)
+        self.assertEqual(self.found_ids('новинка'), [post.id])
+
+    def test_search_view_renders_hits(self):
+        response = self.guest_client.get(
+            reverse('search:search'), {'data': 'python'})
+        result = response.json()['result']
+        self.assertIn('Найдено постов: <b>1</b>', result)
+        self.assertIn(
+            reverse('posts:post_detail', args=[self.python_post.id]),
+            result)
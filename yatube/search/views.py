@@ -1,7 +1,8 @@
+from django.conf import settings
 from django.http import JsonResponse
 from django.template.loader import render_to_string
 
-from posts.models import Post
+from . import cache
 
 
 def search(request):
@@ -12,10 +13,17 @@ def search(request):
     # result = render_to_string('includes/search.html', context=content)
 
     content = {'search_list': ''}
-    data_search = request.GET['data'] or None
+    data_search = request.GET.get('data') or None
 
     if data_search:
-        content = {'search_list': Post.objects.filter(
-            text__icontains=data_search)}
+        search_list, hits = cache.search(data_search)
+        content = {
+            'search_list': search_list,
+            'hits': hits,
+            'hits_capped': hits >= settings.SEARCH_HITS_CAP,
+        }
     result = render_to_string('includes/search.html', context=content)
     return JsonResponse({'result': result})
+
+
+search.max_queries = 2
@@ -4,12 +4,23 @@ $('#myModal').on('shown.bs.modal', function () {
   $('#myInput').trigger('focus')
 })
 
-document.querySelector('.search-input').addEventListener('keyup',async function(event){
+let retryTimer = null
+
+async function search(){
   let elem = document.getElementById('search-drop-block')
   let input_value = document.querySelector('.search-input').value
 
   let response = await fetch('/search/?' + new URLSearchParams({
     data: input_value}))
+  // Слишком частые запросы: повторить последний набранный запрос позже
+  if (response.status === 429) {
+    clearTimeout(retryTimer)
+    let delay = Number(response.headers.get('Retry-After')) || 1
+    retryTimer = setTimeout(search, delay * 1000)
+    if (!response.headers.get('Content-Type').includes('json')) {
+      return
+    }
+  }
   let data = await response.json();
 
   if (!data.result){
@@ -23,9 +34,42 @@ document.querySelector('.search-input').addEventListener('keyup',async function(
     console.log(input_value)
     elem.style.display = "none"
   }
+}
+
+document.querySelector('.search-input').addEventListener('keyup',async function(event){
+  await search()
 event.preventDefault();
 });
 
+// Поиск группы в форме поста: подгружает варианты в список групп
+document.querySelectorAll('.group-search').forEach(function(input){
+  let select = document.getElementById(input.dataset.target)
+  let timer = null
+
+  input.addEventListener('input', function(){
+    clearTimeout(timer)
+    timer = setTimeout(async function(){
+      let response = await fetch(input.dataset.url + '?' + new URLSearchParams({
+        q: input.value}))
+      if (!response.ok) {
+        return
+      }
+      let data = await response.json()
+      // Пустой вариант и выбранная группа остаются в списке
+      Array.from(select.options).forEach(function(option){
+        if (option.value && !option.selected) {
+          option.remove()
+        }
+      })
+      data.results.forEach(function(group){
+        if (String(group.id) !== select.value) {
+          select.add(new Option(group.title, group.id))
+        }
+      })
+    }, 200)
+  })
+})
+
 // implemented on jquery AJAX
 // document.querySelector('.search-input').addEventListener('keyup', function(event){
 //   $.ajax({
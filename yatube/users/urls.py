@@ -4,8 +4,7 @@ from django.contrib.auth.views import (LoginView, LogoutView,
                                        PasswordChangeView,
                                        PasswordResetCompleteView,
                                        PasswordResetConfirmView,
-                                       PasswordResetDoneView,
-                                       PasswordResetView)
+                                       PasswordResetDoneView)
 from django.urls import path
 
 from . import views
@@ -36,7 +35,7 @@ urlpatterns = [
         name='password_change_done',),
     path(
         'password_reset_form/',
-        PasswordResetView.as_view(
+        views.PasswordReset.as_view(
             template_name='users/password_reset_form.html'),
         name='password_reset_form',),
     path(
@@ -1,4 +1,9 @@
+from django.contrib.auth.views import PasswordResetView
+from django.core.mail import send_mail
+from django.db import transaction
+from django.template.loader import render_to_string
 from django.urls import reverse_lazy
+from django.utils.decorators import method_decorator
 from django.views.generic import CreateView
 
 from .forms import CreationForm
@@ -8,3 +13,26 @@ class SignUp(CreateView):
     form_class = CreationForm
     success_url = reverse_lazy('posts:main')
     template_name = 'users/signup.html'
+
+    # Пользователь и письмо в outbox сохраняются вместе или никак
+    @method_decorator(transaction.atomic)
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        user = self.object
+        if user.email:
+            # Письмо уходит в outbox, а не отправляется в запросе
+            context = {'user': user}
+            send_mail(
+                render_to_string(
+                    'users/emails/welcome_subject.txt', context).strip(),
+                render_to_string('users/emails/welcome.txt', context),
+                None, [user.email])
+        return response
+
+
+class PasswordReset(PasswordResetView):
+    # Письма всем аккаунтам с этим адресом попадают в outbox одной
+    # транзакцией
+    @method_decorator(transaction.atomic)
+    def form_valid(self, form):
+        return super().form_valid(form)
@@ -42,14 +42,20 @@ INSTALLED_APPS = [
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
     'search.apps.SearchConfig',
+    'outbox.apps.OutboxConfig',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.ProfilingMiddleware',
+    'core.middleware.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.ReplicaMiddleware',
+    'core.middleware.ThrottleMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -58,12 +64,23 @@ ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+if not DEBUG:
+    # Шаблоны разбираются один раз на процесс, см. core.warmup
+    TEMPLATE_LOADERS = [
+        ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS)]
+
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Учитывает время отрисовки в метриках запроса, см. core.metrics
+        'BACKEND': 'core.template_backends.TimedDjangoTemplates',
+        'NAME': 'django',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -76,6 +93,8 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
+# Прогревать шаблоны, маршруты и базу при старте WSGI-процесса
+WARMUP_ON_START = not DEBUG
 
 
 # Database
@@ -85,7 +104,53 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+    },
+    # Копия default для чтения, обновляется командой sync_replica
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db.replica.sqlite3'),
+        'TEST': {'MIRROR': 'default'},
+    },
+}
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+# Реплики для чтения списков и страниц постов, например ['replica'].
+# Пусто — всё читается из default
+REPLICA_DATABASES = []
+# Сколько секунд после записи сессия читает только из default; не меньше
+# отставания реплики (периода запуска sync_replica)
+REPLICA_STICKY_SECONDS = 60
+
+
+# Cache
+# https://docs.djangoproject.com/en/2.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+    # Результаты поиска и ключ их сброса. При нескольких процессах нужен
+    # общий кэш (memcached, redis), иначе после правки поста другие
+    # процессы отдают старые результаты до истечения TIMEOUT
+    'search': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'search',
+        'TIMEOUT': 60,
+        'OPTIONS': {
+            'MAX_ENTRIES': 1000,
+        },
+    },
+    # Корзины ограничения частоты запросов. Чтобы лимит был общим для
+    # всех процессов, нужен общий кэш (memcached, redis)
+    'throttle': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'throttle',
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+        },
+    },
 }
 
 
@@ -127,14 +192,119 @@ USE_TZ = False
 
 STATIC_URL = '/static/'
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+# collectstatic добавляет хэш к именам и пишет .gz/.br рядом с файлами
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Загрузки пишутся на диск по частям; слишком большие файлы отбрасываются
+FILE_UPLOAD_HANDLERS = [
+    'core.uploads.SizeLimitUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+UPLOAD_MAX_SIZE = 5 * 1024 * 1024
 
 LOGIN_URL = '/auth/login/'
 LOGIN_REDIRECT_URL = '/'
 
+# Письма пишутся в таблицу outbox в транзакции запроса, а отправляет их
+# воркер manage.py drain_outbox --loop через OUTBOX_EMAIL_BACKEND
+EMAIL_BACKEND = 'outbox.backends.OutboxBackend'
 #  подключаем движок filebased.EmailBackend
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+OUTBOX_EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 # указываем директорию, в которую будут складываться файлы писем
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+# Сколько писем брать за раз, сколько раз пытаться отправить, пауза перед
+# повтором (удваивается с каждой попыткой) и на сколько секунд воркер
+# забирает пачку себе
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_DELAY = 60
+OUTBOX_LEASE = 300
+# Метрики очереди: до скольки считать письма и по скольким последним
+# отправленным считать задержку
+OUTBOX_METRICS_CAP = 10000
+OUTBOX_METRICS_SAMPLE = 1000
 
 # Число страниц при пагинации
 COUNT_PAGINATOR_PAGE = 10
+# До скольки считать посты в отфильтрованном списке админки
+ADMIN_COUNT_CAP = 10000
+# Пагинация по курсору (pub_date, id) вместо номеров страниц
+CURSOR_PAGINATION = False
+
+# Пул процессов для работы вне запроса (0 — выполнять сразу) и сколько
+# задач может ждать в очереди, см. core.pool
+BACKGROUND_WORKERS = 2
+BACKGROUND_QUEUE_SIZE = 100
+
+# Рамки миниатюр картинок постов: в ленте и на странице поста
+POST_THUMBNAIL_SIZES = {
+    'feed': (960, 540),
+    'detail': (1600, 1600),
+}
+
+# Лента подписок: до скольких подписчиков посты раскладываются по лентам
+# при публикации (до TIMELINE_FANOUT_INLINE — прямо в запросе, дальше — в
+# фоновом потоке после коммита), размер пачки вставки и сколько постов
+# автора досыпать в ленту при подписке
+TIMELINE_FANOUT_LIMIT = 10000
+TIMELINE_FANOUT_INLINE = 100
+TIMELINE_FANOUT_BATCH = 1000
+TIMELINE_BACKFILL = 100
+
+# Выбор группы в форме поста: сколько групп отдаёт поиск, сколько
+# популярных групп показывать сразу и сколько секунд их кэшировать
+GROUP_AUTOCOMPLETE_LIMIT = 20
+GROUP_POPULAR_LIMIT = 20
+GROUP_POPULAR_TIMEOUT = 60 * 10
+
+# Сколько секунд хранить отрисованные карточки постов
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Общий кэш страниц постов. Включать только с кэшем, общим для всех
+# процессов (memcached, redis): сброс по сигналам должен видеть каждый
+PAGE_CACHE_ENABLED = False
+PAGE_CACHE_TIMEOUT = 60 * 10
+
+# Поиск: сколько постов показывать и до скольки считать совпадения
+SEARCH_RESULTS_LIMIT = 20
+SEARCH_HITS_CAP = 1000
+# Сколько кандидатов хранить в кэше для сужения запроса по префиксу
+SEARCH_CANDIDATES_LIMIT = 200
+
+# Лимиты частоты запросов по имени маршрута, см. core.throttle: для
+# сессии и для IP — (токенов в секунду, размер корзины)
+THROTTLE_CACHE = 'throttle'
+THROTTLE_RATES = {
+    'search:search': {'session': (4, 10), 'ip': (20, 50)},
+    'posts:group_autocomplete': {'session': (4, 10), 'ip': (20, 50)},
+}
+# Сколько секунд хранить последний ответ клиента, отдаваемый вместо 429
+THROTTLE_LAST_RESPONSE_TIMEOUT = 60
+
+# Метрики запросов для Prometheus (/metrics) и с каких адресов их читать
+METRICS_ENABLED = True
+METRICS_ALLOWED_IPS = ['127.0.0.1']
+
+# Профили запросов: по токену в заголовке X-Profile (manage.py
+# profile_token) и доля случайных запросов; снимки хранятся в PROFILING_DIR
+# и смотрятся в админке на /admin/profiling/
+PROFILING_ENABLED = True
+PROFILING_SAMPLE_RATE = 0
+PROFILING_TOKEN_MAX_AGE = 60 * 60
+PROFILING_DIR = os.path.join(BASE_DIR, 'profiles')
+PROFILING_MAX_BYTES = 100 * 1024 * 1024
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.warmup': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
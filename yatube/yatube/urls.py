@@ -1,11 +1,36 @@
+from django.conf import settings
+from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
+
+from core import views as core_views
 
 urlpatterns = [
     path('', include('posts.urls', namespace='posts')),
+    path(
+        'admin/profiling/', core_views.profiling_list,
+        name='profiling_list'),
+    path(
+        'admin/profiling/<str:name>/', core_views.profiling_detail,
+        name='profiling_detail'),
+    path(
+        'admin/profiling/<str:name>/download/',
+        core_views.profiling_download, name='profiling_download'),
     path('admin/', admin.site.urls),
     path('auth/', include('users.urls', namespace='users')),
     path('auth/', include('django.contrib.auth.urls')),
     path('about/', include('about.urls', namespace='about')),
     path('search/', include('search.urls', namespace='search')),
+    path('metrics', core_views.metrics_export, name='metrics'),
+]
+
+if settings.DEBUG:
+    urlpatterns += static(
+        settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+
+# Обычно статику отдаёт веб-сервер; здесь — для запуска без него
+urlpatterns += [
+    re_path(
+        r'^{}(?P<path>.+)$'.format(settings.STATIC_URL.lstrip('/')),
+        core_views.serve_static, name='static'),
 ]